@@ -0,0 +1,97 @@
+"""
+Micro-benchmark for the nodes row codec.
+
+Compares the per-row cost of the previous per-property branching loop against the
+precompiled codec, and of `SELECT *` against a projected `get_nodes` fetch.
+
+Usage: PYTHONPATH=. python benchmarks/bench_codec.py [num_rows]
+"""
+import json
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from database.codec import NODE_CODEC
+from database.sqlite_manager import SQLiteManager
+
+def make_rows(n: int) -> list[dict]:
+    now = datetime.now()
+    return [
+        {
+            "primary_id": f"{i:032x}",
+            "content": "lorem ipsum " * 200,
+            "file_size": 12.0,
+            "file_creation_time": now,
+            "file_modification_time": now,
+            "filetype": "pdf",
+            "location": "Local Files",
+            "path": f"/tmp/file_{i}.pdf",
+            "label": "research_paper",
+            "author": ["A. Author", "B. Author"],
+            "summary": "A summary",
+            "tags": ["tag1", "tag2", "tag3"],
+            "themes": ["theme1"],
+            "keywords": ["kw1", "kw2"],
+            "content_embedding": np.random.rand(768).tolist(),
+        }
+        for i in range(n)
+    ]
+
+def legacy_encode(row: dict) -> tuple[str, list]:
+    """The per-row, per-property branching the manager used before the codec."""
+    columns, values = [], []
+    for name, column in NODE_CODEC.columns.items():
+        if name in row:
+            columns.append(name)
+            value = row[name]
+            datatype = column.sql_type
+            if datatype == "TEXT" and isinstance(value, list):
+                value = json.dumps(value)
+            elif datatype == "BLOB":
+                value = np.array(value, dtype=np.float32).tobytes()
+            elif datatype == "TIMESTAMP":
+                value = value.isoformat()
+            values.append(value)
+    sql = f"INSERT INTO nodes ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+    return sql, values
+
+def timed(label: str, n: int, fn) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed * 1e6 / n:10.2f} us/row")
+    return elapsed
+
+def main(n: int = 5000) -> None:
+    rows = make_rows(n)
+
+    timed("encode: legacy branching", n, lambda: [legacy_encode(row) for row in rows])
+    timed("encode: codec", n, lambda: [
+        (NODE_CODEC.insert_sql(names), values)
+        for names, values in map(NODE_CODEC.encode, rows)
+    ])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = SQLiteManager(str(Path(tmp) / "bench.db"))
+        manager.insert_nodes(rows)
+        ids = list(range(1, n + 1))
+
+        def select_star():
+            cursor = manager.conn.execute("SELECT * FROM nodes")
+            names = tuple(d[0] for d in cursor.description)
+            return [NODE_CODEC.decode(names, row) for row in cursor.fetchall()]
+
+        timed("fetch: SELECT * (all columns decoded)", n, select_star)
+        timed("fetch: get_nodes(fields=[path, summary])", n,
+              lambda: manager.get_nodes(ids, fields=["path", "summary"]))
+        manager.close()
+
+    print(f"sqlite3 {sqlite3.sqlite_version}, {n} rows")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
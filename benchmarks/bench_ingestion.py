@@ -0,0 +1,281 @@
+"""
+End-to-end ingestion benchmark on a synthetic corpus.
+
+Generates a corpus (see corpus.py), then runs the real pipeline stages over it:
+walk -> parse (with the parse cache) -> dedup -> featurise -> embed -> persist, with
+a stub LLM and the real embed_file over a fake, deterministic embedding model, both
+sleeping for a configurable latency instead of calling an API. It runs the pipeline cold, then again with
+--resume (warm), then times vector searches against the resulting store.
+
+Throughput, per-span latency quantiles (from config.metrics) and peak RSS are
+appended as one JSON line per run to the results file, tagged with the current
+commit, so runs can be compared across commits.
+
+`--parser tika` uses the real FileParser and needs Tika (and Tesseract for the
+scanned PDFs). `--parser plain` swaps in a minimal text extractor that only
+understands the synthetic files, to benchmark everything around parsing.
+
+Usage: PYTHONPATH=. python benchmarks/bench_ingestion.py [--scale N] [--parser plain|tika]
+"""
+import asyncio
+import functools
+import json
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional
+from unittest import mock
+
+import click
+import numpy as np
+
+from benchmarks.corpus import CorpusSpec, generate_corpus
+from components.featurisation import embedding_model
+from components.featurisation.chunking import content_hash
+from components.local_files_walker.hashing import hash_file
+from components.local_files_walker.scanner import DirectoryScanner, ScannedFile
+from components.local_files_walker.scheduling import FileScheduler
+from components.pipeline.pipeline import IngestionPipeline, PipelineItem, build_stages
+from config.metrics import metrics
+from database.chunk_store import ChunkStore
+from database.content import ContentRef, content_cache
+from database.duplicates import DuplicateStore
+from database.embedding_cache import EmbeddingCache
+from database.job_ledger import JobLedger
+from database.lineage import LineageStore
+from database.node import EmbeddingNode, FileNode, LLMNode
+from database.sqlite_manager import SQLiteManager
+
+RESULTS_PATH = Path(__file__).resolve().parent / "results.jsonl"
+EMBEDDING_DIM = 768
+# Spans whose quantiles go into the results, when the run recorded them
+REPORTED_SPANS = (
+    "hash_file", "parse_plain", "parse_with_tika", "fallback_parse_file", "ocr_missing_pages", "parse_cache_get",
+    "llm_featurise", "embedding_call", "embedding_cache_get", "sqlite_write", "pipeline_stage",
+    "vector_search", "chunk_search",
+)
+
+class PlainTextParser:
+    """Just enough of FileParser's interface for the pipeline, without Tika or OCR.
+
+    Extracts text from the synthetic Markdown, docx and text-layer PDFs, and finds
+    nothing in the scanned PDFs, which the parse stage then drops.
+    """
+
+    def __init__(self, local_files_path: Path, parsed_files_path: Path):
+        self.local_files_path = Path(local_files_path)
+        self.parsed_files_path = Path(parsed_files_path)
+        self.parsed_files_path.mkdir(parents=True, exist_ok=True)
+
+    def scan_files(self) -> Iterator[ScannedFile]:
+        return DirectoryScanner(self.local_files_path).scan()
+
+    def hash_file(self, file_path: Path, file_stat: Optional[os.stat_result] = None) -> str:
+        with metrics.span("hash_file", filetype=file_path.suffix.lstrip(".")):
+            return hash_file(file_path, file_stat)
+
+    def extract(self, file_path: Path) -> str:
+        if file_path.suffix == ".md":
+            return file_path.read_text(encoding="utf-8")
+        if file_path.suffix == ".docx":
+            with zipfile.ZipFile(file_path) as docx:
+                xml = docx.read("word/document.xml").decode("utf-8")
+            return "\n\n".join(re.findall(r"<w:t>(.*?)</w:t>", xml))
+        data = file_path.read_bytes().decode("latin-1")
+        return "\n".join(match.replace("\\(", "(").replace("\\)", ")") for match in re.findall(r"\(((?:[^()\\]|\\.)*)\) '", data))
+
+    def file_to_node(self, file_path: Path, file_stat: Optional[os.stat_result] = None) -> FileNode:
+        file_stat = file_stat or file_path.stat()
+        file_hash = self.hash_file(file_path, file_stat)
+        cache_file = self.parsed_files_path / f"{file_hash}.txt"
+        filetype = file_path.suffix.lstrip(".")
+        if cache_file.exists():
+            metrics.count("parse_cache_hits")
+            content = cache_file.read_text(encoding="utf-8")
+        else:
+            metrics.count("parse_cache_misses")
+            with metrics.span("parse_plain", filetype=filetype):
+                content = self.extract(file_path)
+            cache_file.write_text(content, encoding="utf-8")
+        content_ref = ContentRef(path=str(cache_file), length=len(content))
+        content_cache.put(content_ref, content)
+        return FileNode(
+            primary_id=file_hash,
+            content_ref=content_ref,
+            file_size=round(file_stat.st_size / 1024),
+            file_creation_time=datetime.fromtimestamp(file_stat.st_mtime),
+            file_modification_time=datetime.fromtimestamp(file_stat.st_mtime),
+            filetype=filetype,
+            location="Local Files",
+            path=str(file_path),
+        )
+
+    def remove_cached_content(self, file_hash: str) -> None:
+        (self.parsed_files_path / f"{file_hash}.txt").unlink(missing_ok=True)
+
+def make_stub_featurise(latency: float):
+    async def featurise(node: FileNode) -> LLMNode:
+        with metrics.span("llm_featurise", filetype=node.filetype):
+            await asyncio.sleep(latency)
+        words = node.load_content().split()
+        return LLMNode(
+            label="benchmark", author=[], research_question="", main_argument=" ".join(words[:20]),
+            summary=" ".join(words[:60]), tags=sorted(set(words[:10])), themes=[], keywords=[],
+            quotes=[], content_creation_date=datetime(2020, 1, 1), entities_persons=[],
+            entities_places=[], entities_organizations=[], entities_references=[],
+        )
+    return featurise
+
+class FakeEmbeddingModel:
+    """Stands in for EmbeddingModel: sleeps for `latency`, then returns a vector seeded by the text."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def embed_text(self, text: str) -> list[float]:
+        metrics.count("embedding_input_chars", len(text))
+        with metrics.span("embedding_call"):
+            await asyncio.sleep(self.latency)
+        vector = np.random.default_rng(int(content_hash(text)[:16], 16)).standard_normal(EMBEDDING_DIM)
+        return (vector / np.linalg.norm(vector)).astype(np.float32).tolist()
+
+def make_parser(kind: str, corpus_dir: Path, cache_dir: Path):
+    if kind == "tika":
+        from components.local_files_walker.local_files import FileParser
+        return FileParser(corpus_dir, cache_dir)
+    return PlainTextParser(corpus_dir, cache_dir)
+
+async def run_pipeline(parser, db_path: Path, llm_latency: float, embed_latency: float, resume: bool) -> dict:
+    db_manager = SQLiteManager(str(db_path))
+    embedding_cache = EmbeddingCache(str(db_path), "fake")
+    stages = build_stages(
+        parser,
+        featurise_fn=make_stub_featurise(llm_latency),
+        embed_fn=functools.partial(embedding_model.embed_file, cache=embedding_cache),
+        db_manager=db_manager,
+        ledger=JobLedger(str(db_path)),
+        lineage=LineageStore(str(db_path)),
+        duplicates=DuplicateStore(str(db_path)),
+        resume=resume,
+        chunk_store=ChunkStore(str(db_path)),
+        embedding_cache=embedding_cache,
+    )
+    def scheduled_items():
+        for candidate in FileScheduler().stream(parser.scan_files()):
+            yield PipelineItem(path=candidate.path, lane=candidate.lane, file_stat=candidate.stat)
+
+    pipeline = IngestionPipeline(source=scheduled_items, stages=stages, report_interval=3600)
+    start = time.perf_counter()
+    # The real embed_file, only the API behind it is faked
+    with mock.patch.object(embedding_model, "get_embedding_model", lambda: FakeEmbeddingModel(embed_latency)):
+        stats = await pipeline.run()
+    elapsed = time.perf_counter() - start
+    db_manager.close()
+    return {
+        "seconds": round(elapsed, 4),
+        "files": pipeline.walked,
+        "files_per_second": round(pipeline.walked / elapsed, 2),
+        "stages": {s.name: {"processed": s.processed, "dropped": s.dropped, "failed": s.failed} for s in stats},
+    }
+
+def run_searches(db_path: Path, queries: int, top_k: int = 10) -> dict:
+    db_manager = SQLiteManager(str(db_path))
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    for _ in range(queries):
+        with metrics.span("vector_search"):
+            db_manager.vector_search(rng.standard_normal(EMBEDDING_DIM).tolist(), top_k)
+    elapsed = time.perf_counter() - start
+    db_manager.close()
+
+    chunk_store = ChunkStore(str(db_path))
+    chunk_store.load_index()
+    start = time.perf_counter()
+    for _ in range(queries):
+        chunk_store.search_documents(rng.standard_normal(EMBEDDING_DIM), top_k)
+    passage_elapsed = time.perf_counter() - start
+    chunk_store.close()
+    return {
+        "queries": queries,
+        "queries_per_second": round(queries / elapsed, 2),
+        "passage_queries_per_second": round(queries / passage_elapsed, 2),
+    }
+
+def span_quantiles() -> dict:
+    snapshot = metrics.snapshot()["timings"]
+    summary = {}
+    for name in REPORTED_SPANS:
+        for entry in snapshot.get(name, []):
+            key = name + "".join(f"[{value}]" for value in entry["labels"].values())
+            summary[key] = {
+                "count": entry["count"],
+                **{q: round(entry[q] * 1000, 3) for q in ("p50", "p95", "p99")},
+            }
+    return summary
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def current_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+@click.command()
+@click.option("--scale", default=1, show_default=True, help="Multiplier on the default corpus mix.")
+@click.option("--words", default=1500, show_default=True, help="Words per generated document.")
+@click.option("--parser", "parser_kind", type=click.Choice(["plain", "tika"]), default="plain", show_default=True)
+@click.option("--llm-latency", default=0.05, show_default=True, help="Seconds per stub LLM call.")
+@click.option("--embed-latency", default=0.01, show_default=True, help="Seconds per fake embedding call.")
+@click.option("--queries", default=100, show_default=True, help="Vector searches to time.")
+@click.option("--results", type=click.Path(path_type=Path), default=RESULTS_PATH, show_default=True)
+def main(scale: int, words: int, parser_kind: str, llm_latency: float, embed_latency: float, queries: int, results: Path):
+    spec = CorpusSpec(words_per_doc=words).scaled(scale)
+    with tempfile.TemporaryDirectory() as work_dir:
+        work_dir = Path(work_dir)
+        start = time.perf_counter()
+        counts = generate_corpus(work_dir / "corpus", spec)
+        generate_seconds = time.perf_counter() - start
+
+        db_path = work_dir / "bench.db"
+        parser = make_parser(parser_kind, work_dir / "corpus", work_dir / "cache")
+        cold = asyncio.run(run_pipeline(parser, db_path, llm_latency, embed_latency, resume=False))
+        warm = asyncio.run(run_pipeline(parser, db_path, llm_latency, embed_latency, resume=True))
+        search = run_searches(db_path, queries)
+
+    result = {
+        "commit": current_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "parser": parser_kind,
+        "spec": spec.__dict__,
+        "corpus": counts,
+        "generate_seconds": round(generate_seconds, 3),
+        "llm_latency": llm_latency,
+        "embed_latency": embed_latency,
+        "cold": cold,
+        "warm": warm,
+        "search": search,
+        "spans_ms": span_quantiles(),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    with open(results, "a", encoding="utf-8") as f:
+        f.write(json.dumps(result) + "\n")
+    print(json.dumps({key: result[key] for key in ("commit", "cold", "warm", "search", "peak_rss_mb")}, indent=2))
+
+if __name__ == "__main__":
+    main()
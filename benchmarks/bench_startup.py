@@ -0,0 +1,48 @@
+"""
+Startup-time benchmark for the command line tooling.
+
+Runs each command in a fresh interpreter several times and reports the median and
+best wall time, then the slowest imports of the first command (from -X importtime),
+to spot a heavy backend creeping back into the import path.
+
+Usage: python benchmarks/bench_startup.py [repeats]
+"""
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+COMMANDS = [
+    ["cli.py", "--help"],
+    ["cli.py", "cache-stats"],
+    ["cli.py", "ingest", "--help"],
+    ["cli.py", "digest", "--help"],
+]
+
+def time_command(args: list[str], repeats: int) -> list[float]:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=ROOT, check=True, capture_output=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def slowest_imports(args: list[str], top: int = 10) -> list[tuple[int, str]]:
+    result = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=ROOT, capture_output=True, text=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line and "cumulative" not in line:
+            _, cumulative, name = line.split("|")
+            imports.append((int(cumulative), name.rstrip()))
+    return sorted(imports, reverse=True)[:top]
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for args in COMMANDS:
+        timings = time_command(args, repeats)
+        print(f"{' '.join(args):<28} median {statistics.median(timings) * 1000:7.1f} ms   best {min(timings) * 1000:7.1f} ms")
+    print(f"\nSlowest imports of `{' '.join(COMMANDS[0])}` (cumulative us):")
+    for cumulative, name in slowest_imports(COMMANDS[0]):
+        print(f"{cumulative:>10}  {name}")
@@ -0,0 +1,192 @@
+"""
+Synthetic corpus generator for the ingestion benchmarks.
+
+Writes a reproducible (seeded) mix of documents: PDFs with a text layer, "scanned"
+PDFs with only an image and no text layer, docx, Markdown, and near-duplicate and
+exact copies of earlier documents. Everything is built by hand (a PDF is a few
+objects and an xref table, a docx a zip of XML parts), so no generator libraries
+are needed.
+
+Usage: PYTHONPATH=. python benchmarks/corpus.py OUTPUT_DIR [--scale N]
+"""
+import random
+import shutil
+import sys
+import zipfile
+import zlib
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+VOCABULARY = (
+    "wisdom memory reading argument evidence theory history economy market state "
+    "language mind knowledge society culture science method value power justice "
+    "nature reason experience freedom order change time structure system question "
+    "the of and a to in is that for it as with was on be by this are from or"
+).split()
+
+@dataclass
+class CorpusSpec:
+    pdf_text: int = 20
+    pdf_scanned: int = 5
+    docx: int = 10
+    md: int = 40
+    near_duplicates: int = 10
+    exact_duplicates: int = 5
+    words_per_doc: int = 1500
+    seed: int = 0
+
+    def scaled(self, factor: int) -> "CorpusSpec":
+        counts = {name: value * factor for name, value in asdict(self).items() if name not in ("words_per_doc", "seed")}
+        return CorpusSpec(**counts, words_per_doc=self.words_per_doc, seed=self.seed)
+
+def make_text(rng: random.Random, words: int) -> str:
+    paragraphs = []
+    while words > 0:
+        length = min(words, rng.randint(40, 160))
+        paragraphs.append(" ".join(rng.choices(VOCABULARY, k=length)).capitalize() + ".")
+        words -= length
+    return "\n\n".join(paragraphs)
+
+def _pdf(objects: list[bytes]) -> bytes:
+    """Assemble numbered PDF objects (1 = catalog) into a file with a valid xref table."""
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+def _stream(data: bytes, extra: str = "") -> bytes:
+    return f"<< /Length {len(data)} {extra}>>\nstream\n".encode() + data + b"\nendstream"
+
+def make_text_pdf(text: str, lines_per_page: int = 50, chars_per_line: int = 90) -> bytes:
+    """A PDF whose pages carry `text` as a real text layer in Helvetica."""
+    lines = []
+    for paragraph in text.split("\n\n"):
+        while paragraph:
+            lines.append(paragraph[:chars_per_line])
+            paragraph = paragraph[chars_per_line:]
+        lines.append("")
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+
+    # 1 catalog, 2 pages, 3 font, then a (page, content) object pair per page
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages)))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, page_lines in enumerate(pages):
+        escaped = (line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in page_lines)
+        content = "BT /F1 10 Tf 14 TL 40 800 Td " + " ".join(f"({line}) '" for line in escaped) + " ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode()
+        )
+        objects.append(_stream(content.encode("latin-1")))
+    return _pdf(objects)
+
+def make_scanned_pdf(rng: random.Random, pages: int = 2, side: int = 600) -> bytes:
+    """A PDF of grey noise images and no text layer, which has to go through OCR."""
+    kids = " ".join(f"{3 + 3 * i} 0 R" for i in range(pages))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode(),
+    ]
+    for i in range(pages):
+        pixels = zlib.compress(rng.randbytes(side * side))
+        page, content, image = 3 + 3 * i, 4 + 3 * i, 5 + 3 * i
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /XObject << /Im0 {image} 0 R >> >> /Contents {content} 0 R >>".encode()
+        )
+        objects.append(_stream(b"q 595 0 0 842 0 0 cm /Im0 Do Q"))
+        objects.append(_stream(
+            pixels,
+            f"/Type /XObject /Subtype /Image /Width {side} /Height {side} "
+            "/ColorSpace /DeviceGray /BitsPerComponent 8 /Filter /FlateDecode ",
+        ))
+    return _pdf(objects)
+
+def make_docx(text: str, path: Path) -> None:
+    body = "".join(f"<w:p><w:r><w:t>{escape(paragraph)}</w:t></w:r></w:p>" for paragraph in text.split("\n\n"))
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr("[Content_Types].xml", (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/word/document.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+            '</Types>'
+        ))
+        docx.writestr("_rels/.rels", (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Target="word/document.xml" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+            '</Relationships>'
+        ))
+        docx.writestr("word/document.xml", (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f'<w:body>{body}</w:body></w:document>'
+        ))
+
+def perturb(rng: random.Random, text: str, rate: float = 0.02) -> str:
+    """Replace a small fraction of words, giving a near duplicate of `text`."""
+    words = text.split(" ")
+    for i in rng.sample(range(len(words)), k=max(1, int(len(words) * rate))):
+        words[i] = rng.choice(VOCABULARY)
+    return " ".join(words)
+
+def generate_corpus(root: Path, spec: CorpusSpec = CorpusSpec()) -> dict[str, int]:
+    """Write the corpus described by `spec` under `root` and return file counts per kind."""
+    rng = random.Random(spec.seed)
+    root = Path(root)
+    texts: list[tuple[str, str]] = []
+
+    def write(kind: str, i: int, suffix: str, data: bytes | str) -> Path:
+        path = root / kind / f"{kind}_{i:05d}{suffix}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data if isinstance(data, bytes) else data.encode("utf-8"))
+        return path
+
+    for i in range(spec.md):
+        text = make_text(rng, spec.words_per_doc)
+        texts.append((".md", text))
+        write("md", i, ".md", f"# Note {i}\n\n{text}\n")
+    for i in range(spec.pdf_text):
+        text = make_text(rng, spec.words_per_doc)
+        texts.append((".pdf", text))
+        write("pdf_text", i, ".pdf", make_text_pdf(text))
+    for i in range(spec.pdf_scanned):
+        write("pdf_scanned", i, ".pdf", make_scanned_pdf(rng))
+    for i in range(spec.docx):
+        text = make_text(rng, spec.words_per_doc)
+        texts.append((".docx", text))
+        path = root / "docx" / f"docx_{i:05d}.docx"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        make_docx(text, path)
+
+    for i in range(spec.near_duplicates):
+        _, text = rng.choice(texts)
+        write("near_duplicates", i, ".md", perturb(rng, text))
+    originals = sorted(path for path in root.rglob("*") if path.is_file())
+    for i in range(min(spec.exact_duplicates, len(originals))):
+        source = rng.choice(originals)
+        target = root / "exact_duplicates" / f"copy_{i:05d}{source.suffix}"
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(source, target)
+
+    return {kind.name: sum(1 for _ in kind.iterdir()) for kind in sorted(root.iterdir()) if kind.is_dir()}
+
+if __name__ == "__main__":
+    output = Path(sys.argv[1])
+    scale = int(sys.argv[sys.argv.index("--scale") + 1]) if "--scale" in sys.argv else 1
+    print(generate_corpus(output, CorpusSpec().scaled(scale)))
@@ -0,0 +1,89 @@
+"""
+Command line entry point for the local tooling.
+
+Subcommands are imported only when they are invoked, so `--help` and light commands
+like `cache-stats` never load Tika, the OCR stack, NumPy or the LLM SDKs.
+
+Usage: python cli.py [COMMAND] [ARGS]...
+"""
+import importlib
+import os
+import sqlite3
+
+import click
+
+from config.settings import DATABASE_PATH, PARSED_FILES_PATH
+
+class LazyGroup(click.Group):
+    """A click group whose subcommands are "module:attribute" strings, imported on use.
+
+    Help texts are given up front, so listing the commands imports nothing either.
+    """
+
+    def __init__(self, *args, lazy_subcommands: dict[str, tuple[str, str]], **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_subcommands = lazy_subcommands
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return sorted([*super().list_commands(ctx), *self.lazy_subcommands])
+
+    def get_command(self, ctx: click.Context, name: str) -> click.Command | None:
+        if name not in self.lazy_subcommands:
+            return super().get_command(ctx, name)
+        module_name, attribute = self.lazy_subcommands[name][0].split(":")
+        return getattr(importlib.import_module(module_name), attribute)
+
+    def format_commands(self, ctx: click.Context, formatter: click.HelpFormatter) -> None:
+        rows = []
+        for name in self.list_commands(ctx):
+            if name in self.lazy_subcommands:
+                rows.append((name, self.lazy_subcommands[name][1]))
+            else:
+                rows.append((name, self.commands[name].get_short_help_str()))
+        with formatter.section("Commands"):
+            formatter.write_dl(rows)
+
+@click.group(
+    cls=LazyGroup,
+    lazy_subcommands={
+        "ingest": ("components.pipeline.pipeline:main", "Walk, parse, featurise, embed and store local files."),
+        "digest": ("components.digest.digest:main", "Precompute or send the daily digest."),
+        "notes": ("main:main", "Transcribe handwritten notes into the Obsidian vault."),
+        "export-vault": ("components.obsidian.exporter:main", "Export stored nodes to the Obsidian vault."),
+        "related-graph": ("database.related_graph:main", "Update the related-nodes graph from stored embeddings."),
+        "snapshot": ("database.snapshot:main", "Export or import a Parquet snapshot of the nodes table."),
+        "serve": ("components.query_server.server:main", "Run the local query server with embeddings kept in memory."),
+        "notion-sync": ("components.notion.notion_connector:main", "Sync a Notion database."),
+    },
+)
+def cli():
+    pass
+
+@cli.command("cache-stats")
+def cache_stats():
+    """Show parse cache, store and ledger sizes."""
+    entries = [entry for entry in os.scandir(PARSED_FILES_PATH) if entry.name.endswith(".txt")] if PARSED_FILES_PATH.exists() else []
+    empty = sum(1 for entry in entries if entry.stat().st_size == 0)
+    total_mb = sum(entry.stat().st_size for entry in entries) / 1024 ** 2
+    click.echo(f"Parse cache: {len(entries)} entries ({empty} empty), {total_mb:.1f} MB in {PARSED_FILES_PATH}")
+
+    if not DATABASE_PATH.exists():
+        click.echo(f"No database at {DATABASE_PATH}")
+        return
+    # Read-only, so asking for stats never creates or migrates tables
+    conn = sqlite3.connect(f"file:{DATABASE_PATH}?mode=ro", uri=True)
+    tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for table, label in (("nodes", "Nodes"), ("embedding_cache", "Cached chunk embeddings"), ("node_duplicates", "Near duplicates")):
+        if table in tables:
+            (count,) = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()
+            click.echo(f"{label}: {count}")
+    if "node_stages" in tables:
+        counts = dict(conn.execute("SELECT stage, COUNT(*) FROM node_stages GROUP BY stage").fetchall())
+        click.echo("Ledger: " + ", ".join(f"{stage} {count}" for stage, count in counts.items()))
+    if "parse_failures" in tables:
+        counts = dict(conn.execute("SELECT error_class, COUNT(*) FROM parse_failures GROUP BY error_class").fetchall())
+        click.echo("Parse failures: " + (", ".join(f"{error_class} {count}" for error_class, count in counts.items()) or "none"))
+    conn.close()
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,163 @@
+import re
+import zlib
+from typing import Optional
+
+import numpy as np
+
+from config.settings import (
+    MINHASH_NUM_PERM, MINHASH_BANDS, SHINGLE_SIZE, NEAR_DUPLICATE_THRESHOLD,
+)
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_TOKEN = re.compile(r"\w+")
+# Shingles processed per block when computing signatures, bounds memory to
+# block x num_perm uint64s regardless of document length
+_BLOCK_SIZE = 4096
+
+def shingle_hashes(text: str, shingle_size: int = SHINGLE_SIZE) -> np.ndarray:
+    """Hash every run of `shingle_size` consecutive words into a unique uint32 set."""
+    tokens = _TOKEN.findall(text.lower())
+    if not tokens:
+        return np.empty(0, dtype=np.uint64)
+    token_hashes = np.fromiter((zlib.crc32(token.encode()) for token in tokens), dtype=np.uint64, count=len(tokens))
+    if len(token_hashes) < shingle_size:
+        shingle_size = len(token_hashes)
+    windows = np.lib.stride_tricks.sliding_window_view(token_hashes, shingle_size)
+    # Polynomial rolling combination of the token hashes in each window (wraps mod 2^64)
+    powers = np.uint64(1000003) ** np.arange(shingle_size, dtype=np.uint64)
+    combined = (windows * powers).sum(axis=1, dtype=np.uint64)
+    return np.unique(combined & _MAX_HASH)
+
+class MinHasher:
+    """Computes MinHash signatures with `num_perm` universal hash permutations."""
+
+    def __init__(self, num_perm: int = MINHASH_NUM_PERM, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = shingle_hashes(text)
+        signature = np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        for start in range(0, len(hashes), _BLOCK_SIZE):
+            block = hashes[start:start + _BLOCK_SIZE, None]
+            permuted = ((self.a * block + self.b) % _MERSENNE_PRIME) & _MAX_HASH
+            np.minimum(signature, permuted.min(axis=0), out=signature)
+        return signature.astype(np.uint32)
+
+def estimate_jaccard(signature: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """Estimated Jaccard similarity of one signature against a (n, num_perm) matrix."""
+    return (others == signature).mean(axis=-1)
+
+class NearDuplicateIndex:
+    """LSH index over MinHash signatures that clusters near-identical documents.
+
+    Signatures are split into `bands` bands; documents sharing any band bucket are
+    candidates, confirmed by their estimated Jaccard similarity. The first document
+    of a cluster is its representative, later matches link to it.
+    """
+
+    def __init__(
+        self,
+        num_perm: int = MINHASH_NUM_PERM,
+        bands: int = MINHASH_BANDS,
+        threshold: float = NEAR_DUPLICATE_THRESHOLD,
+    ):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.keys: list[str] = []
+        self._rows: dict[str, int] = {} # key -> row in keys and _signatures
+        self.representatives: dict[str, str] = {}
+        self._removed: set[int] = set()
+        # Grown by doubling so that adding documents one at a time stays amortised O(1)
+        self._signatures = np.empty((64, num_perm), dtype=np.uint32)
+        self._buckets: list[dict[bytes, list[int]]] = [{} for _ in range(bands)]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """(n, bands) array of hashable band keys for a (n, num_perm) signature matrix."""
+        banded = np.ascontiguousarray(signatures.reshape(len(signatures), self.bands, self.rows))
+        return banded.view(np.dtype((np.void, self.rows * banded.itemsize)))[..., 0]
+
+    def load(self, keys: list[str], signatures: np.ndarray, representatives: dict[str, str]) -> None:
+        """Bulk-load previously computed signatures, e.g. from the duplicate store."""
+        if not keys:
+            return
+        offset = len(self.keys)
+        needed = offset + len(keys)
+        if needed > len(self._signatures):
+            grown = np.empty((max(needed, 2 * len(self._signatures)), self._signatures.shape[1]), dtype=np.uint32)
+            grown[:offset] = self._signatures[:offset]
+            self._signatures = grown
+        self._signatures[offset:needed] = signatures
+        self.keys.extend(keys)
+        self._rows.update((key, offset + row) for row, key in enumerate(keys))
+        band_keys = self._band_keys(signatures)
+        for band, buckets in enumerate(self._buckets):
+            for row, band_key in enumerate(band_keys[:, band]):
+                buckets.setdefault(band_key.tobytes(), []).append(offset + row)
+        for key in keys:
+            self.representatives[key] = representatives.get(key, key)
+
+    def query(self, signature: np.ndarray) -> Optional[tuple[str, float]]:
+        """Return (representative, similarity) of the closest near-duplicate, if any."""
+        band_keys = self._band_keys(signature[None, :])[0]
+        candidates = {
+            index
+            for band, buckets in enumerate(self._buckets)
+            for index in buckets.get(band_keys[band].tobytes(), ())
+        }
+        candidates -= self._removed
+        if not candidates:
+            return None
+        candidates = np.fromiter(candidates, dtype=np.int64)
+        similarities = estimate_jaccard(signature, self._signatures[candidates])
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+        return self.representatives[self.keys[candidates[best]]], float(similarities[best])
+
+    def add(self, key: str, text: str) -> Optional[tuple[str, float]]:
+        """Index a document, returning the cluster it joined (if any)."""
+        return self.add_signature(key, self.hasher.signature(text))
+
+    def add_signature(self, key: str, signature: np.ndarray) -> Optional[tuple[str, float]]:
+        if (signature == _MAX_HASH).all():
+            # No words to shingle, nothing meaningful to compare
+            return None
+        match = self.query(signature)
+        self.load([key], signature[None, :], {key: match[0]} if match else {})
+        return match
+
+    def remove(self, key: str) -> None:
+        """Stop matching against a document, e.g. after its node was superseded."""
+        if self.representatives.pop(key, None) is not None:
+            self._removed.add(self._rows[key])
+
+    def relink(self, members: list[str], representative: str) -> None:
+        """Point the members of a cluster at a new representative, e.g. after its old one was removed."""
+        for member in members:
+            if member in self.representatives:
+                self.representatives[member] = representative
+
+    def clusters(self) -> dict[str, list[str]]:
+        """Representative -> members (including the representative itself)."""
+        clusters: dict[str, list[str]] = {}
+        for key in self.representatives:
+            clusters.setdefault(self.representatives[key], []).append(key)
+        return clusters
+
+def cluster_texts(texts: dict[str, str], **index_kwargs) -> dict[str, list[str]]:
+    """Cluster a batch of documents by near-duplicate content."""
+    index = NearDuplicateIndex(**index_kwargs)
+    for key, text in texts.items():
+        index.add(key, text)
+    return index.clusters()
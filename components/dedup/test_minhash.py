@@ -0,0 +1,53 @@
+import random
+
+import numpy as np
+
+from components.dedup.minhash import MinHasher, NearDuplicateIndex, estimate_jaccard, shingle_hashes
+
+def make_document(seed: int, length: int = 2000) -> str:
+    rng = random.Random(seed)
+    return " ".join(f"word{rng.randrange(5000)}" for _ in range(length))
+
+def test_signature_similarity_tracks_jaccard():
+    """Test that near-identical texts have close signatures and unrelated texts do not."""
+    hasher = MinHasher()
+    document = make_document(0)
+    edited = document.replace(document[:200], "a small edit at the start")
+
+    signature = hasher.signature(document)
+    assert estimate_jaccard(signature, hasher.signature(edited)[None, :])[0] > 0.8
+    assert estimate_jaccard(signature, hasher.signature(make_document(1))[None, :])[0] < 0.1
+
+def test_shingles_are_deduplicated():
+    """Test that repeated passages only contribute their shingles once."""
+    assert len(shingle_hashes("one two three four five " * 10)) == 5
+
+def test_index_clusters_near_duplicates():
+    """Test that copies link to the first document seen, unrelated documents stay apart."""
+    index = NearDuplicateIndex()
+    original = make_document(0)
+
+    assert index.add("paper.pdf", original) is None
+    representative, similarity = index.add("paper (1).pdf", original + " exported copy")
+    assert representative == "paper.pdf" and similarity > 0.9
+    assert index.add("other.pdf", make_document(2)) is None
+
+    assert index.clusters() == {"paper.pdf": ["paper.pdf", "paper (1).pdf"], "other.pdf": ["other.pdf"]}
+
+def test_index_load_matches_incremental_add():
+    """Test that bulk-loaded signatures are matched like incrementally added ones."""
+    hasher = MinHasher()
+    documents = [make_document(seed) for seed in range(100)]
+    index = NearDuplicateIndex()
+    index.load([str(i) for i in range(100)], np.stack([hasher.signature(d) for d in documents]), {})
+
+    assert index.add("copy", documents[42]) == ("42", 1.0)
+
+def test_removed_documents_are_not_matched():
+    """Test that removed documents no longer act as representatives."""
+    index = NearDuplicateIndex()
+    document = make_document(0)
+    index.add("old", document)
+    index.remove("old")
+
+    assert index.add("new", document) is None
@@ -0,0 +1,167 @@
+import asyncio
+import functools
+from datetime import date, timedelta
+from typing import Awaitable, Callable, Optional
+
+import click
+from pydantic import BaseModel, Field
+
+from components.digest.scheduler import ReviewScheduler
+from components.featurisation.chunking import content_hash
+from config.config_logger import logger
+from config.settings import LLM_MODEL, DATABASE_PATH, DIGEST_SIZE, DIGEST_CONCURRENCY, DIGEST_REVIEW_GRADE
+from database.digest_store import DigestStore
+from database.review_store import ReviewStore
+from database.sqlite_manager import SQLiteManager
+
+class Question(BaseModel):
+    question: str = Field(description="A question testing recall or understanding of the content")
+    answer: str = Field(description="A short answer to the question")
+
+class QuestionSet(BaseModel):
+    questions: list[Question] = Field(description="Two to four questions about the content")
+
+class DigestItem(BaseModel):
+    primary_id: str
+    path: str
+    label: Optional[str]
+    summary: Optional[str]
+    questions: list[Question]
+
+class Digest(BaseModel):
+    digest_date: date
+    items: list[DigestItem]
+
+question_prompt = """
+You will be given the summary, main argument and notable quotes of a document the reader
+has read before. Write a few short questions (with answers) that help the reader recall
+and reflect on its key ideas.
+"""
+
+# Only what the digest shows and the question prompt needs, never content or embeddings
+DIGEST_FIELDS = ["primary_id", "path", "label", "summary", "main_argument", "quotes"]
+
+@functools.cache
+def get_question_agent():
+    # Imported lazily, the agent needs API credentials
+    from pydantic_ai import Agent
+    return Agent(LLM_MODEL, result_type=QuestionSet, system_prompt=question_prompt)
+
+async def generate_questions(prompt: str) -> QuestionSet:
+    result = await get_question_agent().run(prompt)
+    return result.data
+
+def question_input(node: dict) -> str:
+    quotes = "\n".join(f"- {quote}" for quote in node.get("quotes") or [])
+    return (
+        f"Summary: {node.get('summary') or ''}\n"
+        f"Main argument: {node.get('main_argument') or ''}\n"
+        f"Quotes:\n{quotes}"
+    )
+
+class DigestEngine:
+    """Builds daily digests ahead of time so that sending one is a single lookup.
+
+    Nodes are sampled through an indexed query on the node store, questions for the
+    sampled nodes are generated concurrently and cached per (node, prompt input hash),
+    and the finished digest is stored under its date.
+    """
+
+    def __init__(
+        self,
+        db_manager: SQLiteManager,
+        store: DigestStore,
+        generate_fn: Callable[[str], Awaitable[QuestionSet]] = generate_questions,
+        sample_fn: Optional[Callable[[int, date], list[int]]] = None,
+        size: int = DIGEST_SIZE,
+        concurrency: int = DIGEST_CONCURRENCY,
+    ):
+        self.db_manager = db_manager
+        self.store = store
+        self.generate_fn = generate_fn
+        # (k, digest date) -> node ids, uniform random sampling unless a scheduler is given
+        self.sample_fn = sample_fn or (lambda k, _: db_manager.sample_node_ids(k))
+        self.size = size
+        self.concurrency = concurrency
+        self.logger = logger
+
+    async def build(self, digest_date: date) -> Digest:
+        nodes = self.db_manager.get_nodes(self.sample_fn(self.size, digest_date), fields=DIGEST_FIELDS)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(*(self._questions_for(node, semaphore) for node in nodes))
+        digest = Digest(
+            digest_date=digest_date,
+            items=[
+                DigestItem(
+                    primary_id=node["primary_id"],
+                    path=node["path"],
+                    label=node["label"],
+                    summary=node["summary"],
+                    questions=questions,
+                )
+                for node, questions in zip(nodes, results)
+                if questions is not None
+            ],
+        )
+        self.store.put_digest(digest_date, digest.model_dump_json())
+        self.logger.info(f"Built digest for {digest_date} with {len(digest.items)} items")
+        return digest
+
+    async def precompute(self, days_ahead: int = 1) -> Digest:
+        """Build the digest for a future day, by default tomorrow's."""
+        return await self.build(date.today() + timedelta(days=days_ahead))
+
+    async def get_or_build(self, digest_date: date) -> Digest:
+        payload = self.store.get_digest(digest_date)
+        if payload is not None:
+            return Digest.model_validate_json(payload)
+        self.logger.warning(f"No precomputed digest for {digest_date}, building it now")
+        return await self.build(digest_date)
+
+    async def _questions_for(self, node: dict, semaphore: asyncio.Semaphore) -> Optional[list[Question]]:
+        prompt = question_input(node)
+        input_hash = content_hash(prompt)
+        cached = self.store.get_questions(node["primary_id"], input_hash)
+        if cached is not None:
+            return QuestionSet.model_validate_json(cached).questions
+        try:
+            async with semaphore:
+                question_set = await self.generate_fn(prompt)
+        except Exception as e:
+            self.logger.error(f"Error generating questions for {node['path']}: {e}")
+            return None
+        self.store.put_questions(node["primary_id"], input_hash, question_set.model_dump_json())
+        return question_set.questions
+
+def build_default_scheduler(db_path=DATABASE_PATH) -> ReviewScheduler:
+    return ReviewScheduler(SQLiteManager(str(db_path)), ReviewStore(str(db_path)))
+
+def build_default_engine(db_path=DATABASE_PATH) -> DigestEngine:
+    scheduler = build_default_scheduler(db_path)
+    return DigestEngine(
+        SQLiteManager(str(db_path)),
+        DigestStore(str(db_path)),
+        sample_fn=lambda k, on: scheduler.sample_due(k, on),
+    )
+
+@click.group()
+def main():
+    pass
+
+@main.command()
+@click.option("--days-ahead", default=1, show_default=True, help="Which future day to build the digest for.")
+def precompute(days_ahead: int):
+    asyncio.run(build_default_engine().precompute(days_ahead))
+
+@main.command()
+def send():
+    from components.digest.emailer import send_digest
+    digest = asyncio.run(build_default_engine().get_or_build(date.today()))
+    send_digest(digest)
+    # Everything shown counts as reviewed, pushing it back by its next SM-2 interval
+    scheduler = build_default_scheduler()
+    for item in digest.items:
+        scheduler.record_review(item.primary_id, DIGEST_REVIEW_GRADE)
+
+if __name__ == "__main__":
+    main()
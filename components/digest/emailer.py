@@ -0,0 +1,48 @@
+import os
+import smtplib
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from html import escape
+
+from components.digest.digest import Digest
+from config.config_logger import logger
+
+def format_digest_html(digest: Digest) -> str:
+    items = []
+    for item in digest.items:
+        questions = "".join(
+            f"<li><strong>{escape(q.question)}</strong> {escape(q.answer)}</li>" for q in item.questions
+        )
+        items.append(f"""
+        <li>
+            <h2>{escape(item.path.rsplit('/', 1)[-1])}</h2>
+            <p><strong>Type:</strong> {escape(item.label or '')}</p>
+            <p>{escape(item.summary or '')}</p>
+            <p><strong>Questions:</strong></p>
+            <ul>{questions}</ul>
+        </li>""")
+    return f"""
+    <html>
+    <body>
+    <h1>Yesterday's Wisdom - {digest.digest_date.isoformat()}</h1>
+    <ul>{''.join(items)}
+    </ul>
+    </body>
+    </html>
+    """
+
+def send_digest(digest: Digest, subject: str = "Morning Report") -> None:
+    """Send a digest over SMTP, with credentials taken from the environment."""
+    sender = os.environ["DIGEST_SENDER"]
+    recipient = os.environ.get("DIGEST_RECIPIENT", sender)
+
+    msg = MIMEMultipart()
+    msg["From"] = sender
+    msg["To"] = recipient
+    msg["Subject"] = subject
+    msg.attach(MIMEText(format_digest_html(digest), "html"))
+
+    with smtplib.SMTP_SSL(os.environ.get("DIGEST_SMTP_HOST", "smtp.gmail.com"), 465) as server:
+        server.login(sender, os.environ["DIGEST_SMTP_PASSWORD"])
+        server.sendmail(sender, recipient, msg.as_string())
+    logger.info(f"Sent digest for {digest.digest_date} to {recipient}")
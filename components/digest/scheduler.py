@@ -0,0 +1,101 @@
+from datetime import date, timedelta
+from typing import Optional
+
+import numpy as np
+
+from config.settings import REVIEW_NEW_PER_DAY, REVIEW_CANDIDATE_FACTOR, DIVERSITY_MAX_SIMILARITY
+from database.review_store import ReviewState, ReviewStore
+from database.sqlite_manager import SQLiteManager
+
+def sm2_update(state: ReviewState, grade: int, today: date) -> ReviewState:
+    """Apply an SM-2 review with `grade` in 0 (forgotten) .. 5 (perfect recall)."""
+    if not 0 <= grade <= 5:
+        raise ValueError(f"Grade must be between 0 and 5, got {grade}")
+    if grade < 3:
+        repetitions, interval = 0, 1
+    else:
+        repetitions = state.repetitions + 1
+        if repetitions == 1:
+            interval = 1
+        elif repetitions == 2:
+            interval = 6
+        else:
+            interval = round(state.interval_days * state.ease)
+    ease = max(1.3, state.ease + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02))
+    return ReviewState(
+        primary_id=state.primary_id,
+        due_date=today + timedelta(days=interval),
+        interval_days=interval,
+        ease=ease,
+        repetitions=repetitions,
+        last_reviewed=today,
+    )
+
+def diverse_subset(
+    themes: list[list[str]],
+    embeddings: np.ndarray,
+    k: int,
+    max_similarity: float = DIVERSITY_MAX_SIMILARITY,
+) -> list[int]:
+    """Greedily pick up to k candidate positions, in order, that share no theme and
+    whose cosine similarity to every already picked candidate stays below `max_similarity`.
+
+    Candidates without an embedding (zero rows) are only constrained by their themes.
+    """
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    unit = np.divide(embeddings, norms, out=np.zeros_like(embeddings), where=norms > 0)
+    # Highest similarity of each candidate to anything picked so far
+    closest = np.full(len(unit), -np.inf, dtype=np.float32)
+    used_themes: set[str] = set()
+    picked: list[int] = []
+    for i in range(len(unit)):
+        if len(picked) == k:
+            break
+        if closest[i] >= max_similarity or used_themes.intersection(themes[i]):
+            continue
+        picked.append(i)
+        used_themes.update(themes[i])
+        np.maximum(closest, unit @ unit[i], out=closest)
+    return picked
+
+class ReviewScheduler:
+    """Chooses which nodes to resurface each day, spaced-repetition style.
+
+    Due nodes are read from the due-date index, then thinned out so that no two picks
+    share a theme or are near-identical in embedding space.
+    """
+
+    def __init__(
+        self,
+        db_manager: SQLiteManager,
+        store: ReviewStore,
+        new_per_day: int = REVIEW_NEW_PER_DAY,
+        candidate_factor: int = REVIEW_CANDIDATE_FACTOR,
+    ):
+        self.db_manager = db_manager
+        self.store = store
+        self.new_per_day = new_per_day
+        self.candidate_factor = candidate_factor
+
+    def sample_due(self, k: int, on: Optional[date] = None) -> list[int]:
+        """Node ids to show on `on` (default today)."""
+        on = on or date.today()
+        self.store.enrol_new(on, self.new_per_day)
+        candidates = self.store.due_node_ids(on, k * self.candidate_factor)
+        if not candidates:
+            return []
+        nodes = self.db_manager.get_nodes(candidates, fields=["themes", "content_embedding"])
+        dimension = max((len(node["content_embedding"]) for node in nodes), default=0)
+        embeddings = np.zeros((len(nodes), dimension), dtype=np.float32)
+        for row, node in enumerate(nodes):
+            if len(node["content_embedding"]) == dimension:
+                embeddings[row] = node["content_embedding"]
+        picked = diverse_subset([node["themes"] for node in nodes], embeddings, k)
+        return [nodes[i]["id"] for i in picked]
+
+    def record_review(self, primary_id: str, grade: int, today: Optional[date] = None) -> ReviewState:
+        today = today or date.today()
+        state = self.store.get(primary_id) or ReviewState(primary_id=primary_id, due_date=today)
+        state = sm2_update(state, grade, today)
+        self.store.put(state)
+        return state
@@ -0,0 +1,100 @@
+import pytest
+import asyncio
+import random
+from datetime import date, datetime
+
+from components.digest.digest import DigestEngine, Question, QuestionSet
+from components.digest.emailer import format_digest_html
+from database.digest_store import DigestStore
+from database.sqlite_manager import SQLiteManager
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "nodes.db")
+    manager = SQLiteManager(path)
+    now = datetime(2024, 1, 1)
+    manager.insert_nodes([
+        {
+            "primary_id": f"node-{i}", "content": "...", "file_size": 1.0,
+            "file_creation_time": now, "file_modification_time": now, "filetype": "pdf",
+            "location": "Local Files", "path": f"/notes/node-{i}.pdf",
+            # Every third node has not been featurised yet
+            **({"summary": f"Summary {i}", "label": "note", "quotes": [f"Quote {i}"]} if i % 3 else {}),
+        }
+        for i in range(30)
+    ])
+    return path
+
+class StubGenerator:
+    def __init__(self):
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, prompt: str) -> QuestionSet:
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return QuestionSet(questions=[Question(question=f"About {prompt.splitlines()[0]}?", answer="Yes")])
+
+def test_sample_node_ids_only_returns_featurised_nodes(db_path):
+    """Test that sampling returns distinct featurised nodes."""
+    manager = SQLiteManager(db_path)
+    ids = manager.sample_node_ids(10, random.Random(0))
+
+    assert len(ids) == len(set(ids)) == 10
+    assert all(node["summary"] for node in manager.get_nodes(ids, fields=["summary"]))
+
+def test_sample_node_ids_is_uniform_over_sparse_featurised_rows(tmp_path):
+    """Test that sampling returns every featurised node when k exceeds them, and is not biased by gaps."""
+    manager = SQLiteManager(str(tmp_path / "sparse.db"))
+    now = datetime(2024, 1, 1)
+    featurised = []
+    for i in range(40):
+        node_id = manager.insert_node({
+            "primary_id": f"n{i}", "content": "...", "file_size": 1.0,
+            "file_creation_time": now, "file_modification_time": now, "filetype": "pdf",
+            "location": "Local Files", "path": f"/notes/n{i}.pdf",
+            **({"summary": "s"} if i in (5, 6, 30) else {}),
+        })
+        if i in (5, 6, 30):
+            featurised.append(node_id)
+
+    assert sorted(manager.sample_node_ids(10, random.Random(0))) == featurised
+    rng = random.Random(1)
+    counts = {node_id: 0 for node_id in featurised}
+    for _ in range(3000):
+        counts[manager.sample_node_ids(1, rng)[0]] += 1
+    assert all(800 < count < 1200 for count in counts.values())
+
+@pytest.mark.asyncio
+async def test_build_generates_concurrently_and_caches(db_path):
+    """Test that questions are generated concurrently and reused for the same node input."""
+    generator = StubGenerator()
+    engine = DigestEngine(
+        SQLiteManager(db_path), DigestStore(db_path), generate_fn=generator,
+        sample_fn=lambda k, on: [2, 3, 5, 6, 8][:k], size=5, concurrency=3,
+    )
+
+    digest = await engine.build(date(2024, 5, 1))
+    assert len(digest.items) == 5
+    assert generator.max_in_flight == 3
+
+    await engine.build(date(2024, 5, 2))
+    assert generator.calls == 5
+
+@pytest.mark.asyncio
+async def test_precomputed_digest_is_served_without_generation(db_path):
+    """Test that a precomputed digest is loaded as is on the send path."""
+    generator = StubGenerator()
+    engine = DigestEngine(SQLiteManager(db_path), DigestStore(db_path), generate_fn=generator, size=4)
+
+    precomputed = await engine.precompute(days_ahead=0)
+    calls = generator.calls
+    served = await engine.get_or_build(date.today())
+
+    assert served == precomputed
+    assert generator.calls == calls
+    assert "Summary" in format_digest_html(served)
@@ -0,0 +1,60 @@
+import pytest
+from datetime import date, datetime
+
+import numpy as np
+
+from components.digest.scheduler import ReviewScheduler, diverse_subset, sm2_update
+from database.review_store import ReviewState, ReviewStore
+from database.sqlite_manager import SQLiteManager
+
+def test_sm2_intervals_grow_and_reset():
+    """Test that successful reviews lengthen the interval and a lapse resets it."""
+    today = date(2024, 1, 1)
+    state = ReviewState(primary_id="a", due_date=today)
+    intervals = []
+    for _ in range(4):
+        state = sm2_update(state, 5, today)
+        intervals.append(state.interval_days)
+    assert intervals[:2] == [1, 6]
+    assert intervals[3] > intervals[2] > 6
+
+    lapsed = sm2_update(state, 1, today)
+    assert (lapsed.interval_days, lapsed.repetitions) == (1, 0)
+    assert lapsed.ease < state.ease
+
+def test_diverse_subset_enforces_themes_and_similarity():
+    """Test that picks never share a theme or sit too close in embedding space."""
+    themes = [["economics"], ["economics"], ["history"], ["physics"], []]
+    embeddings = np.array([[1, 0], [0, 1], [1, 0.01], [0, 1], [0, 0]], dtype=np.float32)
+
+    assert diverse_subset(themes, embeddings, k=5) == [0, 3, 4]
+
+@pytest.fixture
+def scheduler(tmp_path):
+    path = str(tmp_path / "nodes.db")
+    manager = SQLiteManager(path)
+    now = datetime(2024, 1, 1)
+    manager.insert_nodes([
+        {
+            "primary_id": f"node-{i}", "content": "...", "file_size": 1.0,
+            "file_creation_time": now, "file_modification_time": now, "filetype": "pdf",
+            "location": "Local Files", "path": f"/notes/node-{i}.pdf", "summary": f"Summary {i}",
+            "themes": [f"theme-{i % 4}"], "content_embedding": np.eye(8)[i % 8].tolist(),
+        }
+        for i in range(20)
+    ])
+    return ReviewScheduler(manager, ReviewStore(path), new_per_day=10)
+
+def test_sample_due_is_diverse_and_respects_reviews(scheduler):
+    """Test that due nodes are sampled without repeated themes and reviewed nodes drop out."""
+    today = date(2024, 1, 1)
+    picked = scheduler.sample_due(5, on=today)
+    nodes = scheduler.db_manager.get_nodes(picked, fields=["primary_id", "themes"])
+
+    # Only four distinct themes exist, so at most four picks
+    assert len(picked) == 4
+    assert len({node["themes"][0] for node in nodes}) == 4
+
+    for node in nodes:
+        scheduler.record_review(node["primary_id"], 4, today)
+    assert not set(scheduler.sample_due(5, on=today)) & set(picked)
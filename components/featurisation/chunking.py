@@ -0,0 +1,64 @@
+import hashlib
+import re
+from dataclasses import dataclass
+
+from config.settings import CHUNK_SIZE
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+@dataclass(frozen=True)
+class Chunk:
+    """A contiguous passage of a document, addressed by character offsets."""
+    ordinal: int
+    start: int
+    end: int
+    text: str
+    hash: str
+
+    @property
+    def token_count(self) -> int:
+        # Rough estimate (~4 characters per token), good enough for budgeting
+        return max(1, len(self.text) // 4)
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8", errors="replace")).hexdigest()
+
+def chunk_text(text: str, max_chars: int = CHUNK_SIZE) -> list[Chunk]:
+    """Split text into chunks of at most `max_chars`, breaking on paragraph boundaries.
+
+    Boundaries depend only on the surrounding text, so an edit in one paragraph
+    leaves the chunks (and chunk hashes) elsewhere in the document unchanged.
+    """
+    spans = []
+    position = 0
+    for match in _PARAGRAPH_BREAK.finditer(text):
+        spans.append((position, match.end()))
+        position = match.end()
+    if position < len(text):
+        spans.append((position, len(text)))
+
+    bounds = []
+    start = end = None
+    for span_start, span_end in spans:
+        # Paragraphs longer than max_chars are split hard
+        while span_end - span_start > max_chars:
+            if start is not None:
+                bounds.append((start, end))
+                start = None
+            bounds.append((span_start, span_start + max_chars))
+            span_start += max_chars
+        if start is not None and span_end - start > max_chars:
+            bounds.append((start, end))
+            start = None
+        if start is None:
+            start = span_start
+        end = span_end
+    if start is not None and end > start:
+        bounds.append((start, end))
+
+    bounds = [(start, end) for start, end in bounds if text[start:end].strip()]
+    return [_make_chunk(text, ordinal, start, end) for ordinal, (start, end) in enumerate(bounds)]
+
+def _make_chunk(text: str, ordinal: int, start: int, end: int) -> Chunk:
+    passage = text[start:end]
+    return Chunk(ordinal=ordinal, start=start, end=end, text=passage, hash=content_hash(passage))
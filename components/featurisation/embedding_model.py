@@ -1,32 +1,90 @@
-import google.generativeai as genai
+import asyncio
+import functools
 import os
 import numpy as np
 
+from components.featurisation.chunking import chunk_text, content_hash
+from database.embedding_cache import EmbeddingCache
 from database.node import EmbeddingNode, FileNode
-from config.settings import EMBEDDING_MODEL
+from config.metrics import metrics
+from config.settings import EMBEDDING_MODEL, EMBEDDING_CONCURRENCY
 
 class EmbeddingModel:
     def __init__(
             self,
             model_name, 
         ):
+        # Imported here, the SDK is slow to import and configuring it needs GEMINI_API_KEY
+        import google.generativeai as genai
         genai.configure(api_key=os.environ['GEMINI_API_KEY'])
+        self.genai = genai
         self.model_name: str = model_name
 
-    async def embed_text(self, text: str) -> np.ndarray:
-        embedding = await genai.embed_content(
-            model_name=self.model_name,
-            content=text
-        )
-        return embedding
+    async def embed_text(self, text: str) -> list[float]:
+        metrics.count("embedding_input_chars", len(text))
+        # genai.embed_content is blocking, keep it off the event loop
+        with metrics.span("embedding_call"):
+            result = await asyncio.to_thread(
+                self.genai.embed_content,
+                model=self.model_name,
+                content=text
+            )
+        return result["embedding"]
 
-embedding_model = EmbeddingModel(model_name=EMBEDDING_MODEL)
+@functools.cache
+def get_embedding_model() -> EmbeddingModel:
+    return EmbeddingModel(model_name=EMBEDDING_MODEL)
 
-async def embed_file(node: FileNode) -> EmbeddingNode:
-    embedding = await embedding_model.embed_text(node.content)
-    return EmbeddingNode(
-        content_embedding=embedding
-    )
-    
+async def embed_query(text: str, cache: EmbeddingCache | None = None) -> np.ndarray:
+    """Embed a search query, reusing the embedding of any text seen before with this model.
+
+    Queries share the chunk embedding cache: it is keyed by text hash and model, so a
+    repeated query, or one identical to a stored passage, costs no API call.
+    """
+    text_hash = content_hash(text)
+    cached = cache.get(text_hash) if cache else None
+    metrics.count("query_embedding_cache_hits" if cached is not None else "query_embedding_cache_misses")
+    if cached is not None:
+        return cached
+    embedding = np.asarray(await get_embedding_model().embed_text(text), dtype=np.float32)
+    if cache:
+        cache.put(text_hash, embedding)
+    return embedding
+
+async def embed_file(
+        node: FileNode,
+        cache: EmbeddingCache | None = None,
+        concurrency: int = EMBEDDING_CONCURRENCY,
+    ) -> EmbeddingNode:
+    """Embed a node passage by passage, only calling the API for uncached passages.
 
+    The document embedding is the length-weighted mean of its chunk embeddings, so an
+    edit to one paragraph of a long document costs a single chunk embedding call.
+    At most `concurrency` chunk embedding calls run at once.
+    """
+    content = node.load_content()
+    chunks = chunk_text(content)
+    if not chunks:
+        embedding = await get_embedding_model().embed_text(content)
+        return EmbeddingNode(content_embedding=embedding)
 
+    vectors = cache.get_many(chunk.hash for chunk in chunks) if cache else {}
+    missing = {chunk.hash: chunk.text for chunk in chunks if chunk.hash not in vectors}
+    metrics.count("embedding_cache_hits", len(chunks) - len(missing))
+    metrics.count("embedding_cache_misses", len(missing))
+    semaphore = asyncio.Semaphore(concurrency)
+    async def embed_chunk(text: str) -> list[float]:
+        async with semaphore:
+            return await get_embedding_model().embed_text(text)
+
+    fresh = dict(zip(missing, await asyncio.gather(*(embed_chunk(text) for text in missing.values()))))
+    if cache and fresh:
+        cache.put_many(fresh)
+    vectors.update(fresh)
+
+    matrix = np.array([vectors[chunk.hash] for chunk in chunks], dtype=np.float32)
+    weights = np.array([len(chunk.text) for chunk in chunks], dtype=np.float32)
+    pooled = weights @ matrix / weights.sum()
+    return EmbeddingNode(
+        content_embedding=pooled.tolist()
+    )
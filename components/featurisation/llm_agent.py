@@ -1,5 +1,7 @@
+import functools
+
+from config.metrics import metrics
 from config.settings import LLM_MODEL, MAX_TOKEN_LIMIT
-from pydantic_ai import Agent
 
 from database.node import LLMNode, FileNode
 
@@ -24,11 +26,15 @@ Please identify and extract the following information:
 Don't worry if not all information is present, but fill in as many fields as possible.
 """
 
-featurisation_agent = Agent(
-    LLM_MODEL,
-    result_type=LLMNode,
-    system_prompt=featurisation_prompt
-)
+@functools.cache
+def get_featurisation_agent():
+    # Imported lazily, pydantic_ai is slow to import and the agent needs API credentials
+    from pydantic_ai import Agent
+    return Agent(
+        LLM_MODEL,
+        result_type=LLMNode,
+        system_prompt=featurisation_prompt
+    )
 
 def content_made_llm_compatible(node: FileNode) -> str:
     """
@@ -37,17 +43,17 @@ def content_made_llm_compatible(node: FileNode) -> str:
     1. (Hacky!) Compressing if above token limit to first x tokens. 
     """
     # placeholder
-    if len(node.content) < MAX_TOKEN_LIMIT:
-        return node.content
+    content = node.load_content()
+    if len(content) < MAX_TOKEN_LIMIT:
+        return content
     else:
-        return node.content[:MAX_TOKEN_LIMIT]
+        return content[:int(MAX_TOKEN_LIMIT)]
 
 async def file_node_to_llm_node(node: FileNode) -> LLMNode:
-    result = featurisation_agent.run(
-        f"Please featurise this node: {
-            content_made_llm_compatible(node)
-        }"
-    )
-    return LLMNode(
-        **result.data
-    ) 
+    content = content_made_llm_compatible(node)
+    metrics.count("llm_input_chars", len(content), filetype=node.filetype)
+    with metrics.span("llm_featurise", filetype=node.filetype):
+        result = await get_featurisation_agent().run(
+            f"Please featurise this node: {content}"
+        )
+    return result.data
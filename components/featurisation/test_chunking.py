@@ -0,0 +1,26 @@
+from components.featurisation.chunking import chunk_text
+
+def test_chunks_cover_text_with_offsets():
+    """Test that chunk offsets index back into the original text."""
+    text = "\n\n".join(f"Paragraph {i}. " + "word " * 50 for i in range(20))
+    chunks = chunk_text(text, max_chars=600)
+
+    assert [chunk.ordinal for chunk in chunks] == list(range(len(chunks)))
+    assert all(text[chunk.start:chunk.end] == chunk.text for chunk in chunks)
+    assert all(len(chunk.text) <= 600 for chunk in chunks)
+    assert "".join(chunk.text for chunk in chunks) == text
+
+def test_local_edit_only_changes_local_chunks():
+    """Test that editing one paragraph leaves the other chunk hashes unchanged."""
+    paragraphs = [f"Paragraph {i}. " + "word " * 50 for i in range(20)]
+    before = chunk_text("\n\n".join(paragraphs), max_chars=600)
+    paragraphs[10] = paragraphs[10].replace("word", "term", 1)
+    after = chunk_text("\n\n".join(paragraphs), max_chars=600)
+
+    changed = {chunk.hash for chunk in after} - {chunk.hash for chunk in before}
+    assert len(changed) == 1
+
+def test_long_paragraphs_are_split():
+    """Test that a paragraph longer than max_chars is split into several chunks."""
+    chunks = chunk_text("x" * 2500, max_chars=1000)
+    assert [len(chunk.text) for chunk in chunks] == [1000, 1000, 500]
@@ -0,0 +1,40 @@
+import asyncio
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+
+from components.featurisation import embedding_model
+from components.featurisation.chunking import chunk_text
+from database.node import FileNode
+
+class CountingModel:
+    """Fake embedding model recording how many calls are in flight at once."""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+
+    async def embed_text(self, text: str) -> list[float]:
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.001)
+        self.active -= 1
+        return [1.0, float(len(text))]
+
+@pytest.mark.asyncio
+async def test_chunk_embedding_calls_are_bounded():
+    """Test that a long document never has more than `concurrency` embedding calls in flight."""
+    now = datetime(2024, 1, 1)
+    node = FileNode(
+        primary_id="long", content="\n\n".join(f"paragraph {i} " * 200 for i in range(40)), file_size=1.0,
+        file_creation_time=now, file_modification_time=now, filetype="md", location="Local Files", path="/tmp/long.md",
+    )
+    model = CountingModel()
+    with patch.object(embedding_model, "get_embedding_model", lambda: model):
+        embedding = await embedding_model.embed_file(node, concurrency=3)
+
+    assert model.calls == len(chunk_text(node.content)) > 3
+    assert model.peak == 3
+    assert len(embedding.content_embedding) == 2
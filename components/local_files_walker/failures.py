@@ -0,0 +1,75 @@
+import re
+import zipfile
+from pathlib import Path
+from typing import Literal, Optional
+
+from config.settings import RETRY_STRATEGIES, ZIP_XML_EXTENSIONS, PLAIN_TEXT_EXTENSIONS
+from components.local_files_walker.text_layer import markup_to_text
+from database.parse_failures import ParseFailure
+
+ErrorClass = Literal["timeout", "encrypted", "corrupt", "unsupported", "empty_text", "error"]
+
+# Checked in order against the exception's type name and message
+_PATTERNS: list[tuple[ErrorClass, re.Pattern]] = [
+    ("timeout", re.compile(r"timeout|timed out", re.IGNORECASE)),
+    ("encrypted", re.compile(r"encrypt|password", re.IGNORECASE)),
+    ("unsupported", re.compile(r"unsupported|\b415\b|no parser", re.IGNORECASE)),
+    ("corrupt", re.compile(r"corrupt|damaged|badzip|malformed|invalid|eof|truncated|syntax|\b422\b", re.IGNORECASE)),
+]
+
+def classify_failure(error: Optional[BaseException]) -> ErrorClass:
+    """Classify why a parse failed: an exception, or None when it produced no text."""
+    if error is None:
+        return "empty_text"
+    if isinstance(error, TimeoutError):
+        return "timeout"
+    text = f"{type(error).__name__}: {error}"
+    for error_class, pattern in _PATTERNS:
+        if pattern.search(text):
+            return error_class
+    return "error"
+
+def applicable(strategy: str, extension: str) -> bool:
+    if strategy == "ocr":
+        return extension == ".pdf"
+    if strategy == "zip_xml":
+        return extension in ZIP_XML_EXTENSIONS
+    if strategy == "plain":
+        return extension in PLAIN_TEXT_EXTENSIONS
+    return True
+
+def retry_strategies(error_class: str, extension: str) -> list[str]:
+    """The escalation ladder for a failure class, without strategies that cannot apply to the file type."""
+    return [strategy for strategy in RETRY_STRATEGIES.get(error_class, []) if applicable(strategy, extension)]
+
+def next_strategy(failure: ParseFailure) -> Optional[str]:
+    """The strategy for the next retry, or None once the ladder is exhausted.
+
+    The first attempt is the default Tika -> OCR chain, so retry n uses rung n of
+    the ladder.
+    """
+    ladder = retry_strategies(failure.error_class, Path(failure.path).suffix.lower())
+    return ladder[failure.attempts - 1] if failure.attempts - 1 < len(ladder) else None
+
+def extract_zip_xml(file_path: Path) -> str:
+    """Text of a zip-based document (OOXML, OpenDocument, EPUB) straight from its XML parts.
+
+    Cruder than Tika (no structure, no embedded objects) but independent of it, and
+    tolerant of archives with a damaged part: unreadable members are skipped.
+    """
+    parts = []
+    with zipfile.ZipFile(file_path) as archive:
+        for name in sorted(archive.namelist()):
+            if not name.endswith((".xml", ".xhtml", ".html")) or "/_rels/" in name or name.startswith(("META-INF", "[Content_Types]")):
+                continue
+            try:
+                xml = archive.read(name).decode("utf-8", errors="replace")
+            except (zipfile.BadZipFile, OSError, EOFError):
+                continue
+            if text := markup_to_text(xml):
+                parts.append(text)
+    return "\n\n".join(parts)
+
+def extract_plain(file_path: Path) -> str:
+    """The file decoded as UTF-8, for text formats Tika rejected."""
+    return Path(file_path).read_bytes().decode("utf-8", errors="replace")
@@ -0,0 +1,27 @@
+import hashlib
+import os
+from pathlib import Path
+from typing import Optional
+
+from config.settings import HASH_BASE_SIZE
+
+def hash_file(file_path: Path, file_stat: Optional[os.stat_result] = None) -> str:
+    """Create a hash of the file based on its size, modification time and the first
+    and last HASH_BASE_SIZE bytes of its content (the whole file if it is small)."""
+    file_stat = file_stat or os.stat(file_path)
+    file_size = file_stat.st_size
+    mod_time = file_stat.st_mtime # modification time invariant to changing file content
+
+    # Read the entire content for small files, or first and last 1024 bytes for larger files
+    with open(file_path, 'rb') as f:
+        if file_size <= 2*HASH_BASE_SIZE:  # If file is 2KB or smaller, read entire file
+            file_content = f.read()
+        else:
+            first_bytes = f.read(HASH_BASE_SIZE)
+            f.seek(-HASH_BASE_SIZE, 2)  # Seek to 1024 bytes from the end
+            last_bytes = f.read()
+            file_content = first_bytes + last_bytes
+
+    hash_input = f"{file_size}_{mod_time}_{file_content}"
+
+    return hashlib.md5(hash_input.encode()).hexdigest()
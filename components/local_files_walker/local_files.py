@@ -1,20 +1,34 @@
 import os
-import hashlib
-from tika import parser
-import pytesseract
-from pdf2image import convert_from_path
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Optional
+from typing import Iterator, Optional
 from pathlib import Path
 from tqdm import tqdm
 
 from config.config_logger import logger
+from config.metrics import metrics
 from config.settings import (
     INCLUDED_EXTENSIONS,
-    HASH_BASE_SIZE, MIN_FILE_SIZE, LOCAL_FILES_PATH,
-    PARSED_FILES_PATH,
+    MIN_FILE_SIZE, MAX_FILE_SIZE, LOCAL_FILES_PATH,
+    PARSED_FILES_PATH, TIKA_TIMEOUT, TIKA_RETRY_TIMEOUT, RETRY_WORKERS, OCR_PAGE_WORKERS,
 )
+from database.content import ContentRef, content_cache
 from database.node import FileNode
+from database.parse_failures import ParseFailureLedger
+from components.local_files_walker.failures import (
+    applicable, classify_failure, extract_plain, extract_zip_xml, next_strategy,
+)
+from components.local_files_walker.hashing import hash_file
+from components.local_files_walker.resources import ResourceLimits, ResourceMonitor
+from components.local_files_walker.scanner import DirectoryScanner, ScannedFile
+from components.local_files_walker.scheduling import FileScheduler
+from components.local_files_walker.text_layer import has_text_layer, split_pdf_pages
+
+def filetype_of(file_path) -> str:
+    return Path(file_path).suffix.lstrip('.').lower()
+
+class PageOcrError(RuntimeError):
+    """OCR of a PDF without a text layer on any page failed, OCR of the whole file would fail too."""
 
 class FileParser:
     """A file processing system that parses local files with caching capabilities.
@@ -33,7 +47,10 @@ class FileParser:
         - Only processes files with extensions defined in INCLUDED_EXTENSIONS
         - Ignores files smaller than min_file_size (default: 250 bytes)
         - Uses Apache Tika for primary parsing
-        - Falls back to OCR (using Tesseract) for failed parse attempts
+        - Reads PDFs page by page and OCRs (using Tesseract) only the pages without a
+          text layer, in parallel; whole documents are OCR'd if Tika fails
+        - With a failure ledger, files that still yield no text are recorded with the
+          class of error and retried by `retry_failures` with escalated strategies
         
     Attributes:
         local_files_path (str): Root directory to scan for files
@@ -58,48 +75,42 @@ class FileParser:
         self,
         local_files_path: str,
         parsed_files_path: str,
+        limits: Optional[ResourceLimits] = None,
+        failures: Optional[ParseFailureLedger] = None,
     ):
         """Initialize the FileParser.
         
         Args:
             local_files_path: Directory path containing files to process
             parsed_files_path: Directory path for storing cached parsed content
-        limits: Optional resource limits configuration
+            limits: Optional resource limits, used to back off parsing under load
+            failures: Optional ledger recording files that failed to parse
         """
         self.local_files_path = Path(local_files_path)
         self.parsed_files_path = Path(parsed_files_path)
         self.logger = logger
         self.processed_files = set()
         self.include_extensions = INCLUDED_EXTENSIONS
+        self.resource_monitor = ResourceMonitor(limits)
+        self.failures = failures
 
-    def hash_file(self, file_path: Path) -> str:
+    def hash_file(self, file_path: Path, file_stat: Optional[os.stat_result] = None) -> str:
         """Create a hash of the file based on its content and metadata."""
-        file_stat = os.stat(file_path)
-        file_size = file_stat.st_size
-        mod_time = file_stat.st_mtime # modification time invariant to changing file content
-            
-        # Read the entire content for small files, or first and last 1024 bytes for larger files
-        with open(file_path, 'rb') as f:
-            if file_size <= 2*HASH_BASE_SIZE:  # If file is 2KB or smaller, read entire file
-                file_content = f.read()
-            else:
-                first_bytes = f.read(HASH_BASE_SIZE)
-                f.seek(-HASH_BASE_SIZE, 2)  # Seek to 1024 bytes from the end
-                last_bytes = f.read()
-                file_content = first_bytes + last_bytes
-        
-        hash_input = f"{file_size}_{mod_time}_{file_content}"
-        
-        return hashlib.md5(hash_input.encode()).hexdigest()
+        with metrics.span("hash_file", filetype=filetype_of(file_path)):
+            return hash_file(file_path, file_stat)
 
+    @metrics.timed("parse_cache_get")
     def get_cached_content(self, file_hash):
         """Retrieve cached content if it exists."""
         cached_file_path = self.parsed_files_path / f"{file_hash}.txt"
         if os.path.exists(cached_file_path):
+            metrics.count("parse_cache_hits")
             with open(cached_file_path, 'r', encoding='utf-8') as f:
                 return f.read()
+        metrics.count("parse_cache_misses")
         return None
 
+    @metrics.timed("parse_cache_put")
     def save_cached_content(self, file_hash, content):
         """Save parsed content to cache."""
         os.makedirs(self.parsed_files_path, exist_ok=True)
@@ -107,69 +118,223 @@ class FileParser:
         with open(cached_file_path, 'w', encoding='utf-8') as f:
             f.write(content)
 
+    def remove_cached_content(self, file_hash):
+        """Remove the cache entry of a node that has been superseded."""
+        cached_file_path = self.parsed_files_path / f"{file_hash}.txt"
+        if os.path.exists(cached_file_path):
+            os.remove(cached_file_path)
+
+    def _ocr_pages(self, file_path, page_numbers: list[int]) -> list[str]:
+        """OCR the given 1-based pages of a PDF in parallel, returning their text in order.
+
+        Pages are rasterised one at a time, so memory is bounded by the number of
+        workers rather than the length of the document.
+        """
+        # Imported here so cache-only runs never load the OCR stack
+        import pytesseract
+        from pdf2image import convert_from_path
+
+        def ocr_page(page_number: int) -> str:
+            images = convert_from_path(file_path, first_page=page_number, last_page=page_number)
+            return "".join(pytesseract.image_to_string(image) for image in images)
+
+        with ThreadPoolExecutor(max_workers=OCR_PAGE_WORKERS) as pool:
+            texts = list(pool.map(ocr_page, page_numbers))
+        metrics.count("ocr_pages", len(page_numbers), filetype=filetype_of(file_path))
+        return texts
+
+    def _ocr(self, file_path) -> str:
+        """OCR every page of a PDF, raising on failure."""
+        filetype = filetype_of(file_path)
+        metrics.count("ocr_input_bytes", os.path.getsize(file_path), filetype=filetype)
+        from pdf2image import pdfinfo_from_path
+        with metrics.span("fallback_parse_file", filetype=filetype):
+            page_count = pdfinfo_from_path(file_path)["Pages"]
+            return "\n".join(self._ocr_pages(file_path, list(range(1, page_count + 1))))
+
     def fallback_parse_file(self, file_path):
         """Fallback function to parse a file using OCR if the parser fails."""
         try:
-            # Convert PDF to images to use OCR
-            images = convert_from_path(file_path)
-            text = ""
-            for image in images:
-                # OCR
-                text += pytesseract.image_to_string(image)
-            return text
+            return self._ocr(file_path)
         except Exception as e:
-            self.logger.error(f"Error in both parsing and fallback parsing for {file_path}: {e}\nReturning empty string.")
+            self.logger.error("Error in both parsing and fallback parsing for %s: %s\nReturning empty string.", file_path, e)
             return ""
 
+    def _tika_request(self, file_path: Path, timeout: float, xml: bool = False) -> Optional[str]:
+        filetype = filetype_of(file_path)
+        metrics.count("tika_input_bytes", os.path.getsize(file_path), filetype=filetype)
+        # Imported here so cache-only runs never load Tika
+        from tika import parser
+        with metrics.span("parse_with_tika", filetype=filetype):
+            # note, parser.from_file() has to be called with a string, not a Path object
+            parsed_file = parser.from_file(str(file_path), xmlContent=xml, requestOptions={'timeout': timeout})
+        status = parsed_file.get("status", 200)
+        if status != 200:
+            # Tika answers 415 for unsupported types and 422 for files it could not read
+            raise RuntimeError(f"Tika returned status {status}")
+        content = parsed_file.get("content")
+        metrics.count("tika_output_chars", len(content or ""), filetype=filetype)
+        return content
+
+    def _parse_pdf(self, file_path: Path, timeout: float) -> str:
+        """Text layer of each page from Tika, with only the pages lacking one OCR'd.
+
+        Mixed PDFs, e.g. typed pages followed by a scanned appendix, keep every page
+        while paying OCR for the scanned ones only. Pages are merged in order.
+        """
+        pages = split_pdf_pages(self._tika_request(file_path, timeout, xml=True) or "")
+        if not pages:
+            raise ValueError("Tika found no pages in the PDF")
+        missing = [number for number, text in enumerate(pages, start=1) if not has_text_layer(text)]
+        metrics.count("text_layer_pages", len(pages) - len(missing), filetype="pdf")
+        if missing:
+            try:
+                with metrics.span("ocr_missing_pages", filetype="pdf"):
+                    for number, text in zip(missing, self._ocr_pages(file_path, missing)):
+                        pages[number - 1] = text
+            except Exception as e:
+                if len(missing) == len(pages):
+                    # Keeps the original error name in the message for classify_failure
+                    raise PageOcrError(f"{type(e).__name__}: {e}") from e
+                self.logger.warning("OCR of %d pages without a text layer failed for %s: %s", len(missing), file_path, e)
+        return "\n\n".join(page.strip() for page in pages if page.strip())
+
+    def _tika(self, file_path: Path, timeout: float = TIKA_TIMEOUT) -> Optional[str]:
+        """Parse a file with Tika, raising on failure. PDFs are read page by page."""
+        if filetype_of(file_path) == "pdf":
+            return self._parse_pdf(file_path, timeout)
+        return self._tika_request(file_path, timeout)
+
     def parse_with_tika(self, file_path: Path) -> Optional[str]:
         """Wrapper for Tika parsing"""
         try:
-            # note, parser.from_file() has to be called with a string, not a Path object
-            parsed_file = parser.from_file(str(file_path), requestOptions={'timeout': 180})
-            return parsed_file.get("content")
+            return self._tika(file_path)
         except Exception as e:
-            self.logger.debug(f"Failed parsing {file_path} with Tika. Error: {e}")
+            self.logger.debug("Failed parsing %s with Tika. Error: %s", file_path, e)
             return None
 
-    def parse_file(self, file_path) -> tuple[str, str]:
-        """Parses a file using Tika, with a fallback to OCR if Tika fails."""
-        file_hash = self.hash_file(file_path)
-        cached_content = self.get_cached_content(file_hash)
-        
-        if cached_content:
-            return file_hash, cached_content
+    def run_strategy(self, file_path: Path, strategy: str) -> Optional[str]:
+        """Extract text with one named strategy, raising on failure."""
+        if strategy == "tika":
+            return self._tika(file_path)
+        if strategy == "tika_long":
+            return self._tika(file_path, timeout=TIKA_RETRY_TIMEOUT)
+        if strategy == "ocr":
+            return self._ocr(file_path)
+        if strategy == "zip_xml":
+            return extract_zip_xml(file_path)
+        if strategy == "plain":
+            return extract_plain(file_path)
+        raise ValueError(f"Unknown parse strategy {strategy!r}")
 
-        try:
-            content = self.parse_with_tika(file_path)
-            
-            if not content:
-                content = self.fallback_parse_file(file_path)
-            
-            content = content or ""
-            self.save_cached_content(file_hash, content)
-            return file_hash, content
-    
-        except Exception as e:
-            self.logger.error(f"Failed parsing {file_path}: {e}")
-            content = self.fallback_parse_file(file_path)
-            content = content or ""
-            self.save_cached_content(file_hash, content)
-            return file_hash, content
-
-    def should_process_file(self, file_path: Path) -> bool:
-        """Check if the file should be processed based on its extension."""
+    def extract(self, file_path: Path, strategy: Optional[str] = None) -> tuple[str, Optional[Exception]]:
+        """Extract text with one strategy, or with Tika and then OCR for PDFs Tika could not read.
+
+        Returns the text ("" if none) and the first error raised along the way, so a
+        failure can be classified; no error with no text means the file had none.
+        """
+        extension = Path(file_path).suffix.lower()
+        strategies = [strategy] if strategy else [s for s in ("tika", "ocr") if applicable(s, extension)]
+        first_error = None
+        for name in strategies:
+            try:
+                content = self.run_strategy(file_path, name)
+            except PageOcrError as e:
+                # Every page was already OCR'd and that failed
+                self.logger.debug("Failed parsing %s with %s. Error: %s", file_path, name, e)
+                first_error = first_error or e
+                break
+            except Exception as e:
+                self.logger.debug("Failed parsing %s with %s. Error: %s", file_path, name, e)
+                first_error = first_error or e
+                continue
+            if content and content.strip():
+                return content, None
+            if name in ("tika", "tika_long") and extension == ".pdf":
+                # Its pages without a text layer were already OCR'd
+                break
+        return "", first_error
+
+    def record_outcome(self, file_path, file_hash: str, content: str, error: Optional[Exception], strategy: str) -> None:
+        """Record a parse that produced no text in the failure ledger, or clear a file that now parsed."""
+        if self.failures is None:
+            return
+        path = os.path.abspath(file_path)
+        if content.strip():
+            if self.failures.resolve(path):
+                metrics.count("parse_recovered", filetype=filetype_of(file_path))
+                self.logger.info("Recovered %s with %s", file_path, strategy)
+            return
+        error_class = classify_failure(error)
+        failure = self.failures.record(path, file_hash, error_class, str(error or "No text extracted"), strategy)
+        metrics.count("parse_failures", error_class=failure.error_class)
+        self.logger.warning(
+            "Failed parsing %s (%s, attempt %d), next attempt after %s",
+            file_path, failure.error_class, failure.attempts, failure.next_attempt_at.isoformat(sep=" ", timespec="minutes"),
+        )
+
+    def parse_file(
+        self,
+        file_path,
+        file_stat: Optional[os.stat_result] = None,
+        strategy: Optional[str] = None,
+    ) -> tuple[str, str]:
+        """Parses a file using Tika, with a fallback to OCR if Tika fails.
+
+        Passing a strategy re-extracts the file with it, ignoring the cache.
+        """
+        file_hash = self.hash_file(file_path, file_stat)
+        if strategy is None:
+            cached_content = self.get_cached_content(file_hash)
+            if cached_content:
+                return file_hash, cached_content
+            if cached_content is not None and self.failures is not None and self.failures.get(os.path.abspath(file_path)):
+                # A known failure is left to retry mode instead of being re-parsed on every run
+                return file_hash, cached_content
+
+        content, error = self.extract(file_path, strategy)
+        self.save_cached_content(file_hash, content)
+        self.record_outcome(file_path, file_hash, content, error, strategy or "default")
+        return file_hash, content
+
+    def retry_failures(self, now: Optional[datetime] = None, workers: int = RETRY_WORKERS) -> Iterator[Path]:
+        """Re-parse the ledger's due failures with the next strategy on their ladder.
+
+        Only files in the ledger are touched. Yields the paths that now have text, as
+        they recover; files that are gone are dropped from the ledger and exhausted
+        or encrypted ones are left alone.
+        """
+        if self.failures is None:
+            return
+        retries = []
+        for failure in self.failures.due(now):
+            if not os.path.exists(failure.path):
+                self.failures.resolve(failure.path)
+            elif (strategy := next_strategy(failure)) is not None:
+                retries.append((Path(failure.path), strategy))
+        self.logger.info(f"Retrying {len(retries)} failed files")
+
+        def retry(path: Path, strategy: str) -> Optional[Path]:
+            _, content = self.parse_file(path, strategy=strategy)
+            return path if content.strip() else None
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for future in as_completed([pool.submit(retry, path, strategy) for path, strategy in retries]):
+                if (path := future.result()) is not None:
+                    yield path
+
+    def should_process_file(self, file_path: Path, file_stat: Optional[os.stat_result] = None) -> bool:
+        """Check if the file should be processed based on its extension and size."""
         extension = file_path.suffix.lower()
         if extension not in self.include_extensions:
             return False
-        file_stat = os.stat(file_path)
-        if file_stat.st_size < MIN_FILE_SIZE:
-            return False
-        return True
+        file_stat = file_stat or os.stat(file_path)
+        return MIN_FILE_SIZE <= file_stat.st_size <= MAX_FILE_SIZE
 
-    def file_to_node(self, file_path: Path) -> FileNode | None:
+    def file_to_node(self, file_path: Path, file_stat: Optional[os.stat_result] = None) -> FileNode | None:
         """Convert a file to a Node object with relevant fields filled out."""
         try:
-            file_stats = os.stat(file_path)
+            file_stats = file_stat or os.stat(file_path)
             
             creation_time = datetime.fromtimestamp(file_stats.st_mtime)
             modification_time = datetime.fromtimestamp(file_stats.st_mtime)
@@ -177,11 +342,14 @@ class FileParser:
             file_type = file_extension.lstrip('.').lower()
             file_size = round(file_stats.st_size / 1024)  # Convert to KB and round
             
-            hash, content = self.parse_file(file_path)
-            
+            hash, content = self.parse_file(file_path, file_stats)
+            # The node only references the parse cache entry, the text is loaded on demand
+            content_ref = ContentRef(path=str(self.parsed_files_path / f"{hash}.txt"), length=len(content))
+            content_cache.put(content_ref, content)
+
             node = FileNode(
                 primary_id=hash,
-                content=content,
+                content_ref=content_ref,
                 file_size=file_size,  
                 file_creation_time=creation_time,
                 file_modification_time=modification_time,
@@ -189,48 +357,59 @@ class FileParser:
                 location="Local Files",
                 path=os.path.abspath(file_path),
             )
-            self.logger.debug(f"Processed file and created Node: {file_path}")
+            self.logger.debug("Processed file and created Node: %s", file_path)
             
             return node
         except Exception as e:
-            self.logger.exception(f"Error processing file {file_path}: {str(e)}")
+            self.logger.exception("Error processing file %s: %s", file_path, e)
             return None
 
-    def process_file(self, file_path: Path) -> FileNode | None:
+    def process_file(self, file_path: Path, file_stat: Optional[os.stat_result] = None) -> FileNode | None:
         """Process a single file: parse its content if it should be processed and create a Node object."""
-        if self.should_process_file(file_path):
-            node = self.file_to_node(file_path)
+        if self.should_process_file(file_path, file_stat):
+            node = self.file_to_node(file_path, file_stat)
             return node
         else:
-            self.logger.debug(f"Skipping file: {file_path}")
+            self.logger.debug("Skipping file: %s", file_path)
             return None
 
+    def scan_files(self) -> Iterator[ScannedFile]:
+        """Lazily yield the files under local_files_path that should be processed, with their stat."""
+        return DirectoryScanner(self.local_files_path, extensions=self.include_extensions).scan()
+
+    def iter_files(self) -> Iterator[Path]:
+        """Lazily yield the paths of the files under local_files_path that should be processed."""
+        for scanned in self.scan_files():
+            yield scanned.path
+
     def traverse_directory(self) -> list[FileNode]:
-        """Traverse the directory structure and process all valid files."""
-        all_files = []
-        for root, _, files in os.walk(self.local_files_path):
-            for file in files:
-                file_path = Path(root) / file
-                all_files.append(file_path)
+        """Traverse the directory structure and process all valid files, in scheduled order."""
+        all_files = FileScheduler().schedule(self.scan_files())
 
         self.logger.debug(f"Found {len(all_files)} files to process")
 
         valid_nodes = []
         
-        for file_path in tqdm(all_files, desc="Processing files"):
+        for candidate in tqdm(all_files, desc="Processing files"):
+            file_path = candidate.path
             try:
-                result = self.process_file(file_path)
+                result = self.process_file(file_path, candidate.stat)
                 if result:
                     self.processed_files.add(file_path)
                     valid_nodes.append(result)
             except Exception as e:
-                self.logger.error(f"Error processing {file_path}: {e}")
+                self.logger.error("Error processing %s: %s", file_path, e)
                 
         self.logger.info(f"Successfully processed {len(valid_nodes)} files out of {len(all_files)} total files")
         return valid_nodes
     
     def gather_failed_files(self) -> list[Path]:
         """Identify files that failed to parse properly (have empty content in cache)."""
+        if self.failures is not None:
+            failed_files = [Path(failure.path) for failure in self.failures.all()]
+            self.logger.info(f"Found {len(failed_files)} files that failed to parse properly")
+            return failed_files
+
         failed_files = []
         
         for file_path in self.processed_files:
@@ -243,9 +422,9 @@ class FileParser:
                         content = f.read().strip()
                         if not content:  # If content is empty or just whitespace
                             failed_files.append(file_path)
-                            self.logger.debug(f"Found failed parse: {file_path}")
+                            self.logger.debug("Found failed parse: %s", file_path)
             except Exception as e:
-                self.logger.error(f"Error checking cache file for {file_path}: {e}")
+                self.logger.error("Error checking cache file for %s: %s", file_path, e)
                 
         self.logger.info(f"Found {len(failed_files)} files that failed to parse properly")
         return failed_files
@@ -262,7 +441,7 @@ class FileParser:
             if cache_name in cache_files:
                 matched_caches.add(cache_name)
             else:
-                self.logger.debug(f"Removing outdated cache file: {file_path}")
+                self.logger.debug("Removing outdated cache file: %s", file_path)
         
         # Remove unmatched cache files
         files_removed = 0
@@ -272,7 +451,7 @@ class FileParser:
                     os.remove(self.parsed_files_path / cache_file)
                 files_removed += 1
             except OSError as e:
-                self.logger.error(f"Error removing cache file {cache_file}: {e}")
+                self.logger.error("Error removing cache file %s: %s", cache_file, e)
         
         self.logger.info(f"Cache cleaning completed. Removed {files_removed} outdated cache files.")
 
@@ -0,0 +1,72 @@
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+import psutil
+
+from config.settings import (
+    RESOURCE_MAX_MEMORY_PERCENT, RESOURCE_MAX_RSS_MB, RESOURCE_MAX_CPU_PERCENT,
+    RESOURCE_MAX_LOAD_PER_CPU, RESOURCE_CHECK_INTERVAL,
+)
+
+@dataclass
+class ResourceLimits:
+    """Thresholds above which parsing should back off."""
+    max_memory_percent: float = RESOURCE_MAX_MEMORY_PERCENT # system-wide memory in use
+    max_rss_mb: float = RESOURCE_MAX_RSS_MB # this process and its children (Tika, Tesseract)
+    max_cpu_percent: float = RESOURCE_MAX_CPU_PERCENT # system-wide
+    max_load_per_cpu: float = RESOURCE_MAX_LOAD_PER_CPU # 1-minute load average per core
+    check_interval: float = RESOURCE_CHECK_INTERVAL # seconds between samples when waiting
+
+@dataclass
+class ResourceSample:
+    cpu_percent: float
+    memory_percent: float
+    rss_mb: float
+    load_per_cpu: float
+
+class ResourceMonitor:
+    """Samples CPU, memory, RSS and load and compares them against ResourceLimits."""
+
+    def __init__(self, limits: Optional[ResourceLimits] = None, process: Optional[psutil.Process] = None):
+        self.limits = limits or ResourceLimits()
+        self.process = process or psutil.Process()
+        self.cpu_count = psutil.cpu_count() or 1
+        # The first cpu_percent call only sets the baseline for the next one
+        psutil.cpu_percent(interval=None)
+
+    def rss_mb(self) -> float:
+        rss = 0
+        for process in [self.process, *self.process.children(recursive=True)]:
+            try:
+                rss += process.memory_info().rss
+            except psutil.Error:
+                # Children come and go, e.g. a finished Tesseract call
+                continue
+        return rss / 1024 ** 2
+
+    def sample(self) -> ResourceSample:
+        return ResourceSample(
+            cpu_percent=psutil.cpu_percent(interval=None),
+            memory_percent=psutil.virtual_memory().percent,
+            rss_mb=self.rss_mb(),
+            load_per_cpu=os.getloadavg()[0] / self.cpu_count,
+        )
+
+    def memory_ok(self, sample: ResourceSample) -> bool:
+        return sample.memory_percent < self.limits.max_memory_percent and sample.rss_mb < self.limits.max_rss_mb
+
+    def cpu_ok(self, sample: ResourceSample) -> bool:
+        return sample.cpu_percent < self.limits.max_cpu_percent and sample.load_per_cpu < self.limits.max_load_per_cpu
+
+    def check_memory(self) -> bool:
+        return self.memory_ok(self.sample())
+
+    def check_cpu(self) -> bool:
+        return self.cpu_ok(self.sample())
+
+    async def wait_for_resources(self) -> None:
+        """Sleep until both memory and CPU are back under their limits."""
+        while not (self.check_memory() and self.check_cpu()):
+            await asyncio.sleep(self.limits.check_interval)
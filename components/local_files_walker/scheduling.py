@@ -0,0 +1,142 @@
+import os
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, Literal, Optional
+
+from components.local_files_walker.scanner import ScannedFile
+from config.config_logger import logger
+from config.settings import (
+    PARSE_COST_ESTIMATES, DEFAULT_PARSE_COST, OCR_COST_PER_MB, OCR_SNIFF_BYTES,
+    SCHEDULING_POLICY, SCHEDULING_WINDOW, SLOW_LANE_COST, SLOW_LANE_SHARE,
+)
+
+Policy = Literal["newest-first", "cheap-first"]
+Lane = Literal["fast", "slow"]
+
+@dataclass
+class FileCandidate:
+    """A file to parse, with what the scheduler estimated about it."""
+    path: Path
+    size: int
+    mtime: float
+    ocr_likelihood: float
+    cost: float # estimated parse seconds
+    lane: Lane = "fast"
+    stat: Optional[os.stat_result] = None
+
+def ocr_likelihood(path: Path) -> float:
+    """Rough probability that a file has no text layer and will need OCR.
+
+    Only PDFs are ever OCR'd. The start of the file is sniffed for font and image
+    resources: text-layer PDFs reference fonts, scans only images. PDFs with
+    compressed object streams show neither, and stay at an even guess.
+    """
+    if path.suffix.lower() != ".pdf":
+        return 0.0
+    try:
+        with open(path, "rb") as f:
+            head = f.read(OCR_SNIFF_BYTES)
+    except OSError:
+        return 0.5
+    has_font, has_image = b"/Font" in head, b"/Image" in head
+    if has_font:
+        return 0.1
+    if has_image:
+        return 0.9
+    return 0.5
+
+def estimate_cost(extension: str, size: int, ocr_probability: float) -> float:
+    """Expected parse seconds: Tika's cost for the type plus the expected OCR cost."""
+    base, per_mb = PARSE_COST_ESTIMATES.get(extension, DEFAULT_PARSE_COST)
+    size_mb = size / 1024 ** 2
+    return base + per_mb * size_mb + ocr_probability * OCR_COST_PER_MB * size_mb
+
+class FileScheduler:
+    """Orders files so fresh and cheap content is indexed first.
+
+    `newest-first` orders by modification time, `cheap-first` by estimated parse
+    cost (then recency). Documents estimated to cost more than `slow_lane_cost`
+    seconds go to the slow lane, ordered by the same policy, and are interleaved
+    with the fast lane at one slow document per `slow_lane_share` fast ones, so a few
+    huge scans can neither block the fast lane nor be starved until the very end.
+    """
+
+    def __init__(
+        self,
+        policy: Policy = SCHEDULING_POLICY,
+        slow_lane_cost: float = SLOW_LANE_COST,
+        slow_lane_share: int = SLOW_LANE_SHARE,
+    ):
+        if policy not in ("newest-first", "cheap-first"):
+            raise ValueError(f"Unknown scheduling policy: {policy}")
+        self.policy = policy
+        self.slow_lane_cost = slow_lane_cost
+        self.slow_lane_share = slow_lane_share
+
+    def candidate(self, path: Path, file_stat: Optional[os.stat_result] = None) -> FileCandidate:
+        file_stat = file_stat or os.stat(path)
+        likelihood = ocr_likelihood(path)
+        cost = estimate_cost(path.suffix.lower(), file_stat.st_size, likelihood)
+        return FileCandidate(
+            path=path,
+            size=file_stat.st_size,
+            mtime=file_stat.st_mtime,
+            ocr_likelihood=likelihood,
+            cost=cost,
+            lane="slow" if cost > self.slow_lane_cost else "fast",
+            stat=file_stat,
+        )
+
+    def sort_key(self, candidate: FileCandidate) -> tuple:
+        if self.policy == "newest-first":
+            return (-candidate.mtime, candidate.cost)
+        return (candidate.cost, -candidate.mtime)
+
+    def order(self, candidates: Iterable[FileCandidate]) -> list[FileCandidate]:
+        candidates = sorted(candidates, key=self.sort_key)
+        fast = [candidate for candidate in candidates if candidate.lane == "fast"]
+        slow = [candidate for candidate in candidates if candidate.lane == "slow"]
+        ordered = []
+        for i, slow_candidate in enumerate(slow):
+            ordered.extend(fast[i * self.slow_lane_share:(i + 1) * self.slow_lane_share])
+            ordered.append(slow_candidate)
+        ordered.extend(fast[len(slow) * self.slow_lane_share:])
+        return ordered
+
+    def candidates(self, files: Iterable[Path | ScannedFile]) -> Iterator[FileCandidate]:
+        """Lazily estimate paths, or scanned files whose stat result is then reused."""
+        for file in files:
+            path, file_stat = (file.path, file.stat) if isinstance(file, ScannedFile) else (file, None)
+            try:
+                yield self.candidate(path, file_stat)
+            except OSError as e:
+                # Deleted or unreadable since the walk saw it
+                logger.warning("Not scheduling %s: %s", path, e)
+
+    def schedule(self, files: Iterable[Path | ScannedFile]) -> list[FileCandidate]:
+        """Order paths, or scanned files whose stat result is then reused."""
+        return self.order(self.candidates(files))
+
+    def stream(self, files: Iterable[Path | ScannedFile], window: int = SCHEDULING_WINDOW) -> Iterator[FileCandidate]:
+        """Schedule files while they are still being scanned, `window` files at a time.
+
+        Each window is ordered by the policy, so the first files are yielded after one
+        window has been scanned and sniffed rather than the whole tree. Slow-lane files
+        wait in a backlog across windows and are still interleaved one per
+        `slow_lane_share` fast files, then drained once the scan is done.
+        """
+        candidates = self.candidates(files)
+        slow: list[FileCandidate] = []
+        since_slow = 0
+        while batch := sorted(islice(candidates, window), key=self.sort_key):
+            slow = sorted(slow + [candidate for candidate in batch if candidate.lane == "slow"], key=self.sort_key)
+            for candidate in batch:
+                if candidate.lane == "slow":
+                    continue
+                yield candidate
+                since_slow += 1
+                if since_slow >= self.slow_lane_share and slow:
+                    yield slow.pop(0)
+                    since_slow = 0
+        yield from slow
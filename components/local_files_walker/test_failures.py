@@ -0,0 +1,61 @@
+import zipfile
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from components.local_files_walker.failures import classify_failure, extract_zip_xml, next_strategy
+from components.local_files_walker.local_files import FileParser
+from database.parse_failures import ParseFailureLedger
+
+def test_classify_failure():
+    """Test that errors and empty extractions map to the ledger's failure classes."""
+    assert classify_failure(None) == "empty_text"
+    assert classify_failure(TimeoutError()) == "timeout"
+    assert classify_failure(Exception("Read timed out. (read timeout=180)")) == "timeout"
+    assert classify_failure(Exception("PDF is encrypted, a password is required")) == "encrypted"
+    assert classify_failure(RuntimeError("Tika returned status 415")) == "unsupported"
+    assert classify_failure(zipfile.BadZipFile("File is not a zip file")) == "corrupt"
+    assert classify_failure(OSError("disk on fire")) == "error"
+
+def test_retry_escalates_and_only_touches_failures(tmp_path):
+    """Test that failures are recorded once, retried with the next strategy and recovered."""
+    docs, cache = tmp_path / "docs", tmp_path / "cache"
+    docs.mkdir()
+    scan = docs / "scan.pdf"
+    scan.write_bytes(b"%PDF-1.4" + b"x" * 500)
+    fine = docs / "fine.pdf"
+    fine.write_bytes(b"%PDF-1.4" + b"y" * 500)
+    report = docs / "report.docx"
+    with zipfile.ZipFile(report, "w") as archive:
+        archive.writestr("word/document.xml", "<w:document><w:p><w:t>Quarterly numbers</w:t></w:p></w:document>")
+
+    ledger = ParseFailureLedger(str(tmp_path / "nodes.db"), backoff_base=60)
+    parser = FileParser(docs, cache, failures=ledger)
+    tika_text = {fine: "Fine text", scan: "", report: None}
+    ocr_text = {scan: ["", ""]}
+
+    def tika(path, timeout=180):
+        if path == report:
+            raise RuntimeError("Tika returned status 422")
+        return tika_text[path]
+
+    with patch.object(parser, "_tika", side_effect=tika) as tika_calls, \
+            patch.object(parser, "_ocr", side_effect=lambda path: ocr_text[path].pop(0)):
+        for path in (scan, fine, report):
+            parser.parse_file(path)
+        # Known failures are not re-parsed by a normal run
+        parser.parse_file(scan)
+        assert tika_calls.call_count == 3
+        assert {f.path: f.error_class for f in ledger.all()} == {str(scan): "empty_text", str(report): "corrupt"}
+
+        # Nothing is due before the backoff expires
+        assert list(parser.retry_failures()) == []
+        later = datetime.now() + timedelta(minutes=5)
+        assert next_strategy(ledger.get(str(report))) == "zip_xml"
+        recovered = set(parser.retry_failures(now=later))
+
+    assert recovered == {report}
+    assert tika_calls.call_count == 3 # retries used OCR and the zip extractor only
+    assert parser.parse_file(report)[1].strip() == "Quarterly numbers"
+    # The empty OCR retry escalates the scan to the next rung
+    assert (ledger.get(str(scan)).attempts, next_strategy(ledger.get(str(scan)))) == (2, "tika_long")
+    assert extract_zip_xml(report).strip() == "Quarterly numbers"
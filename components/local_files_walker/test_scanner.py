@@ -0,0 +1,40 @@
+from pathlib import Path
+
+from components.local_files_walker.scanner import DirectoryScanner, ExclusionRules
+
+def write(root: Path, relative: str, size: int = 500) -> None:
+    path = root / relative
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+
+def test_exclusion_rules_follow_gitignore_semantics():
+    """Test basename, anchored, directory-only, ** and negated patterns."""
+    rules = ExclusionRules(["node_modules/", "/Archive", "*.tmp", "!keep.tmp", "drafts/**/old_*", "# comment"])
+
+    assert rules.excluded("project/node_modules", is_dir=True)
+    assert not rules.excluded("project/node_modules", is_dir=False)
+    assert rules.excluded("Archive", is_dir=True)
+    assert not rules.excluded("papers/Archive", is_dir=True)
+    assert rules.excluded("a/b/c.tmp", is_dir=False)
+    assert not rules.excluded("a/keep.tmp", is_dir=False)
+    assert rules.excluded("drafts/2023/q1/old_notes.md", is_dir=False)
+    assert rules.excluded("drafts/old_notes.md", is_dir=False)
+    assert not rules.excluded("drafts/new_notes.md", is_dir=False)
+
+def test_scanner_prunes_filters_and_keeps_stat(tmp_path):
+    """Test that excluded trees, wrong types and out-of-range sizes are skipped."""
+    write(tmp_path, "notes/a.md")
+    write(tmp_path, "notes/deep/nested/b.pdf")
+    write(tmp_path, "notes/tiny.md", size=10)
+    write(tmp_path, "notes/huge.pdf", size=5000)
+    write(tmp_path, "notes/image.png")
+    write(tmp_path, "code/.git/objects/c.md")
+    write(tmp_path, "code/node_modules/pkg/README.md")
+    write(tmp_path, "private/diary.md")
+    (tmp_path / ".ywignore").write_text("# personal\n/private/\n")
+
+    scanner = DirectoryScanner(tmp_path, extensions={".md", ".pdf"}, min_size=100, max_size=1000, workers=4)
+    scanned = sorted(scanner.scan(), key=lambda f: f.path)
+
+    assert [f.path.relative_to(tmp_path).as_posix() for f in scanned] == ["notes/a.md", "notes/deep/nested/b.pdf"]
+    assert all(f.stat.st_size == 500 for f in scanned)
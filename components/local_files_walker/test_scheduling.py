@@ -0,0 +1,62 @@
+import os
+from pathlib import Path
+
+from components.local_files_walker.scheduling import FileScheduler, ocr_likelihood
+
+def make_file(directory: Path, name: str, size: int, mtime: float, head: bytes = b"") -> Path:
+    path = directory / name
+    path.write_bytes(head + b"x" * (size - len(head)))
+    os.utime(path, (mtime, mtime))
+    return path
+
+def test_policies_order_by_recency_or_cost(tmp_path):
+    """Test that newest-first orders by mtime and cheap-first by estimated cost."""
+    old_note = make_file(tmp_path, "old.md", 1000, mtime=1_000)
+    new_note = make_file(tmp_path, "new.md", 1000, mtime=3_000)
+    deck = make_file(tmp_path, "deck.pptx", 2_000_000, mtime=4_000)
+    paths = [old_note, deck, new_note]
+
+    newest = FileScheduler("newest-first", slow_lane_cost=1e9).schedule(paths)
+    cheapest = FileScheduler("cheap-first", slow_lane_cost=1e9).schedule(paths)
+
+    assert [c.path.name for c in newest] == ["deck.pptx", "new.md", "old.md"]
+    assert [c.path.name for c in cheapest] == ["new.md", "old.md", "deck.pptx"]
+
+def test_scans_go_to_an_interleaved_slow_lane(tmp_path):
+    """Test that likely scans are put in the slow lane and spread over the fast lane."""
+    scans = [make_file(tmp_path, f"scan_{i}.pdf", 5_000_000, mtime=5_000 + i, head=b"%PDF-1.4 /XObject /Image") for i in range(2)]
+    notes = [make_file(tmp_path, f"note_{i}.md", 1000, mtime=1_000 + i) for i in range(5)]
+
+    ordered = FileScheduler("newest-first", slow_lane_cost=60, slow_lane_share=2).schedule([*scans, *notes])
+
+    assert [c.lane for c in ordered] == ["fast", "fast", "slow", "fast", "fast", "slow", "fast"]
+    # The newest scan still comes first within the slow lane
+    assert ordered[2].path.name == "scan_1.pdf"
+
+def test_stream_yields_before_the_scan_ends(tmp_path):
+    """Test that streaming orders each window and carries slow files over to later windows."""
+    scans = [make_file(tmp_path, f"scan_{i}.pdf", 5_000_000, mtime=5_000 + i, head=b"%PDF-1.4 /XObject /Image") for i in range(2)]
+    notes = [make_file(tmp_path, f"note_{i}.md", 1000, mtime=1_000 + i) for i in range(6)]
+    scanned = []
+
+    def scan():
+        for path in [*scans, *notes]:
+            scanned.append(path)
+            yield path
+
+    stream = FileScheduler("newest-first", slow_lane_cost=60, slow_lane_share=2).stream(scan(), window=3)
+    first = next(stream)
+    assert len(scanned) == 3
+    # The first window holds both scans and one note, the scans wait for fast files
+    assert first.path.name == "note_0.md"
+    rest = [c.path.name for c in stream]
+    assert rest == ["note_3.md", "scan_1.pdf", "note_2.md", "note_1.md", "scan_0.pdf", "note_5.md", "note_4.md"]
+
+def test_ocr_likelihood_sniffs_pdf_resources(tmp_path):
+    """Test that PDFs referencing fonts are unlikely, image-only PDFs likely, to need OCR."""
+    text_pdf = make_file(tmp_path, "text.pdf", 500, 0, head=b"%PDF-1.4 /Font /Helvetica")
+    scan_pdf = make_file(tmp_path, "scan.pdf", 500, 0, head=b"%PDF-1.4 /Subtype /Image")
+    note = make_file(tmp_path, "note.md", 500, 0)
+
+    assert ocr_likelihood(text_pdf) < 0.5 < ocr_likelihood(scan_pdf)
+    assert ocr_likelihood(note) == 0.0
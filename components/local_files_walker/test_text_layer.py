@@ -0,0 +1,48 @@
+from unittest.mock import patch
+
+from components.local_files_walker.local_files import FileParser
+from components.local_files_walker.text_layer import has_text_layer, split_pdf_pages
+
+def tika_xhtml(*pages: str) -> str:
+    body = "".join(f'<div class="page"><p>{page}</p>\n</div>' for page in pages)
+    return f'<html><head><meta name="pdf:docinfo:title" content="Report"/></head><body>{body}</body></html>'
+
+def test_split_pdf_pages():
+    """Test that Tika's page divs are split into per-page text, keeping empty pages."""
+    pages = split_pdf_pages(tika_xhtml("Typed &amp; signed page", "", "  7 "))
+
+    assert pages == ["Typed & signed page", "", "7"]
+    assert [has_text_layer(page, min_chars=5) for page in pages] == [True, False, False]
+
+def test_only_pages_without_a_text_layer_are_ocrd(tmp_path):
+    """Test that a mixed PDF keeps its text layer, OCRs the scanned pages and merges in order."""
+    pdf = tmp_path / "mixed.pdf"
+    pdf.write_bytes(b"%PDF-1.4" + b"x" * 500)
+    typed = "Typed introduction with plenty of words on it"
+    parser = FileParser(tmp_path, tmp_path / "cache")
+    response = tika_xhtml(typed, "", typed.replace("introduction", "conclusion"), "3")
+
+    with patch.object(parser, "_tika_request", return_value=response), \
+            patch.object(parser, "_ocr_pages", side_effect=lambda path, pages: [f"Scanned page {n}" for n in pages]) as ocr, \
+            patch.object(parser, "_ocr") as full_ocr:
+        _, content = parser.parse_file(pdf)
+
+    ocr.assert_called_once_with(pdf, [2, 4])
+    full_ocr.assert_not_called()
+    assert content.split("\n\n") == [typed, "Scanned page 2", typed.replace("introduction", "conclusion"), "Scanned page 4"]
+
+def test_failed_page_ocr_is_not_repeated_for_the_whole_document(tmp_path):
+    """Test that a scanned PDF whose page OCR failed is not OCR'd again in full."""
+    pdf = tmp_path / "scan.pdf"
+    pdf.write_bytes(b"%PDF-1.4" + b"x" * 500)
+    parser = FileParser(tmp_path, tmp_path / "cache")
+
+    with patch.object(parser, "_tika_request", return_value=tika_xhtml("", "")), \
+            patch.object(parser, "_ocr_pages", side_effect=OSError("tesseract is not installed")) as ocr, \
+            patch.object(parser, "_ocr") as full_ocr:
+        content, error = parser.extract(pdf)
+
+    assert content == ""
+    assert "tesseract is not installed" in str(error)
+    ocr.assert_called_once_with(pdf, [1, 2])
+    full_ocr.assert_not_called()
@@ -0,0 +1,27 @@
+import html
+import re
+
+from config.settings import PAGE_MIN_TEXT_CHARS
+
+_TAGS = re.compile(r"<[^>]+>")
+_WHITESPACE = re.compile(r"[ \t]+")
+# Block ends become newlines before the tags are stripped
+_BLOCK_ENDS = re.compile(r"</(w:p|text:p|a:p|p|h\d|li|div|tr)>|<(br|w:br|text:line-break)\s*/?>", re.IGNORECASE)
+_PAGE_START = re.compile(r'<div\s+class="page"\s*>', re.IGNORECASE)
+
+def markup_to_text(markup: str) -> str:
+    """Plain text of an XML or XHTML fragment, one line per paragraph."""
+    text = _TAGS.sub("", _BLOCK_ENDS.sub("\n", markup))
+    return _WHITESPACE.sub(" ", html.unescape(text)).strip()
+
+def split_pdf_pages(xhtml: str) -> list[str]:
+    """The text of each page of a PDF, in order, from Tika's XHTML output.
+
+    Tika wraps every PDF page in a `<div class="page">`, so the document can be cut at
+    those markers without a full XML parse.
+    """
+    return [markup_to_text(page) for page in _PAGE_START.split(xhtml)[1:]]
+
+def has_text_layer(page_text: str, min_chars: int = PAGE_MIN_TEXT_CHARS) -> bool:
+    """Whether a page's extracted text is usable, rather than a scan with at most a stray header."""
+    return sum(char.isalnum() for char in page_text) >= min_chars
@@ -0,0 +1,84 @@
+import asyncio
+import io
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from PIL import Image, ImageOps
+
+from components.local_files_walker.hashing import hash_file
+from config.config_logger import logger
+from config.settings import NOTES_CACHE_PATH, NOTE_IMAGE_MAX_SIDE
+
+def encode_thumbnail(path: str, max_side: int) -> bytes:
+    """Decode, downsize and JPEG-encode a scanned page. Runs in a worker process."""
+    with Image.open(path) as image:
+        # For JPEGs this decodes at a reduced scale straight away, much cheaper than full size
+        image.draft("RGB", (max_side, max_side))
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        image.thumbnail((max_side, max_side))
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=85, optimize=True)
+        return buffer.getvalue()
+
+class ThumbnailCache:
+    """Downsized JPEG thumbnails of note scans, cached on disk by file hash.
+
+    Cache misses are decoded and resized in a process pool, so encoding hundreds of
+    scans uses every core, and unchanged scans are never decoded again on later runs.
+    """
+
+    def __init__(
+        self,
+        cache_path: Path = NOTES_CACHE_PATH,
+        max_side: int = NOTE_IMAGE_MAX_SIDE,
+        executor: Optional[Executor] = None,
+    ):
+        self.cache_path = Path(cache_path)
+        self.max_side = max_side
+        self._executor = executor
+        self.logger = logger
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor()
+        return self._executor
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+
+    def _cache_file(self, file_hash: str) -> Path:
+        return self.cache_path / f"{file_hash}_{self.max_side}.jpg"
+
+    async def get_many(self, paths: list[Path]) -> dict[Path, bytes]:
+        """Return {path: JPEG bytes} for every path, encoding only uncached scans."""
+        loop = asyncio.get_running_loop()
+        hashes = await asyncio.to_thread(lambda: {path: hash_file(path) for path in paths})
+        thumbnails: dict[Path, bytes] = {}
+        missing = []
+        for path, file_hash in hashes.items():
+            cache_file = self._cache_file(file_hash)
+            if cache_file.exists():
+                thumbnails[path] = cache_file.read_bytes()
+            else:
+                missing.append(path)
+        self.hits += len(thumbnails)
+        self.misses += len(missing)
+
+        encoded = await asyncio.gather(*(
+            loop.run_in_executor(self.executor, encode_thumbnail, str(path), self.max_side)
+            for path in missing
+        ))
+        os.makedirs(self.cache_path, exist_ok=True)
+        for path, data in zip(missing, encoded):
+            cache_file = self._cache_file(hashes[path])
+            temp_file = cache_file.with_suffix(".tmp")
+            temp_file.write_bytes(data)
+            os.replace(temp_file, cache_file)
+            thumbnails[path] = data
+        return thumbnails
@@ -0,0 +1,114 @@
+import asyncio
+from pathlib import Path
+from typing import Protocol
+
+from components.notes.image_cache import ThumbnailCache
+from components.notes.objects import Class, Note, Topic
+from components.obsidian.exporter import ObsidianExporter, render_topic
+from config.config_logger import logger
+from config.settings import (
+    NOTES_PATH, NOTE_IMAGE_EXTENSIONS,
+    NOTES_CATEGORISE_BATCH_SIZE, NOTES_CONCURRENCY,
+)
+
+class NotesModel(Protocol):
+    async def categorise(self, pages: list[tuple[str, bytes]]) -> list[Topic]: ...
+    async def transcribe(self, topic: Topic, pages: list[tuple[str, bytes]]) -> str: ...
+
+def create_notes_objects(notes_path: Path) -> list[Class]:
+    """Every folder under notes_path is a class, every image in it a page of notes."""
+    classes = []
+    for class_dir in sorted(path for path in Path(notes_path).iterdir() if path.is_dir()):
+        notes = [
+            Note(file_name=path.name, path=path)
+            for path in sorted(class_dir.iterdir())
+            if path.suffix.lower() in NOTE_IMAGE_EXTENSIONS
+        ]
+        if notes:
+            classes.append(Class(class_name=class_dir.name, notes=notes))
+    return classes
+
+def save_to_obsidian(topic: Topic, class_name: str, exporter: ObsidianExporter) -> Path | None:
+    """Write a topic's note through the exporter, returning its path if it changed."""
+    relative_path, markdown = render_topic(topic, class_name)
+    if exporter.write(relative_path, markdown):
+        return exporter.vault_path / relative_path
+    return None
+
+class NotesEngine:
+    """Turns folders of note scans into one Obsidian note per topic.
+
+    Thumbnails come from the process-pooled, hash-keyed ThumbnailCache. Pages are
+    categorised in batches, and all LLM calls (categorisation and transcription,
+    across classes) share a single concurrency cap. Each topic is written as soon as
+    its transcription finishes, so an interrupted run keeps everything done so far;
+    notes whose Markdown is unchanged since the last export are not rewritten.
+    """
+
+    def __init__(
+        self,
+        model: NotesModel,
+        thumbnails: ThumbnailCache,
+        exporter: ObsidianExporter | None = None,
+        batch_size: int = NOTES_CATEGORISE_BATCH_SIZE,
+        concurrency: int = NOTES_CONCURRENCY,
+    ):
+        self.model = model
+        self.thumbnails = thumbnails
+        self.exporter = exporter or ObsidianExporter()
+        self.batch_size = batch_size
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.logger = logger
+
+    async def run(self, notes_path: Path = NOTES_PATH) -> list[Class]:
+        classes = create_notes_objects(notes_path)
+        self.logger.info(f"Processing {len(classes)} classes from {notes_path}")
+        try:
+            return list(await asyncio.gather(*(self.process_class(some_class) for some_class in classes)))
+        finally:
+            self.exporter.save_manifest()
+
+    async def process_class(self, some_class: Class) -> Class:
+        images = await self.thumbnails.get_many([note.path for note in some_class.notes])
+        pages = {note.file_name: images[note.path] for note in some_class.notes}
+        some_class.topics = await self.categorise(some_class, pages)
+
+        transcriptions = [self.transcribe_and_save(some_class, topic, pages) for topic in some_class.topics]
+        for transcription in asyncio.as_completed(transcriptions):
+            output_file = await transcription
+            if output_file is not None:
+                self.logger.info(f"Saved to: {output_file}")
+        return some_class
+
+    async def categorise(self, some_class: Class, pages: dict[str, bytes]) -> list[Topic]:
+        names = list(pages)
+        batches = [names[i:i + self.batch_size] for i in range(0, len(names), self.batch_size)]
+
+        async def categorise_batch(batch: list[str]) -> list[Topic]:
+            async with self._semaphore:
+                return await self.model.categorise([(name, pages[name]) for name in batch])
+
+        # Topics spanning a batch boundary come back twice, merge them by name
+        topics: dict[str, Topic] = {}
+        for batch_topics in await asyncio.gather(*(categorise_batch(batch) for batch in batches)):
+            for topic in batch_topics:
+                if topic.topic_name in topics:
+                    topics[topic.topic_name].pages.extend(topic.pages)
+                else:
+                    topics[topic.topic_name] = topic
+        self.logger.info(f"Categorised {len(names)} pages of {some_class.class_name} into {len(topics)} topics")
+        return list(topics.values())
+
+    async def transcribe_and_save(self, some_class: Class, topic: Topic, pages: dict[str, bytes]) -> Path | None:
+        topic_pages = [(name, pages[name]) for name in topic.pages if name in pages]
+        try:
+            async with self._semaphore:
+                topic.content = await self.model.transcribe(topic, topic_pages)
+        except Exception as e:
+            self.logger.error(f"Error transcribing {topic.topic_name} of {some_class.class_name}: {e}")
+            return None
+        return await asyncio.to_thread(save_to_obsidian, topic, some_class.class_name, self.exporter)
+
+def build_default_engine() -> NotesEngine:
+    from components.notes.notes_model import GeminiNotesModel
+    return NotesEngine(GeminiNotesModel(), ThumbnailCache())
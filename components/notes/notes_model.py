@@ -0,0 +1,50 @@
+import os
+
+from components.notes.objects import Categorisation, Topic
+from components.notes.prompts import CATEGORIZE_PROMPT, TRANSCRIBE_PROMPT
+from config.settings import LLM_MODEL
+
+class GeminiNotesModel:
+    """Categorises and transcribes note scans with Gemini's async API.
+
+    Images are sent as inline JPEG parts rather than pasted into the prompt text.
+    """
+
+    def __init__(self, model_name: str = LLM_MODEL):
+        self.model_name = model_name
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            # Imported lazily, the client needs GEMINI_API_KEY
+            from google import genai
+            self._client = genai.Client(api_key=os.environ["GEMINI_API_KEY"])
+        return self._client
+
+    def _image_parts(self, pages: list[tuple[str, bytes]]) -> list:
+        from google.genai import types
+        parts = []
+        for file_name, data in pages:
+            parts.append(f"File name: {file_name}")
+            parts.append(types.Part.from_bytes(data=data, mime_type="image/jpeg"))
+        return parts
+
+    async def categorise(self, pages: list[tuple[str, bytes]]) -> list[Topic]:
+        from google.genai import types
+        response = await self.client.aio.models.generate_content(
+            model=self.model_name,
+            contents=[CATEGORIZE_PROMPT, *self._image_parts(pages)],
+            config=types.GenerateContentConfig(
+                response_mime_type="application/json",
+                response_schema=Categorisation,
+            ),
+        )
+        return response.parsed.topics
+
+    async def transcribe(self, topic: Topic, pages: list[tuple[str, bytes]]) -> str:
+        response = await self.client.aio.models.generate_content(
+            model=self.model_name,
+            contents=[TRANSCRIBE_PROMPT, f"Topic: {topic.topic_name}", *self._image_parts(pages)],
+        )
+        return response.text
@@ -0,0 +1,25 @@
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+class Note(BaseModel):
+    """A single scanned page of handwritten notes"""
+    file_name: str = Field(description="File name of the scanned page")
+    path: Path = Field(description="Path to the scanned page")
+
+class Topic(BaseModel):
+    """A group of pages covering the same topic"""
+    topic_name: str = Field(description="Short name of the topic")
+    pages: list[str] = Field(description="File names of the pages belonging to the topic")
+    description: str = Field(description="One or two sentences describing the topic")
+    content: str = Field(default="", description="Markdown transcription of the topic's pages")
+
+class Class(BaseModel):
+    """All notes of one class (one folder under NOTES_PATH)"""
+    class_name: str
+    notes: list[Note]
+    topics: list[Topic] = Field(default_factory=list)
+
+class Categorisation(BaseModel):
+    """Structured LLM output for the categorisation step"""
+    topics: list[Topic]
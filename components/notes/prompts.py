@@ -0,0 +1,12 @@
+CATEGORIZE_PROMPT = """
+You are given scanned pages of handwritten notes from a single class, each preceded by its file name.
+Group the pages into topics. Every page belongs to exactly one topic and pages of one topic are
+usually consecutive. For every topic give a short name, a one or two sentence description and
+the file names of its pages. Leave the content field empty.
+"""
+
+TRANSCRIBE_PROMPT = """
+You are given scanned pages of handwritten notes on a single topic. Transcribe them into clean
+Markdown, preserving headings, lists and formulas (use LaTeX between $ signs). Do not add
+information that is not on the pages.
+"""
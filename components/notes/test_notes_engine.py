@@ -0,0 +1,76 @@
+import pytest
+import asyncio
+
+from PIL import Image
+
+from components.notes.image_cache import ThumbnailCache
+from components.notes.notes_engine import NotesEngine
+from components.notes.objects import Topic
+from components.obsidian.exporter import ObsidianExporter
+
+@pytest.fixture
+def notes_dir(tmp_path):
+    """Two classes of large scans."""
+    for class_name, pages in (("Macro", 5), ("Stats", 3)):
+        class_dir = tmp_path / "notes" / class_name
+        class_dir.mkdir(parents=True)
+        for i in range(pages):
+            Image.new("RGB", (3000, 4000), (255, 255, i * 40)).save(class_dir / f"page_{i}.jpg")
+    return tmp_path / "notes"
+
+class StubModel:
+    """Puts every pair of pages into one topic and records concurrency."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.image_sizes = set()
+
+    async def _call(self):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+
+    async def categorise(self, pages):
+        await self._call()
+        names = [name for name, _ in pages]
+        return [
+            Topic(topic_name=f"Topic {name}", pages=names[i:i + 2], description="...")
+            for i, name in list(enumerate(names))[::2]
+        ]
+
+    async def transcribe(self, topic, pages):
+        await self._call()
+        self.image_sizes.update(len(data) for _, data in pages)
+        return "\n".join(f"Transcript of {name}" for name, _ in pages)
+
+@pytest.mark.asyncio
+async def test_engine_writes_one_note_per_topic(notes_dir, tmp_path):
+    """Test that every topic is transcribed and written, within the concurrency cap."""
+    model = StubModel()
+    thumbnails = ThumbnailCache(tmp_path / "cache", max_side=400)
+    engine = NotesEngine(model, thumbnails, ObsidianExporter(tmp_path / "vault"), batch_size=2, concurrency=2)
+
+    classes = await engine.run(notes_dir)
+    thumbnails.close()
+
+    written = sorted(path.relative_to(tmp_path / "vault") for path in (tmp_path / "vault").rglob("*.md"))
+    assert len(written) == sum(len(some_class.topics) for some_class in classes) == 5
+    assert "Transcript of page_1.jpg" in (tmp_path / "vault" / "Macro" / "Topic page_0.jpg.md").read_text()
+    assert model.max_in_flight == 2
+
+@pytest.mark.asyncio
+async def test_thumbnails_are_downsized_and_cached(notes_dir, tmp_path):
+    """Test that scans are downsized once and served from the cache afterwards."""
+    paths = sorted(notes_dir.rglob("*.jpg"))
+    thumbnails = ThumbnailCache(tmp_path / "cache", max_side=400)
+
+    first = await thumbnails.get_many(paths)
+    second = await thumbnails.get_many(paths)
+    thumbnails.close()
+
+    assert (thumbnails.misses, thumbnails.hits) == (len(paths), len(paths))
+    assert first == second
+    with Image.open(next(iter((tmp_path / "cache").iterdir()))) as image:
+        assert max(image.size) == 400
@@ -0,0 +1,167 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+from config.config_logger import logger
+from config.settings import (
+    NOTION_API_URL, NOTION_VERSION, NOTION_RATE_LIMIT, NOTION_MAX_CONCURRENCY, NOTION_MAX_RETRIES,
+)
+
+class RateLimiter:
+    """Token bucket allowing `rate` requests per second with bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._updated = time.monotonic()
+                self._tokens = 0.0
+            else:
+                self._tokens -= 1
+
+def retry_delay(retry_after: Optional[str], default: float) -> float:
+    """Seconds to wait from a Retry-After header, given as seconds or an HTTP-date.
+
+    Falls back to `default` when the header is missing or malformed.
+    """
+    if retry_after is None:
+        return default
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return default
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+class NotionClient:
+    """Async Notion API client sharing one pooled HTTP connection pool.
+
+    All requests go through a concurrency limit and a token bucket matching Notion's
+    average of 3 requests per second; 429 and 5xx responses are retried, honouring
+    the Retry-After header, as are connection errors and timeouts.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        base_url: str = NOTION_API_URL,
+        rate: float = NOTION_RATE_LIMIT,
+        max_concurrency: int = NOTION_MAX_CONCURRENCY,
+        max_retries: int = NOTION_MAX_RETRIES,
+    ):
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json",
+                "Notion-Version": NOTION_VERSION,
+            },
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+            timeout=httpx.Timeout(30.0),
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._rate_limiter = RateLimiter(rate, burst=max_concurrency)
+        self.max_retries = max_retries
+        self.logger = logger
+        self.requests_made = 0
+
+    async def __aenter__(self) -> "NotionClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+    async def request(self, method: str, url: str, **kwargs) -> Dict[str, Any]:
+        for attempt in range(self.max_retries + 1):
+            retries_left = attempt < self.max_retries
+            async with self._semaphore:
+                await self._rate_limiter.acquire()
+                try:
+                    response = await self._client.request(method, url, **kwargs)
+                except httpx.TransportError as e:
+                    # Connection errors and timeouts share the retry budget of 429s and 5xxs
+                    if not retries_left:
+                        raise
+                    response = None
+                    self.logger.warning("Notion request to %s failed (%r), retrying in %ss", url, e, 2 ** attempt)
+                self.requests_made += 1
+            if response is None:
+                await asyncio.sleep(2 ** attempt)
+                continue
+            retryable = response.status_code == 429 or response.status_code >= 500
+            if retryable and retries_left:
+                delay = retry_delay(response.headers.get("Retry-After"), 2 ** attempt)
+                self.logger.warning("Notion returned %s for %s, retrying in %ss", response.status_code, url, delay)
+                await asyncio.sleep(delay)
+                continue
+            response.raise_for_status()
+            return response.json()
+
+    async def paginate(
+        self,
+        method: str,
+        url: str,
+        body: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield every result of a paginated endpoint, following next_cursor."""
+        cursor = None
+        while True:
+            if method == "POST":
+                payload = {**(body or {}), "page_size": 100}
+                if cursor:
+                    payload["start_cursor"] = cursor
+                data = await self.request(method, url, json=payload)
+            else:
+                params = {"page_size": 100, **({"start_cursor": cursor} if cursor else {})}
+                data = await self.request(method, url, params=params)
+            for result in data.get("results", []):
+                yield result
+            if not data.get("has_more"):
+                return
+            cursor = data.get("next_cursor")
+
+    async def query_database(
+        self,
+        database_id: str,
+        edited_after: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the pages of a database, oldest edit first, optionally only recent edits."""
+        body: Dict[str, Any] = {"sorts": [{"timestamp": "last_edited_time", "direction": "ascending"}]}
+        if edited_after:
+            body["filter"] = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": edited_after}}
+        async for page in self.paginate("POST", f"/databases/{database_id}/query", body):
+            yield page
+
+    async def fetch_blocks(self, block_id: str) -> list[Dict[str, Any]]:
+        """Fetch all blocks below `block_id`, recursing into children concurrently.
+
+        Nested blocks are attached under a `children` key of their parent block.
+        """
+        blocks = [block async for block in self.paginate("GET", f"/blocks/{block_id}/children")]
+        parents = [block for block in blocks if block.get("has_children")]
+        children = await asyncio.gather(*(self.fetch_blocks(block["id"]) for block in parents))
+        for block, block_children in zip(parents, children):
+            block["children"] = block_children
+        return blocks
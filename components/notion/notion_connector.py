@@ -0,0 +1,135 @@
+import asyncio
+import hashlib
+import os
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import click
+
+from components.notion.notion_client import NotionClient
+from config.config_logger import logger
+from config.settings import DATABASE_PATH
+from database.node import FileNode
+from database.related_graph import update_related_graph
+from database.sync_cursors import SyncCursorStore
+
+TEXT_BLOCK_TYPES = {
+    "paragraph", "heading_1", "heading_2", "heading_3", "bulleted_list_item",
+    "numbered_list_item", "quote", "code", "to_do", "toggle", "callout",
+}
+IMAGE_SOURCES = ("file", "external")
+
+def extract_text(blocks: list[Dict[str, Any]]) -> str:
+    """Flatten a (nested) block tree into plain text, one block per line."""
+    lines = []
+    for block in blocks:
+        block_type = block.get("type")
+        content = block.get(block_type, {}) or {}
+        if block_type in TEXT_BLOCK_TYPES:
+            text = "".join(item.get("plain_text") or item.get("text", {}).get("content", "")
+                           for item in content.get("rich_text", []))
+            if text:
+                lines.append(text)
+        elif block_type == "image":
+            for source in IMAGE_SOURCES:
+                if content.get(source):
+                    lines.append(f"<img src='{content[source]['url']}'>")
+        if block.get("children"):
+            lines.append(extract_text(block["children"]))
+    return "\n".join(line for line in lines if line)
+
+def page_title(page: Dict[str, Any]) -> str:
+    for prop in page.get("properties", {}).values():
+        if prop.get("type") == "title" and prop.get("title"):
+            return "".join(item.get("plain_text", "") for item in prop["title"])
+    return ""
+
+def page_to_node(page: Dict[str, Any], blocks: list[Dict[str, Any]]) -> FileNode:
+    """Convert a Notion page and its block tree into a FileNode."""
+    title = page_title(page)
+    body = extract_text(blocks)
+    content = f"{title}\n{body}" if title else body
+    return FileNode(
+        # Identifies this revision of the page, as the file hash does for local files
+        primary_id=hashlib.md5(f"{page['id']}_{page['last_edited_time']}".encode()).hexdigest(),
+        content=content,
+        file_size=round(len(content.encode("utf-8")) / 1024, 2),
+        file_creation_time=_parse_time(page["created_time"]),
+        file_modification_time=_parse_time(page["last_edited_time"]),
+        filetype="notion",
+        location="Notion",
+        path=page.get("url") or page["id"],
+    )
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+class NotionConnector:
+    """Incrementally syncs a Notion database into FileNodes.
+
+    Pages are streamed from the paginated database query and their block trees are
+    fetched concurrently (bounded by the client's concurrency and rate limits). The
+    largest last_edited_time seen is stored as the cursor, so the next sync only
+    queries pages edited since. With `ingest`, the cursor only moves once the synced
+    nodes have been ingested, so pages that were not stored are fetched again.
+    """
+
+    def __init__(self, client: NotionClient, cursors: SyncCursorStore):
+        self.client = client
+        self.cursors = cursors
+        self.logger = logger
+
+    async def sync(
+        self,
+        database_id: str,
+        full: bool = False,
+        ingest: Optional[Callable[[list[FileNode]], Awaitable[None]]] = None,
+    ) -> list[FileNode]:
+        source = f"notion:{database_id}"
+        cursor = None if full else self.cursors.get(source)
+        pages = [page async for page in self.client.query_database(database_id, edited_after=cursor)]
+        self.logger.info(f"Notion sync of {database_id}: {len(pages)} pages edited since {cursor or 'the beginning'}")
+
+        results = await asyncio.gather(*(self._page_to_node(page) for page in pages))
+        nodes = [node for node in results if node is not None]
+
+        if ingest is not None and nodes:
+            await ingest(nodes)
+        if len(nodes) == len(pages) and pages:
+            # Only move the cursor when every page made it, so failures are retried next sync
+            self.cursors.set(source, max(page["last_edited_time"] for page in pages))
+        return nodes
+
+    async def _page_to_node(self, page: Dict[str, Any]) -> Optional[FileNode]:
+        try:
+            blocks = await self.client.fetch_blocks(page["id"])
+            return page_to_node(page, blocks)
+        except Exception as e:
+            self.logger.error(f"Error fetching Notion page {page.get('id')}: {e}")
+            return None
+
+async def ingest_nodes(nodes: list[FileNode]) -> None:
+    """Featurise, embed and store synced pages, raising if any of them was not stored."""
+    # Imported here, the pipeline pulls in the whole ingestion stack
+    from components.pipeline.pipeline import build_node_pipeline
+    stats = await build_node_pipeline(nodes).run()
+    failed = sum(stage.failed for stage in stats)
+    if failed:
+        raise RuntimeError(f"{failed} of {len(nodes)} Notion pages failed to ingest")
+
+async def sync_database(database_id: str, full: bool = False) -> list[FileNode]:
+    async with NotionClient(os.environ["NOTION_TOKEN"]) as client:
+        connector = NotionConnector(client, SyncCursorStore(str(DATABASE_PATH)))
+        return await connector.sync(database_id, full=full, ingest=ingest_nodes)
+
+@click.command()
+@click.argument("database_id")
+@click.option("--full", is_flag=True, help="Ignore the sync cursor and fetch every page.")
+def main(database_id: str, full: bool):
+    nodes = asyncio.run(sync_database(database_id, full=full))
+    logger.info(f"Synced and stored {len(nodes)} Notion pages")
+    if nodes:
+        update_related_graph()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import pytest
+import httpx
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from components.notion.notion_client import NotionClient, RateLimiter, retry_delay
+from components.notion.notion_connector import NotionConnector
+from database.sync_cursors import SyncCursorStore
+
+def make_block(block_id: str, text: str, has_children: bool = False) -> dict:
+    return {
+        "id": block_id,
+        "type": "paragraph",
+        "has_children": has_children,
+        "paragraph": {"rich_text": [{"plain_text": text}]},
+    }
+
+class MockNotion:
+    """In-memory Notion workspace served over HTTP by a local mock server."""
+
+    def __init__(self, num_pages: int, blocks_per_page: int):
+        self.pages = [
+            {
+                "id": f"page-{i}",
+                "created_time": "2024-01-01T00:00:00.000Z",
+                "last_edited_time": f"2024-01-{i + 1:02d}T00:00:00.000Z",
+                "url": f"https://notion.so/page-{i}",
+                "properties": {"Name": {"type": "title", "title": [{"plain_text": f"Page {i}"}]}},
+            }
+            for i in range(num_pages)
+        ]
+        self.children = {}
+        for page in self.pages:
+            blocks = [make_block(f"{page['id']}-b{j}", f"{page['id']} block {j}") for j in range(blocks_per_page)]
+            blocks[0]["has_children"] = True
+            self.children[page["id"]] = blocks
+            self.children[blocks[0]["id"]] = [make_block(f"{page['id']}-nested", f"{page['id']} nested")]
+        self.requests = []
+        self.fail_once = set()
+
+    def paginate(self, items: list, cursor: str | None, page_size: int) -> dict:
+        start = int(cursor or 0)
+        end = start + page_size
+        return {"results": items[start:end], "has_more": end < len(items), "next_cursor": str(end)}
+
+@pytest.fixture
+def mock_notion():
+    notion = MockNotion(num_pages=5, blocks_per_page=150)
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def reply(self, status: int, body: dict, headers: dict | None = None):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            notion.requests.append(self.path)
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            pages = notion.pages
+            after = body.get("filter", {}).get("last_edited_time", {}).get("on_or_after")
+            if after:
+                pages = [page for page in pages if page["last_edited_time"] >= after]
+            self.reply(200, notion.paginate(pages, body.get("start_cursor"), body["page_size"]))
+
+        def do_GET(self):
+            notion.requests.append(self.path)
+            url = urlparse(self.path)
+            if url.path in notion.fail_once:
+                notion.fail_once.discard(url.path)
+                return self.reply(429, {"message": "rate limited"}, {"Retry-After": "0"})
+            block_id = url.path.split("/")[-2]
+            query = parse_qs(url.query)
+            self.reply(200, notion.paginate(
+                notion.children.get(block_id, []), query.get("start_cursor", [None])[0], int(query["page_size"][0])
+            ))
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    notion.url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    yield notion
+    server.shutdown()
+
+@pytest.mark.asyncio
+async def test_sync_fetches_all_blocks_and_children(mock_notion, tmp_path):
+    """Test that block pagination and nested children are followed for every page."""
+    async with NotionClient("token", base_url=mock_notion.url, rate=1000) as client:
+        connector = NotionConnector(client, SyncCursorStore(str(tmp_path / "nodes.db")))
+        nodes = await connector.sync("db")
+
+    assert len(nodes) == 5
+    node = next(node for node in nodes if node.path.endswith("page-3"))
+    assert node.content.startswith("Page 3\n")
+    assert "page-3 block 149" in node.content
+    assert "page-3 nested" in node.content
+    assert node.location == "Notion"
+
+@pytest.mark.asyncio
+async def test_incremental_sync_uses_cursor(mock_notion, tmp_path):
+    """Test that a second sync only returns pages edited since the stored cursor."""
+    cursors = SyncCursorStore(str(tmp_path / "nodes.db"))
+    async with NotionClient("token", base_url=mock_notion.url, rate=1000) as client:
+        connector = NotionConnector(client, cursors)
+        await connector.sync("db")
+        assert cursors.get("notion:db") == "2024-01-05T00:00:00.000Z"
+
+        mock_notion.pages[1]["last_edited_time"] = "2024-02-01T00:00:00.000Z"
+        nodes = await connector.sync("db")
+
+    # The cursor is inclusive, so the most recent page of the last sync comes back too
+    assert sorted(node.path for node in nodes) == ["https://notion.so/page-1", "https://notion.so/page-4"]
+
+@pytest.mark.asyncio
+async def test_cursor_only_moves_after_the_pages_were_ingested(mock_notion, tmp_path):
+    """Test that a failed ingest leaves the cursor, so the same pages are synced again."""
+    cursors = SyncCursorStore(str(tmp_path / "nodes.db"))
+    ingested = []
+    async def failing_ingest(nodes):
+        raise RuntimeError("store is locked")
+    async def ingest(nodes):
+        ingested.extend(nodes)
+
+    async with NotionClient("token", base_url=mock_notion.url, rate=1000) as client:
+        connector = NotionConnector(client, cursors)
+        with pytest.raises(RuntimeError):
+            await connector.sync("db", ingest=failing_ingest)
+        assert cursors.get("notion:db") is None
+
+        nodes = await connector.sync("db", ingest=ingest)
+    assert ingested == nodes and len(nodes) == 5
+    assert cursors.get("notion:db") == "2024-01-05T00:00:00.000Z"
+
+@pytest.mark.asyncio
+async def test_client_retries_rate_limited_requests(mock_notion):
+    """Test that 429 responses are retried."""
+    mock_notion.fail_once.add("/v1/blocks/page-0/children")
+    async with NotionClient("token", base_url=mock_notion.url, rate=1000) as client:
+        blocks = await client.fetch_blocks("page-0")
+
+    assert len(blocks) == 150
+    assert mock_notion.requests.count("/v1/blocks/page-0/children?page_size=100") == 2
+
+def test_retry_delay_accepts_seconds_and_http_dates():
+    """Test that Retry-After is read as seconds or an HTTP-date, falling back to the backoff."""
+    in_a_minute = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=60), usegmt=True)
+    assert retry_delay("3", 1.0) == 3.0
+    assert 55 <= retry_delay(in_a_minute, 1.0) <= 60
+    assert retry_delay("Wed, 21 Oct 2015 07:28:00 GMT", 1.0) == 0.0
+    assert retry_delay("soon", 4.0) == 4.0
+    assert retry_delay(None, 2.0) == 2.0
+
+@pytest.mark.asyncio
+async def test_client_retries_transport_errors(monkeypatch):
+    """Test that connection errors and timeouts are retried within the retry budget."""
+    failures = [httpx.ConnectError("reset"), httpx.ReadTimeout("slow")]
+    def handler(request):
+        if failures:
+            raise failures.pop(0)
+        return httpx.Response(200, json={"ok": True})
+
+    sleeps = []
+    async def sleep(delay):
+        sleeps.append(delay)
+    monkeypatch.setattr("components.notion.notion_client.asyncio.sleep", sleep)
+    async with NotionClient("token", rate=1000, max_retries=2) as client:
+        client._client = httpx.AsyncClient(base_url="http://notion.test", transport=httpx.MockTransport(handler))
+        assert await client.request("GET", "/users/me") == {"ok": True}
+        assert sleeps == [1, 2]
+
+        failures.extend([httpx.ConnectError("reset")] * 3)
+        with pytest.raises(httpx.ConnectError):
+            await client.request("GET", "/users/me")
+
+@pytest.mark.asyncio
+async def test_rate_limiter_spaces_requests():
+    """Test that the token bucket enforces the average request rate."""
+    limiter = RateLimiter(rate=20, burst=1)
+    start = time.monotonic()
+    for _ in range(6):
+        await limiter.acquire()
+    assert time.monotonic() - start >= 0.24
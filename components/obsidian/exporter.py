@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable
+
+import click
+
+from components.notes.objects import Topic
+from config.config_logger import logger
+from config.settings import OBSIDIAN_VAULT_PATH, OBSIDIAN_MANIFEST_NAME, OBSIDIAN_EXPORT_WORKERS, DATABASE_PATH
+
+def safe_file_name(name: str) -> str:
+    return re.sub(r'[\\/:*?"<>|]', "-", name).strip() or "Untitled"
+
+def render_topic(topic: Topic, class_name: str) -> tuple[str, str]:
+    """Render a transcribed topic to (vault-relative path, Markdown)."""
+    relative_path = f"{safe_file_name(class_name)}/{safe_file_name(topic.topic_name)}.md"
+    pages = "\n".join(f"  - {page}" for page in topic.pages)
+    markdown = (
+        f"---\nclass: {json.dumps(class_name)}\npages:\n{pages}\n---\n"
+        f"# {topic.topic_name}\n\n> {topic.description}\n\n{topic.content}\n"
+    )
+    return relative_path, markdown
+
+def _yaml_list(values: list[str]) -> str:
+    return "[" + ", ".join(json.dumps(value) for value in values) + "]"
+
+def node_path(node: dict[str, Any]) -> str:
+    title = Path(node["path"]).stem
+    return f"Library/{safe_file_name(node['filetype'])}/{safe_file_name(title)} ({node['primary_id'][:8]}).md"
+
+def render_node(node: dict[str, Any], related: Iterable[str] = ()) -> tuple[str, str]:
+    """Render a stored node row (see NODE_FIELDS) to (vault-relative path, Markdown).
+
+    `related` are the vault-relative paths of related nodes, rendered as wikilinks.
+    """
+    title = Path(node["path"]).stem
+    relative_path = node_path(node)
+    quotes = "\n".join(f"> {quote}\n" for quote in node.get("quotes") or [])
+    links = "".join(f"- [[{link.removesuffix('.md')}]]\n" for link in related)
+    markdown = (
+        "---\n"
+        f"source: {json.dumps(node['path'])}\n"
+        f"label: {json.dumps(node.get('label') or '')}\n"
+        f"author: {_yaml_list(node.get('author') or [])}\n"
+        f"tags: {_yaml_list(node.get('tags') or [])}\n"
+        f"themes: {_yaml_list(node.get('themes') or [])}\n"
+        "---\n"
+        f"# {title}\n\n"
+        f"{node.get('summary') or ''}\n\n"
+        f"**Main argument:** {node.get('main_argument') or ''}\n\n"
+        f"{quotes}"
+        + (f"\n## Related\n\n{links}" if links else "")
+    )
+    return relative_path, markdown
+
+NODE_FIELDS = ["primary_id", "path", "filetype", "label", "author", "tags", "themes", "summary", "main_argument", "quotes"]
+
+@dataclass
+class ExportResult:
+    written: list[str] = field(default_factory=list)
+    unchanged: int = 0
+    removed: list[str] = field(default_factory=list)
+
+class ObsidianExporter:
+    """Writes rendered Markdown into the vault, skipping files whose content is unchanged.
+
+    A manifest in the vault maps every file this exporter wrote to the hash of the
+    content it wrote. Files whose rendered content hashes the same (and still exist)
+    are not touched, so Drive only resyncs what actually changed. Writes go to a
+    temporary file first and are moved into place atomically, in parallel threads.
+    """
+
+    def __init__(
+        self,
+        vault_path: Path = OBSIDIAN_VAULT_PATH,
+        manifest_name: str = OBSIDIAN_MANIFEST_NAME,
+        max_workers: int = OBSIDIAN_EXPORT_WORKERS,
+    ):
+        self.vault_path = Path(vault_path)
+        self.manifest_path = self.vault_path / manifest_name
+        self.max_workers = max_workers
+        self.logger = logger
+        self._lock = threading.Lock()
+        self.manifest: dict[str, str] = self._load_manifest()
+
+    def _load_manifest(self) -> dict[str, str]:
+        try:
+            return json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError:
+            self.logger.warning(f"Corrupt manifest {self.manifest_path}, rewriting all files")
+            return {}
+
+    def save_manifest(self) -> None:
+        with self._lock:
+            payload = json.dumps(self.manifest, sort_keys=True)
+        _atomic_write(self.manifest_path, payload.encode("utf-8"))
+
+    def write(self, relative_path: str, markdown: str) -> bool:
+        """Write one file if its content changed, returning whether it was written."""
+        data = markdown.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        target = self.vault_path / relative_path
+        with self._lock:
+            unchanged = self.manifest.get(relative_path) == digest
+        if unchanged and target.exists():
+            return False
+        _atomic_write(target, data)
+        with self._lock:
+            self.manifest[relative_path] = digest
+        return True
+
+    def export(self, documents: Iterable[tuple[str, str]], prune: bool = False) -> ExportResult:
+        """Export (relative path, Markdown) pairs in parallel and save the manifest.
+
+        With `prune`, files written by earlier exports that are not part of this one
+        are deleted, leaving files the exporter never wrote alone.
+        """
+        documents = list(documents)
+        result = ExportResult()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for (relative_path, _), written in zip(documents, pool.map(lambda doc: self.write(*doc), documents)):
+                if written:
+                    result.written.append(relative_path)
+                else:
+                    result.unchanged += 1
+        if prune:
+            exported = {relative_path for relative_path, _ in documents}
+            for relative_path in set(self.manifest) - exported:
+                (self.vault_path / relative_path).unlink(missing_ok=True)
+                del self.manifest[relative_path]
+                result.removed.append(relative_path)
+        self.save_manifest()
+        self.logger.info(
+            f"Exported to {self.vault_path}: {len(result.written)} written, "
+            f"{result.unchanged} unchanged, {len(result.removed)} removed"
+        )
+        return result
+
+def _atomic_write(target: Path, data: bytes) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, target)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+def export_nodes(db_path: Path = DATABASE_PATH, vault_path: Path = OBSIDIAN_VAULT_PATH) -> ExportResult:
+    """Export every featurised node in the store to the vault, linked to its related nodes."""
+    from database.related_graph import RelatedGraph
+    from database.sqlite_manager import SQLiteManager
+    db_manager = SQLiteManager(str(db_path))
+    db_manager.cursor.execute("SELECT id FROM nodes WHERE summary IS NOT NULL")
+    node_ids = [node_id for (node_id,) in db_manager.cursor.fetchall()]
+    nodes = db_manager.get_nodes(node_ids, fields=NODE_FIELDS)
+    paths = {node["primary_id"]: node_path(node) for node in nodes}
+    graph = RelatedGraph(str(db_path))
+    documents = [
+        render_node(node, [paths[n] for n, _ in graph.neighbours(node["primary_id"]) if n in paths])
+        for node in nodes
+    ]
+    return ObsidianExporter(vault_path).export(documents)
+
+@click.command()
+def main():
+    export_nodes()
+
+if __name__ == "__main__":
+    main()
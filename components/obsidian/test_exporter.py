@@ -0,0 +1,57 @@
+from components.notes.objects import Topic
+from components.obsidian.exporter import ObsidianExporter, render_node, render_topic
+
+def make_topics(n, content="Transcript"):
+    return [
+        Topic(topic_name=f"Topic {i}", pages=[f"page_{i}.jpg"], description="...", content=f"{content} {i}")
+        for i in range(n)
+    ]
+
+def test_unchanged_files_are_not_rewritten(tmp_path):
+    """Test that a second export only writes the files whose content changed."""
+    vault = tmp_path / "vault"
+    topics = make_topics(10)
+    first = ObsidianExporter(vault).export(render_topic(topic, "Macro") for topic in topics)
+    mtimes = {path: path.stat().st_mtime_ns for path in vault.rglob("*.md")}
+
+    topics[3].content = "Edited"
+    # A fresh exporter reads the manifest left by the first one
+    second = ObsidianExporter(vault).export(render_topic(topic, "Macro") for topic in topics)
+
+    assert len(first.written) == 10
+    assert second.written == ["Macro/Topic 3.md"] and second.unchanged == 9
+    assert "Edited" in (vault / "Macro" / "Topic 3.md").read_text()
+    changed = [path.name for path in vault.rglob("*.md") if path.stat().st_mtime_ns != mtimes[path]]
+    assert changed == ["Topic 3.md"]
+    assert not list(vault.rglob("*.tmp"))
+
+def test_missing_files_are_restored_and_stale_files_pruned(tmp_path):
+    """Test that deleted files are rewritten and, with prune, files no longer exported are removed."""
+    vault = tmp_path / "vault"
+    (vault / "Macro").mkdir(parents=True)
+    (vault / "Macro" / "Handwritten.md").write_text("Not ours")
+    ObsidianExporter(vault).export(render_topic(topic, "Macro") for topic in make_topics(3))
+    (vault / "Macro" / "Topic 0.md").unlink()
+
+    result = ObsidianExporter(vault).export((render_topic(topic, "Macro") for topic in make_topics(2)), prune=True)
+
+    assert result.written == ["Macro/Topic 0.md"]
+    assert result.removed == ["Macro/Topic 2.md"]
+    assert sorted(path.name for path in (vault / "Macro").iterdir()) == ["Handwritten.md", "Topic 0.md", "Topic 1.md"]
+
+def test_render_node():
+    """Test that a stored node renders to a stable path with frontmatter."""
+    node = {
+        "primary_id": "abcdef0123456789", "path": "/books/On: Liberty.pdf", "filetype": ".pdf",
+        "label": "Book", "author": ["Mill"], "tags": ["liberty"], "themes": [],
+        "summary": "A summary.", "main_argument": "An argument.", "quotes": ["A quote"],
+    }
+    relative_path, markdown = render_node(node)
+
+    assert relative_path == "Library/.pdf/On- Liberty (abcdef01).md"
+    assert markdown.startswith('---\nsource: "/books/On: Liberty.pdf"\n')
+    assert 'author: ["Mill"]' in markdown and "> A quote" in markdown
+    assert "## Related" not in markdown
+
+    _, markdown = render_node(node, related=["Library/.pdf/On Nature (12345678).md"])
+    assert markdown.endswith("## Related\n\n- [[Library/.pdf/On Nature (12345678)]]\n")
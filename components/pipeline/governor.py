@@ -0,0 +1,124 @@
+import asyncio
+from dataclasses import dataclass
+
+from components.local_files_walker.resources import ResourceMonitor, ResourceSample
+from config.config_logger import logger
+from config.settings import GOVERNOR_INTERVAL
+
+class AdjustableLimit:
+    """A semaphore whose limit can be changed while tasks hold or wait for it.
+
+    Lowering the limit never interrupts running tasks: new acquisitions simply wait
+    until enough holders have released.
+    """
+
+    def __init__(self, limit: int):
+        self._limit = limit
+        self.active = 0
+        self._condition = asyncio.Condition()
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    async def set_limit(self, limit: int) -> None:
+        async with self._condition:
+            self._limit = max(1, limit)
+            self._condition.notify_all()
+
+    async def __aenter__(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.active < self._limit)
+            self.active += 1
+
+    async def __aexit__(self, *exc_info) -> None:
+        async with self._condition:
+            self.active -= 1
+            self._condition.notify_all()
+
+class CharBudget:
+    """Caps the total length, in characters, of parsed content held by the pipeline at once.
+
+    An item larger than the whole budget is still admitted when nothing else is in
+    flight, so a single huge document cannot deadlock the pipeline.
+    """
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self, size: int) -> None:
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: self.in_flight == 0 or self.in_flight + size <= self.max_chars
+            )
+            self.in_flight += size
+
+    async def release(self, size: int) -> None:
+        async with self._condition:
+            self.in_flight -= size
+            self._condition.notify_all()
+
+@dataclass
+class StageControl:
+    """What the governor needs to steer one adaptive stage."""
+    name: str
+    limit: AdjustableLimit
+    min_workers: int
+    max_workers: int
+    queue: asyncio.Queue
+
+class AdaptiveGovernor:
+    """AIMD control of stage concurrency from CPU, memory, RSS and load samples.
+
+    Every interval: under memory pressure all adaptive stages halve their worker
+    limit; under CPU pressure (CPU or load over the limit) only local-compute stages
+    do; otherwise a stage with a backlog in front of it gets one more worker, up to
+    its maximum. Stages calling remote APIs are not CPU bound, so CPU pressure
+    leaves them alone.
+    """
+
+    def __init__(
+        self,
+        monitor: ResourceMonitor,
+        interval: float = GOVERNOR_INTERVAL,
+        increase: int = 1,
+        decrease: float = 0.5,
+        cpu_bound: tuple[str, ...] = ("parse",),
+    ):
+        self.monitor = monitor
+        self.interval = interval
+        self.increase = increase
+        self.decrease = decrease
+        self.cpu_bound = cpu_bound
+        self.logger = logger
+
+    def decide(self, control: StageControl, sample: ResourceSample) -> int:
+        """Return the new worker limit for a stage given the latest sample."""
+        current = control.limit.limit
+        if not self.monitor.memory_ok(sample):
+            return max(control.min_workers, int(current * self.decrease))
+        if control.name in self.cpu_bound and not self.monitor.cpu_ok(sample):
+            return max(control.min_workers, int(current * self.decrease))
+        if control.queue.qsize() > 0:
+            return min(control.max_workers, current + self.increase)
+        return current
+
+    async def step(self, controls: list[StageControl]) -> ResourceSample:
+        sample = await asyncio.to_thread(self.monitor.sample)
+        for control in controls:
+            new_limit = self.decide(control, sample)
+            if new_limit != control.limit.limit:
+                self.logger.debug(
+                    f"Governor: {control.name} workers {control.limit.limit} -> {new_limit} "
+                    f"(cpu {sample.cpu_percent:.0f}%, memory {sample.memory_percent:.0f}%, "
+                    f"rss {sample.rss_mb:.0f}MB, load/cpu {sample.load_per_cpu:.2f})"
+                )
+                await control.limit.set_limit(new_limit)
+        return sample
+
+    async def run(self, controls: list[StageControl]) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.step(controls)
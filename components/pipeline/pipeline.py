@@ -0,0 +1,612 @@
+import asyncio
+import functools
+import os
+import time
+import click
+import numpy as np
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Iterable, Optional
+
+from config.config_logger import logger
+from config.metrics import metrics
+from config.settings import (
+    LOCAL_FILES_PATH, PARSED_FILES_PATH, DATABASE_PATH,
+    PIPELINE_QUEUE_SIZE, PIPELINE_WORKERS, PIPELINE_MAX_WORKERS, PIPELINE_REPORT_INTERVAL,
+    PIPELINE_MAX_INFLIGHT_CHARS, EMBEDDING_MODEL, METRICS_PATH, SCHEDULING_POLICY, SLOW_LANE_WORKERS,
+)
+from components.dedup.minhash import NearDuplicateIndex
+from components.featurisation.chunking import Chunk, chunk_text, content_hash
+from components.featurisation.embedding_model import embed_file
+from components.featurisation.llm_agent import file_node_to_llm_node
+from components.local_files_walker.local_files import FileParser
+from components.local_files_walker.scheduling import FileScheduler
+from components.pipeline.governor import AdaptiveGovernor, AdjustableLimit, CharBudget, StageControl
+from database.chunk_store import ChunkStore
+from database.codec import node_to_row
+from database.duplicates import DuplicateStore
+from database.embedding_cache import EmbeddingCache
+from database.job_ledger import JobLedger
+from database.lineage import Change, LineageStore
+from database.parse_failures import ParseFailureLedger
+from database.related_graph import update_related_graph
+from database.review_store import ReviewStore
+from database.node import FileNode, LLMNode, EmbeddingNode
+from database.sqlite_manager import SQLiteManager
+
+@dataclass
+class PipelineItem:
+    """A single document travelling through the ingestion stages."""
+    path: Path
+    file_node: Optional[FileNode] = None
+    llm_node: Optional[LLMNode] = None
+    embedding_node: Optional[EmbeddingNode] = None
+    content_hash: Optional[str] = None
+    change: Optional[Change] = None
+    duplicate_of: Optional[str] = None
+    reserved_chars: int = 0
+    lane: str = "fast"
+    file_stat: Optional[os.stat_result] = None
+
+StageFn = Callable[[PipelineItem], Awaitable[Optional[PipelineItem]]]
+
+@dataclass
+class StageStats:
+    """Live counters for a single stage."""
+    name: str
+    workers: int
+    queue_size: int
+    processed: int = 0
+    failed: int = 0
+    dropped: int = 0
+    busy_seconds: float = 0.0
+    started_at: float = field(default_factory=time.monotonic)
+    queue_depth: int = 0
+
+    @property
+    def throughput(self) -> float:
+        """Items per second of wall time since the stage started."""
+        elapsed = time.monotonic() - self.started_at
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.name}: {self.workers} workers, queue {self.queue_depth}/{self.queue_size}, "
+            f"done {self.processed}, failed {self.failed}, dropped {self.dropped}, "
+            f"{self.throughput:.2f} items/s"
+        )
+
+@dataclass
+class Stage:
+    """A pipeline stage: an async function applied by `workers` concurrent workers.
+
+    The function returns the (updated) item to pass it on, or None to drop it.
+    `queue_size` bounds the number of items waiting in front of the stage, which is
+    what applies backpressure to the stages upstream of it.
+
+    With `max_workers`, the stage is adaptive: a governor moves its worker limit
+    between 1 and `max_workers`, starting at `workers`.
+
+    With `slow_lane_workers` on the first stage, slow-lane items get their own queue
+    and that many dedicated workers, so they never occupy the regular workers.
+    """
+    name: str
+    fn: StageFn
+    workers: int = 1
+    queue_size: int = PIPELINE_QUEUE_SIZE
+    max_workers: Optional[int] = None
+    slow_lane_workers: int = 0
+
+    @property
+    def spawned(self) -> int:
+        return max(self.workers, self.max_workers or 0)
+
+_DONE = object()
+
+class IngestionPipeline:
+    """Walk -> parse -> featurise -> embed -> persist, connected by bounded queues.
+
+    The walk is the source feeding the first stage. Each stage has its own bounded
+    input queue and worker count, so a slow stage (e.g. the LLM) blocks its producers
+    instead of letting parsed content pile up in memory.
+
+    With a `governor`, the worker limits of adaptive stages follow system load. With
+    `max_inflight_chars`, the length in characters of an item's parsed content is
+    counted from the stage that produced it until it leaves the pipeline, and
+    producers wait while the total is over the cap.
+
+    A stage can `requeue` an item to send it through every stage again; the walk keeps
+    feeding requeued items until nothing is left in flight.
+    """
+
+    def __init__(
+        self,
+        source: Callable[[], Iterable[Path | PipelineItem]],
+        stages: list[Stage],
+        report_interval: float = PIPELINE_REPORT_INTERVAL,
+        metrics_path: Optional[Path] = None,
+        governor: Optional[AdaptiveGovernor] = None,
+        max_inflight_chars: Optional[int] = None,
+    ):
+        self.source = source
+        self.stages = stages
+        self.report_interval = report_interval
+        self.metrics_path = metrics_path
+        self.governor = governor
+        self.max_inflight_chars = max_inflight_chars
+        self.char_budget: Optional[CharBudget] = None
+        self.limits: list[AdjustableLimit] = []
+        self.logger = logger
+        self.stats = [StageStats(stage.name, stage.workers, stage.queue_size) for stage in stages]
+        self.walked = 0
+        self._requeued: deque[PipelineItem] = deque()
+        self._in_flight = 0
+        self._settled = asyncio.Event()
+
+    def requeue(self, item: PipelineItem) -> None:
+        """Send an item through the pipeline again, from a stage of the running pipeline."""
+        self._requeued.append(item)
+        self._settled.set()
+
+    def _leave(self) -> None:
+        self._in_flight -= 1
+        self._settled.set()
+
+    async def run(self) -> list[StageStats]:
+        """Run the pipeline to completion and return the final stage statistics."""
+        queues = [asyncio.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        # Unbounded: slow items are only paths until parsed, and a backlog of them must never block the fast feed
+        slow_queue = asyncio.Queue() if self.stages[0].slow_lane_workers else None
+        self.limits = [AdjustableLimit(stage.workers) for stage in self.stages]
+        if self.max_inflight_chars is not None:
+            self.char_budget = CharBudget(self.max_inflight_chars)
+        background = [asyncio.create_task(self._report(queues))]
+        if self.governor is not None:
+            controls = [
+                StageControl(stage.name, limit, 1, stage.max_workers, queue)
+                for stage, limit, queue in zip(self.stages, self.limits, queues)
+                if stage.max_workers is not None
+            ]
+            background.append(asyncio.create_task(self.governor.run(controls)))
+        try:
+            await asyncio.gather(
+                self._walk(queues[0], slow_queue),
+                *(
+                    self._run_stage(
+                        i, queues[i], queues[i + 1] if i + 1 < len(queues) else None, slow_queue if i == 0 else None,
+                    )
+                    for i in range(len(self.stages))
+                ),
+            )
+        finally:
+            for task in background:
+                task.cancel()
+        self._update_depths(queues)
+        for stats in self.stats:
+            self.logger.info(f"Pipeline stage finished - {stats}")
+        self._write_metrics()
+        return self.stats
+
+    async def _walk(self, out_queue: asyncio.Queue, slow_queue: Optional[asyncio.Queue]) -> None:
+        # The directory walk is blocking, so pull each path in a worker thread.
+        # Awaiting `put` on the bounded queue pauses the walk when parsing falls behind.
+        # A scheduling source yields ready-made items, e.g. to assign them a lane.
+        async def feed(item: PipelineItem) -> None:
+            self._in_flight += 1
+            await (slow_queue if slow_queue is not None and item.lane == "slow" else out_queue).put(item)
+
+        paths = iter(self.source())
+        while (path := await asyncio.to_thread(next, paths, None)) is not None:
+            self.walked += 1
+            await feed(path if isinstance(path, PipelineItem) else PipelineItem(path=path))
+        # Stages may requeue items until the last one has left the pipeline
+        while self._requeued or self._in_flight:
+            if self._requeued:
+                await feed(self._requeued.popleft())
+            else:
+                self._settled.clear()
+                await self._settled.wait()
+        for _ in range(self.stages[0].spawned):
+            await out_queue.put(_DONE)
+        for _ in range(self.stages[0].slow_lane_workers if slow_queue is not None else 0):
+            await slow_queue.put(_DONE)
+
+    async def _run_stage(
+        self,
+        index: int,
+        in_queue: asyncio.Queue,
+        out_queue: Optional[asyncio.Queue],
+        slow_queue: Optional[asyncio.Queue] = None,
+    ) -> None:
+        stage = self.stages[index]
+        stats = self.stats[index]
+        stats.started_at = time.monotonic()
+        # Slow-lane workers have their own limit, so they never take a regular worker's slot
+        slow_limit = AdjustableLimit(stage.slow_lane_workers) if slow_queue is not None else None
+        # Adaptive stages spawn their maximum and let the limit decide how many run
+        await asyncio.gather(
+            *(self._worker(stage, stats, self.limits[index], in_queue, out_queue) for _ in range(stage.spawned)),
+            *(
+                self._worker(stage, stats, slow_limit, slow_queue, out_queue)
+                for _ in range(stage.slow_lane_workers if slow_queue is not None else 0)
+            ),
+        )
+        if out_queue is not None:
+            for _ in range(self.stages[index + 1].spawned):
+                await out_queue.put(_DONE)
+
+    async def _worker(
+        self,
+        stage: Stage,
+        stats: StageStats,
+        limit: AdjustableLimit,
+        in_queue: asyncio.Queue,
+        out_queue: Optional[asyncio.Queue],
+    ) -> None:
+        while True:
+            item = await in_queue.get()
+            if item is _DONE:
+                return
+            async with limit:
+                start = time.monotonic()
+                try:
+                    result = await stage.fn(item)
+                except Exception as e:
+                    stats.failed += 1
+                    self.logger.error("Stage %s failed for %s: %s", stage.name, item.path, e)
+                    await self._release_chars(item)
+                    self._leave()
+                    continue
+                finally:
+                    elapsed = time.monotonic() - start
+                    stats.busy_seconds += elapsed
+                    metrics.observe("pipeline_stage", elapsed, stage=stage.name)
+            if result is None:
+                stats.dropped += 1
+                await self._release_chars(item)
+                self._leave()
+                continue
+            stats.processed += 1
+            if out_queue is None:
+                await self._release_chars(result)
+                self._leave()
+                continue
+            await self._reserve_chars(result)
+            await out_queue.put(result)
+
+    async def _reserve_chars(self, item: PipelineItem) -> None:
+        if self.char_budget is not None and not item.reserved_chars and item.file_node is not None:
+            item.reserved_chars = max(1, item.file_node.content_length)
+            await self.char_budget.acquire(item.reserved_chars)
+
+    async def _release_chars(self, item: PipelineItem) -> None:
+        if self.char_budget is not None and item.reserved_chars:
+            await self.char_budget.release(item.reserved_chars)
+            item.reserved_chars = 0
+
+    def _write_metrics(self) -> None:
+        if self.metrics_path is not None:
+            metrics.write(self.metrics_path)
+
+    def _update_depths(self, queues: list[asyncio.Queue]) -> None:
+        for stats, queue, limit in zip(self.stats, queues, self.limits):
+            stats.queue_depth = queue.qsize()
+            stats.workers = limit.limit
+
+    async def _report(self, queues: list[asyncio.Queue]) -> None:
+        while True:
+            await asyncio.sleep(self.report_interval)
+            self._update_depths(queues)
+            in_flight = f"{self.char_budget.in_flight / 1e6:.1f}M chars in flight | " if self.char_budget else ""
+            self.logger.info(
+                f"Pipeline progress - walked {self.walked} | {in_flight}"
+                + " | ".join(str(stats) for stats in self.stats)
+            )
+            self._write_metrics()
+
+def carried_over_nodes(
+    db_manager: SQLiteManager,
+    primary_id: str,
+) -> tuple[Optional[LLMNode], Optional[EmbeddingNode]]:
+    """Load the LLM and embedding data stored for a node, if it has any."""
+    node_id = db_manager.get_node_id(primary_id)
+    if node_id is None:
+        return None, None
+    row = db_manager.get_node(node_id, fields=[*LLMNode.model_fields, *EmbeddingNode.model_fields])
+    llm_node = LLMNode(**{name: row[name] for name in LLMNode.model_fields}) if row["summary"] is not None else None
+    embedding_node = EmbeddingNode(content_embedding=row["content_embedding"]) if row["content_embedding"] else None
+    return llm_node, embedding_node
+
+def retire_node(
+    primary_id: str,
+    db_manager: SQLiteManager,
+    ledger: JobLedger,
+    file_parser,
+    duplicates: Optional[DuplicateStore] = None,
+    chunk_store: Optional[ChunkStore] = None,
+) -> Optional[str]:
+    """Remove a superseded node's row, parse cache entry, checkpoints, signature and chunks.
+
+    If the node represented a near-duplicate cluster, one of its members is promoted in
+    its place and returned, with its checkpoints reset so it gets featurised and embedded.
+    """
+    node_id = db_manager.get_node_id(primary_id)
+    if node_id is not None:
+        db_manager.delete_node(node_id)
+    file_parser.remove_cached_content(primary_id)
+    ledger.reset(primary_id)
+    promoted = None
+    if duplicates is not None:
+        promoted = duplicates.promote(primary_id)
+        duplicates.remove(primary_id)
+        if promoted is not None:
+            ledger.reset(promoted)
+    if chunk_store is not None:
+        chunk_store.remove(primary_id)
+    return promoted
+
+def passage_embeddings(file_node: FileNode, embedding_cache: EmbeddingCache) -> Optional[tuple[list[Chunk], np.ndarray]]:
+    """A node's passages with the chunk embeddings that embedding left in the cache.
+
+    Chunking is deterministic, so re-chunking the content gives the same hashes that
+    were embedded. Returns None if any chunk embedding is missing.
+    """
+    chunks = chunk_text(file_node.load_content())
+    vectors = embedding_cache.get_many(chunk.hash for chunk in chunks)
+    if any(chunk.hash not in vectors for chunk in chunks):
+        logger.warning("Missing chunk embeddings for %s, passages not stored", file_node.path)
+        return None
+    embeddings = np.stack([vectors[chunk.hash] for chunk in chunks]) if chunks else np.empty((0, 0))
+    return chunks, embeddings
+
+def build_stages(
+    file_parser,
+    featurise_fn: Callable[[FileNode], Awaitable[LLMNode]],
+    embed_fn: Callable[[FileNode], Awaitable[EmbeddingNode]],
+    db_manager: SQLiteManager,
+    ledger: JobLedger,
+    lineage: Optional[LineageStore] = None,
+    duplicates: Optional[DuplicateStore] = None,
+    resume: bool = False,
+    slow_lane_workers: int = SLOW_LANE_WORKERS,
+    chunk_store: Optional[ChunkStore] = None,
+    embedding_cache: Optional[EmbeddingCache] = None,
+    requeue: Optional[Callable[[PipelineItem], None]] = None,
+    reviews: Optional[ReviewStore] = None,
+) -> list[Stage]:
+    """Build the parse/featurise/embed/persist stages, checkpointing each in the ledger.
+
+    With `resume`, nodes that are already stored are skipped right after hashing, and
+    featurisation/embedding results recorded by a previous run are reused instead of
+    calling the LLM or embedding API again.
+
+    With `lineage`, a file whose primary_id changed is diffed against the node last
+    stored for its path: if only metadata changed, the old LLM and embedding data are
+    carried over; either way the superseded row, cache entry and checkpoints are
+    removed once the new node is stored. A file still stored under the same
+    primary_id is dropped after parsing, even without `resume`.
+    With `reviews` too, the superseded node's review state moves to the new node, so
+    touching or editing a file keeps its review history.
+
+    With `duplicates`, a MinHash/LSH dedup stage runs before featurisation: only the
+    first node of each near-duplicate cluster is featurised and embedded, the others
+    are stored with their file properties and linked to that representative. When a
+    representative is superseded, a member takes its place and is passed to `requeue`
+    (`IngestionPipeline.requeue`) to be featurised and embedded; without `requeue` it
+    is picked up by the next run.
+
+    Slow-lane items are parsed by `slow_lane_workers` dedicated parse workers, so the
+    regular ones keep draining the fast lane.
+
+    With `chunk_store` and the `embedding_cache` that `embed_fn` fills, each embedded
+    node's passages and their embeddings are stored for passage-level search.
+    """
+    async def parse(item: PipelineItem) -> Optional[PipelineItem]:
+        primary_id = await asyncio.to_thread(file_parser.hash_file, item.path, item.file_stat)
+        completed = ledger.completed_stages(primary_id) if resume else {}
+        if "stored" in completed:
+            return None
+        item.file_node = await asyncio.to_thread(file_parser.file_to_node, item.path, item.file_stat)
+        if item.file_node is None or not item.file_node.load_content().strip():
+            return None
+        if completed.get("featurised"):
+            item.llm_node = LLMNode.model_validate_json(completed["featurised"])
+        if completed.get("embedded"):
+            item.embedding_node = EmbeddingNode.model_validate_json(completed["embedded"])
+        if lineage is not None:
+            item.content_hash = content_hash(item.file_node.load_content())
+            item.change = lineage.diff(item.file_node.path, item.file_node.primary_id, item.content_hash)
+            if item.change.kind == "unchanged" and ledger.is_done(primary_id, "stored"):
+                return None
+            if item.change.kind == "metadata":
+                llm_node, embedding_node = carried_over_nodes(db_manager, item.change.previous_primary_id)
+                item.llm_node = item.llm_node or llm_node
+                item.embedding_node = item.embedding_node or embedding_node
+        ledger.mark_done(item.file_node.primary_id, "parsed")
+        return item
+
+    if duplicates is not None:
+        dedup_index = NearDuplicateIndex()
+        dedup_index.load(*duplicates.load_all())
+
+    async def dedup(item: PipelineItem) -> PipelineItem:
+        primary_id = item.file_node.primary_id
+        representative = dedup_index.representatives.get(primary_id)
+        if representative is None:
+            signature = await asyncio.to_thread(dedup_index.hasher.signature, item.file_node.load_content())
+            match = dedup_index.add_signature(primary_id, signature)
+            duplicates.save(primary_id, signature, match)
+            representative = match[0] if match else primary_id
+        if representative != primary_id:
+            item.duplicate_of = representative
+        return item
+
+    async def featurise(item: PipelineItem) -> PipelineItem:
+        if item.llm_node is None and item.duplicate_of is None:
+            item.llm_node = await featurise_fn(item.file_node)
+            ledger.mark_done(item.file_node.primary_id, "featurised", item.llm_node.model_dump_json())
+        return item
+
+    async def embed(item: PipelineItem) -> PipelineItem:
+        if item.embedding_node is None and item.duplicate_of is None:
+            item.embedding_node = await embed_fn(item.file_node)
+            ledger.mark_done(item.file_node.primary_id, "embedded", item.embedding_node.model_dump_json())
+        return item
+
+    async def persist(item: PipelineItem) -> PipelineItem:
+        passages = None
+        if chunk_store is not None and embedding_cache is not None and item.duplicate_of is None:
+            # Re-chunking a long document and reading its vectors would stall the loop
+            passages = await asyncio.to_thread(passage_embeddings, item.file_node, embedding_cache)
+        # The writes run on the event loop thread, which owns the SQLite connection
+        db_manager.upsert_node(node_to_row(item.file_node, item.llm_node, item.embedding_node))
+        if passages is not None:
+            chunk_store.put(item.file_node.primary_id, *passages)
+        ledger.mark_done(item.file_node.primary_id, "stored")
+        if lineage is not None:
+            lineage.record(item.file_node.path, item.file_node.primary_id, item.content_hash)
+            previous = item.change.previous_primary_id
+            if previous and previous != item.file_node.primary_id and not lineage.is_referenced(previous):
+                if reviews is not None:
+                    reviews.transfer(previous, item.file_node.primary_id)
+                promoted = retire_node(previous, db_manager, ledger, file_parser, duplicates, chunk_store)
+                if duplicates is not None:
+                    dedup_index.remove(previous)
+                if promoted is not None:
+                    dedup_index.relink([promoted, *duplicates.duplicates_of(promoted)], promoted)
+                    node_id = db_manager.get_node_id(promoted)
+                    if requeue is not None and node_id is not None:
+                        requeue(PipelineItem(path=Path(db_manager.get_node(node_id, fields=["path"])["path"])))
+        return item
+
+    return [
+        Stage(
+            "parse", parse,
+            workers=PIPELINE_WORKERS["parse"], max_workers=PIPELINE_MAX_WORKERS["parse"],
+            slow_lane_workers=slow_lane_workers,
+        ),
+        # Single worker so the first node seen becomes the cluster representative
+        *([Stage("dedup", dedup, workers=PIPELINE_WORKERS["dedup"])] if duplicates is not None else []),
+        Stage(
+            "featurise", featurise,
+            workers=PIPELINE_WORKERS["featurise"], max_workers=PIPELINE_MAX_WORKERS["featurise"],
+        ),
+        Stage("embed", embed, workers=PIPELINE_WORKERS["embed"]),
+        Stage("persist", persist, workers=PIPELINE_WORKERS["persist"]),
+    ]
+
+def build_default_pipeline(
+    local_files_path: Path = LOCAL_FILES_PATH,
+    parsed_files_path: Path = PARSED_FILES_PATH,
+    db_path: Path = DATABASE_PATH,
+    resume: bool = False,
+    metrics_path: Optional[Path] = None,
+    policy: str = SCHEDULING_POLICY,
+    retry_failures: bool = False,
+) -> IngestionPipeline:
+    """Wire the file walker, featurisation, embedding and SQLite storage together.
+
+    With `retry_failures` the walk is replaced by the failed parses that are due for
+    a retry, and only the files that now yield text continue through the stages.
+    """
+    scheduler = FileScheduler(policy)
+
+    def scheduled_items() -> Iterable[PipelineItem]:
+        for candidate in scheduler.stream(file_parser.scan_files()):
+            yield PipelineItem(path=candidate.path, lane=candidate.lane, file_stat=candidate.stat)
+
+    def recovered_items() -> Iterable[PipelineItem]:
+        for path in file_parser.retry_failures():
+            yield PipelineItem(path=path)
+
+    file_parser = FileParser(local_files_path, parsed_files_path, failures=ParseFailureLedger(str(db_path)))
+    pipeline: Optional[IngestionPipeline] = None
+    stages = default_stages(file_parser, db_path, resume, requeue=lambda item: pipeline.requeue(item))
+    pipeline = IngestionPipeline(
+        source=recovered_items if retry_failures else scheduled_items,
+        stages=stages,
+        metrics_path=metrics_path,
+        governor=AdaptiveGovernor(file_parser.resource_monitor),
+        max_inflight_chars=PIPELINE_MAX_INFLIGHT_CHARS,
+    )
+    return pipeline
+
+def default_stages(
+    file_parser,
+    db_path: Path = DATABASE_PATH,
+    resume: bool = False,
+    requeue: Optional[Callable[[PipelineItem], None]] = None,
+) -> list[Stage]:
+    """The stages of a real ingest: LLM featurisation, cached chunk embeddings, SQLite storage."""
+    embedding_cache = EmbeddingCache(str(db_path), EMBEDDING_MODEL)
+    return build_stages(
+        file_parser,
+        featurise_fn=file_node_to_llm_node,
+        embed_fn=functools.partial(embed_file, cache=embedding_cache),
+        db_manager=SQLiteManager(str(db_path)),
+        ledger=JobLedger(str(db_path)),
+        lineage=LineageStore(str(db_path)),
+        duplicates=DuplicateStore(str(db_path)),
+        resume=resume,
+        chunk_store=ChunkStore(str(db_path)),
+        embedding_cache=embedding_cache,
+        requeue=requeue,
+        reviews=ReviewStore(str(db_path)),
+    )
+
+class NodeSource:
+    """Stands in for FileParser to ingest nodes that were extracted elsewhere, e.g. synced Notion pages."""
+
+    def __init__(self, nodes: Iterable[FileNode]):
+        self.nodes = {Path(node.path): node for node in nodes}
+
+    def iter_files(self) -> Iterable[Path]:
+        return iter(self.nodes)
+
+    def hash_file(self, path: Path, file_stat: Optional[os.stat_result] = None) -> str:
+        return self.nodes[path].primary_id
+
+    def file_to_node(self, path: Path, file_stat: Optional[os.stat_result] = None) -> FileNode:
+        return self.nodes[path]
+
+    def remove_cached_content(self, file_hash: str) -> None:
+        # Nothing is cached on disk for these nodes
+        pass
+
+def build_node_pipeline(nodes: Iterable[FileNode], db_path: Path = DATABASE_PATH) -> IngestionPipeline:
+    """Featurise, embed and store already-extracted nodes with the same stages as the file walk.
+
+    Members promoted in place of a retired representative are not requeued here, as
+    they may belong to another source; the next ingest picks them up.
+    """
+    source = NodeSource(nodes)
+    return IngestionPipeline(
+        source=source.iter_files,
+        stages=default_stages(source, db_path),
+        max_inflight_chars=PIPELINE_MAX_INFLIGHT_CHARS,
+    )
+
+@click.command()
+@click.option("--resume", is_flag=True, help="Skip stages already recorded in the job ledger.")
+@click.option(
+    "--metrics-out", type=click.Path(path_type=Path), default=METRICS_PATH, show_default=True,
+    help="Where to write timing and byte metrics (.prom for Prometheus text, otherwise JSON).",
+)
+@click.option(
+    "--policy", type=click.Choice(["newest-first", "cheap-first"]), default=SCHEDULING_POLICY, show_default=True,
+    help="Order in which files are parsed.",
+)
+@click.option(
+    "--retry-failures", is_flag=True,
+    help="Only re-parse failed files that are due for a retry, with an escalated strategy.",
+)
+def main(resume: bool, metrics_out: Path, policy: str, retry_failures: bool):
+    pipeline = build_default_pipeline(
+        resume=resume, metrics_path=metrics_out, policy=policy, retry_failures=retry_failures,
+    )
+    asyncio.run(pipeline.run())
+    update_related_graph()
+
+if __name__ == "__main__":
+    main()
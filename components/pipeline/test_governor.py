@@ -0,0 +1,86 @@
+import pytest
+import asyncio
+from datetime import datetime
+from pathlib import Path
+
+from components.local_files_walker.resources import ResourceLimits, ResourceMonitor, ResourceSample
+from components.pipeline.governor import AdaptiveGovernor, AdjustableLimit, StageControl
+from components.pipeline.pipeline import IngestionPipeline, PipelineItem, Stage
+from database.node import FileNode
+
+def make_sample(cpu=10.0, memory=30.0, rss=100.0, load=0.2) -> ResourceSample:
+    return ResourceSample(cpu_percent=cpu, memory_percent=memory, rss_mb=rss, load_per_cpu=load)
+
+def make_control(name: str, workers: int, backlog: int, max_workers: int = 8) -> StageControl:
+    queue = asyncio.Queue()
+    for i in range(backlog):
+        queue.put_nowait(i)
+    return StageControl(name, AdjustableLimit(workers), 1, max_workers, queue)
+
+@pytest.mark.asyncio
+async def test_governor_is_additive_increase_multiplicative_decrease():
+    """Test that backlogged stages grow by one, and pressure halves the right stages."""
+    governor = AdaptiveGovernor(ResourceMonitor(ResourceLimits(max_memory_percent=80, max_rss_mb=1000)))
+    parse, featurise = make_control("parse", 4, backlog=3), make_control("featurise", 4, backlog=3)
+
+    assert governor.decide(parse, make_sample()) == 5
+    assert governor.decide(make_control("parse", 8, backlog=3), make_sample()) == 8
+    assert governor.decide(make_control("parse", 4, backlog=0), make_sample()) == 4
+    # CPU pressure only throttles the local-compute stage
+    assert governor.decide(parse, make_sample(cpu=99)) == 2
+    assert governor.decide(featurise, make_sample(cpu=99)) == 5
+    # Memory pressure (system-wide or our own RSS) throttles everything
+    assert governor.decide(featurise, make_sample(memory=95)) == 2
+    assert governor.decide(featurise, make_sample(rss=2000)) == 2
+    assert governor.decide(make_control("parse", 1, backlog=3), make_sample(rss=2000)) == 1
+
+@pytest.mark.asyncio
+async def test_adjustable_limit_caps_concurrency():
+    """Test that lowering the limit takes effect for new acquisitions."""
+    limit = AdjustableLimit(4)
+    running, peak = 0, []
+
+    async def task():
+        nonlocal running
+        async with limit:
+            running += 1
+            peak.append(running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(task() for _ in range(12)))
+    assert max(peak) == 4
+    await limit.set_limit(2)
+    peak.clear()
+    await asyncio.gather(*(task() for _ in range(12)))
+    assert max(peak) == 2
+
+@pytest.mark.asyncio
+async def test_pipeline_caps_inflight_chars():
+    """Test that parsed content held between the first and last stage stays under the cap."""
+    in_flight_seen = []
+
+    async def parse(item: PipelineItem) -> PipelineItem:
+        now = datetime(2024, 1, 1)
+        item.file_node = FileNode(
+            primary_id=item.path.stem, content="x" * 1000, file_size=1.0, file_creation_time=now,
+            file_modification_time=now, filetype="md", location="Local Files", path=str(item.path),
+        )
+        return item
+
+    async def slow(item: PipelineItem) -> PipelineItem:
+        in_flight_seen.append(pipeline.char_budget.in_flight)
+        await asyncio.sleep(0.005)
+        return item
+
+    pipeline = IngestionPipeline(
+        source=lambda: (Path(f"/tmp/file_{i}.md") for i in range(30)),
+        stages=[Stage("parse", parse, workers=4), Stage("slow", slow, workers=2, queue_size=16)],
+        report_interval=60,
+        max_inflight_chars=3000,
+    )
+    stats = await pipeline.run()
+
+    assert stats[1].processed == 30
+    assert max(in_flight_seen) <= 3000
+    assert pipeline.char_budget.in_flight == 0
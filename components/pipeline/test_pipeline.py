@@ -0,0 +1,429 @@
+import pytest
+import asyncio
+import threading
+from datetime import date, datetime
+from pathlib import Path
+
+from components.featurisation.chunking import chunk_text
+from components.pipeline.pipeline import IngestionPipeline, NodeSource, PipelineItem, Stage, build_stages
+from database.chunk_store import ChunkStore
+from database.duplicates import DuplicateStore
+from database.embedding_cache import EmbeddingCache
+from database.job_ledger import JobLedger
+from database.lineage import LineageStore
+from database.node import FileNode, LLMNode, EmbeddingNode
+from database.review_store import ReviewState, ReviewStore
+from database.sqlite_manager import SQLiteManager
+
+def make_source(n: int):
+    return lambda: (Path(f"/tmp/file_{i}.md") for i in range(n))
+
+@pytest.mark.asyncio
+async def test_pipeline_runs_all_items_through_all_stages():
+    """Test that every item passes through every stage exactly once."""
+    seen = []
+
+    async def tag(item: PipelineItem) -> PipelineItem:
+        return item
+
+    async def collect(item: PipelineItem) -> PipelineItem:
+        seen.append(item.path)
+        return item
+
+    pipeline = IngestionPipeline(
+        source=make_source(20),
+        stages=[Stage("a", tag, workers=3, queue_size=2), Stage("b", collect, workers=2, queue_size=2)],
+        report_interval=60,
+    )
+    stats = await pipeline.run()
+
+    assert sorted(seen) == sorted(make_source(20)())
+    assert [s.processed for s in stats] == [20, 20]
+
+@pytest.mark.asyncio
+async def test_pipeline_drops_and_counts_failures():
+    """Test that failing and dropped items are counted and do not reach later stages."""
+    seen = []
+
+    async def flaky(item: PipelineItem) -> PipelineItem | None:
+        index = int(item.path.stem.split("_")[1])
+        if index % 3 == 0:
+            raise RuntimeError("boom")
+        if index % 3 == 1:
+            return None
+        return item
+
+    async def collect(item: PipelineItem) -> PipelineItem:
+        seen.append(item)
+        return item
+
+    pipeline = IngestionPipeline(
+        source=make_source(9),
+        stages=[Stage("flaky", flaky, workers=2), Stage("collect", collect)],
+        report_interval=60,
+    )
+    stats = await pipeline.run()
+
+    assert len(seen) == 3
+    assert (stats[0].processed, stats[0].failed, stats[0].dropped) == (3, 3, 3)
+
+@pytest.mark.asyncio
+async def test_pipeline_applies_backpressure_to_the_walk():
+    """Test that a blocked stage stops the walk once the bounded queues are full."""
+    release = asyncio.Event()
+
+    async def passthrough(item: PipelineItem) -> PipelineItem:
+        return item
+
+    async def blocked(item: PipelineItem) -> PipelineItem:
+        await release.wait()
+        return item
+
+    pipeline = IngestionPipeline(
+        source=make_source(1000),
+        stages=[Stage("parse", passthrough, queue_size=2), Stage("slow", blocked, queue_size=2)],
+        report_interval=60,
+    )
+    run = asyncio.create_task(pipeline.run())
+    await asyncio.sleep(0.2)
+
+    # 2 queued per stage + 1 in flight per worker + 1 waiting on a full queue
+    assert pipeline.walked <= 2 + 2 + 1 + 1 + 1
+
+    release.set()
+    stats = await run
+    assert stats[1].processed == 1000
+
+@pytest.mark.asyncio
+async def test_slow_lane_items_do_not_hold_regular_workers():
+    """Test that stuck slow-lane items leave the regular workers to the fast lane."""
+    release = asyncio.Event()
+    done = []
+
+    async def parse(item: PipelineItem) -> PipelineItem:
+        if item.lane == "slow":
+            await release.wait()
+        done.append(item.path.name)
+        return item
+
+    items = [PipelineItem(path=Path(f"scan_{i}.pdf"), lane="slow") for i in range(3)]
+    items += [PipelineItem(path=Path(f"note_{i}.md")) for i in range(5)]
+    pipeline = IngestionPipeline(
+        source=lambda: iter(items),
+        stages=[Stage("parse", parse, workers=1, slow_lane_workers=1)],
+        report_interval=60,
+    )
+    run = asyncio.create_task(pipeline.run())
+    await asyncio.sleep(0.2)
+
+    assert done == [f"note_{i}.md" for i in range(5)]
+    release.set()
+    stats = await run
+    assert stats[0].processed == 8
+
+@pytest.mark.asyncio
+async def test_slow_lane_backlog_does_not_block_the_walk():
+    """Test that more stuck slow items than the queue holds still let fast items through."""
+    release = asyncio.Event()
+    done = []
+
+    async def parse(item: PipelineItem) -> PipelineItem:
+        if item.lane == "slow":
+            await release.wait()
+        done.append(item.path.name)
+        return item
+
+    items = [
+        PipelineItem(path=Path(f"scan_{i}.pdf"), lane="slow") if i % 2 else PipelineItem(path=Path(f"note_{i}.md"))
+        for i in range(20)
+    ]
+    pipeline = IngestionPipeline(
+        source=lambda: iter(items),
+        stages=[Stage("parse", parse, workers=1, queue_size=2, slow_lane_workers=1)],
+        report_interval=60,
+    )
+    run = asyncio.create_task(pipeline.run())
+    await asyncio.sleep(0.2)
+
+    assert done == [f"note_{i}.md" for i in range(0, 20, 2)]
+    release.set()
+    stats = await run
+    assert stats[0].processed == 20
+
+class FakeParser:
+    """Stands in for FileParser: hashes by name and produces in-memory FileNodes."""
+
+    def __init__(self, paths, versions=None):
+        self.paths = paths
+        # path stem -> (primary_id, content), defaults to the stem and a fixed text
+        self.versions = versions or {}
+        self.removed_cache_entries = []
+
+    def iter_files(self):
+        return iter(self.paths)
+
+    def hash_file(self, path: Path, file_stat=None) -> str:
+        return self.versions.get(path.stem, (path.stem,))[0]
+
+    def file_to_node(self, path: Path, file_stat=None) -> FileNode:
+        now = datetime(2024, 1, 1)
+        primary_id, content = self.versions.get(path.stem, (path.stem, f"text of {path.stem}"))
+        return FileNode(
+            primary_id=primary_id, content=content, file_size=1.0,
+            file_creation_time=now, file_modification_time=now, filetype="md",
+            location="Local Files", path=str(path),
+        )
+
+    def remove_cached_content(self, file_hash: str):
+        self.removed_cache_entries.append(file_hash)
+
+def make_llm_node(node: FileNode) -> LLMNode:
+    return LLMNode(
+        label="note", author=[], research_question="", main_argument="", summary=node.content,
+        tags=[], themes=[], keywords=[], quotes=[], content_creation_date=datetime(2024, 1, 1),
+        entities_persons=[], entities_places=[], entities_organizations=[], entities_references=[],
+    )
+
+@pytest.mark.asyncio
+async def test_resume_skips_completed_stages(tmp_path):
+    """Test that a resumed run reuses checkpointed results and skips stored nodes."""
+    db_path = str(tmp_path / "nodes.db")
+    paths = [Path(f"/tmp/note_{i}.md") for i in range(6)]
+    calls = {"featurise": 0, "embed": 0}
+
+    async def featurise(node: FileNode) -> LLMNode:
+        calls["featurise"] += 1
+        return make_llm_node(node)
+
+    async def failing_embed(node: FileNode) -> EmbeddingNode:
+        raise RuntimeError("quota exceeded")
+
+    async def embed(node: FileNode) -> EmbeddingNode:
+        calls["embed"] += 1
+        return EmbeddingNode(content_embedding=[1.0, 0.0])
+
+    async def run(embed_fn, resume: bool):
+        parser = FakeParser(paths)
+        stages = build_stages(
+            parser, featurise, embed_fn, SQLiteManager(db_path), JobLedger(db_path), resume=resume
+        )
+        return await IngestionPipeline(parser.iter_files, stages, report_interval=60).run()
+
+    # First run dies at the embedding stage: everything is featurised, nothing stored
+    await run(failing_embed, resume=False)
+    assert calls["featurise"] == 6
+    assert JobLedger(db_path).stage_counts() == {"parsed": 6, "featurised": 6, "embedded": 0, "stored": 0}
+
+    await run(embed, resume=True)
+    assert calls == {"featurise": 6, "embed": 6}
+    assert JobLedger(db_path).stage_counts()["stored"] == 6
+
+    # Nothing left to do: all nodes are dropped right after hashing
+    stats = await run(embed, resume=True)
+    assert stats[0].dropped == 6
+    assert calls == {"featurise": 6, "embed": 6}
+    assert SQLiteManager(db_path).get_node_id("note_3") is not None
+
+@pytest.mark.asyncio
+async def test_lineage_carries_over_metadata_only_changes(tmp_path):
+    """Test that a touched file keeps its LLM data and review state and a content edit is re-featurised."""
+    db_path = str(tmp_path / "nodes.db")
+    paths = [Path("/tmp/touched.md"), Path("/tmp/edited.md")]
+    featurised = []
+
+    async def featurise(node: FileNode) -> LLMNode:
+        featurised.append(node.primary_id)
+        return make_llm_node(node)
+
+    async def embed(node: FileNode) -> EmbeddingNode:
+        return EmbeddingNode(content_embedding=[1.0, 0.0])
+
+    reviews = ReviewStore(db_path)
+
+    async def run(versions):
+        parser = FakeParser(paths, versions)
+        stages = build_stages(
+            parser, featurise, embed, SQLiteManager(db_path), JobLedger(db_path),
+            lineage=LineageStore(db_path), resume=True, reviews=reviews,
+        )
+        await IngestionPipeline(parser.iter_files, stages, report_interval=60).run()
+        return parser
+
+    await run({"touched": ("t1", "same text"), "edited": ("e1", "old text")})
+    reviewed = ReviewState(primary_id="t1", due_date=date(2024, 3, 1), interval_days=6, repetitions=2)
+    reviews.put(reviewed)
+    parser = await run({"touched": ("t2", "same text"), "edited": ("e2", "new text")})
+
+    assert sorted(featurised) == ["e1", "e2", "t1"]
+    assert sorted(parser.removed_cache_entries) == ["e1", "t1"]
+    db_manager = SQLiteManager(db_path)
+    assert db_manager.get_node_id("t1") is None
+    assert db_manager.get_node(db_manager.get_node_id("t2"), fields=["summary"])["summary"] == "same text"
+    assert not JobLedger(db_path).completed_stages("e1")
+    # The touched file keeps its review history under its new primary_id
+    assert reviews.get("t1") is None
+    assert reviews.get("t2") == ReviewState(primary_id="t2", due_date=date(2024, 3, 1), interval_days=6, repetitions=2)
+
+@pytest.mark.asyncio
+async def test_unchanged_files_are_not_featurised_again(tmp_path):
+    """Test that a second run over an unchanged tree, without resume, calls neither the LLM nor the embedder."""
+    db_path = str(tmp_path / "nodes.db")
+    paths = [Path(f"/tmp/note_{i}.md") for i in range(4)]
+    calls = {"featurise": 0, "embed": 0}
+
+    async def featurise(node: FileNode) -> LLMNode:
+        calls["featurise"] += 1
+        return make_llm_node(node)
+
+    async def embed(node: FileNode) -> EmbeddingNode:
+        calls["embed"] += 1
+        return EmbeddingNode(content_embedding=[1.0, 0.0])
+
+    async def run():
+        parser = FakeParser(paths)
+        stages = build_stages(
+            parser, featurise, embed, SQLiteManager(db_path), JobLedger(db_path), lineage=LineageStore(db_path),
+        )
+        return await IngestionPipeline(parser.iter_files, stages, report_interval=60).run()
+
+    await run()
+    assert calls == {"featurise": 4, "embed": 4}
+    stats = await run()
+    assert calls == {"featurise": 4, "embed": 4}
+    assert stats[0].dropped == 4
+
+@pytest.mark.asyncio
+async def test_near_duplicates_are_linked_not_featurised(tmp_path):
+    """Test that only one node per near-duplicate cluster is featurised and embedded."""
+    db_path = str(tmp_path / "nodes.db")
+    text = " ".join(f"word{i % 997}" for i in range(3000))
+    paths = [Path("/tmp/paper.md"), Path("/tmp/paper (1).md"), Path("/tmp/other.md")]
+    versions = {
+        "paper": ("p0", text),
+        "paper (1)": ("p1", text + " exported"),
+        "other": ("o0", " ".join(f"term{i}" for i in range(3000))),
+    }
+    featurised = []
+
+    async def featurise(node: FileNode) -> LLMNode:
+        featurised.append(node.primary_id)
+        return make_llm_node(node)
+
+    async def embed(node: FileNode) -> EmbeddingNode:
+        return EmbeddingNode(content_embedding=[1.0, 0.0])
+
+    parser = FakeParser(paths, versions)
+    stages = build_stages(
+        parser, featurise, embed, SQLiteManager(db_path), JobLedger(db_path),
+        duplicates=DuplicateStore(db_path),
+    )
+    await IngestionPipeline(parser.iter_files, stages, report_interval=60).run()
+
+    assert sorted(featurised) == ["o0", "p0"]
+    assert DuplicateStore(db_path).representative_of("p1") == "p0"
+    assert SQLiteManager(db_path).get_node_id("p1") is not None
+
+@pytest.mark.asyncio
+async def test_retired_representative_promotes_and_requeues_a_member(tmp_path):
+    """Test that editing a cluster's representative away gets one of its members featurised."""
+    db_path = str(tmp_path / "nodes.db")
+    text = " ".join(f"word{i % 997}" for i in range(3000))
+    paths = [Path("/tmp/paper.md"), Path("/tmp/paper (1).md"), Path("/tmp/paper (2).md")]
+    versions = {"paper": ("p0", text), "paper (1)": ("p1", text + " exported"), "paper (2)": ("p2", text + " copy")}
+    featurised = []
+
+    async def featurise(node: FileNode) -> LLMNode:
+        featurised.append(node.primary_id)
+        return make_llm_node(node)
+
+    async def embed(node: FileNode) -> EmbeddingNode:
+        return EmbeddingNode(content_embedding=[1.0, 0.0])
+
+    async def run(parser):
+        db_manager = SQLiteManager(db_path)
+        pipeline = None
+        stages = build_stages(
+            parser, featurise, embed, db_manager, JobLedger(db_path),
+            lineage=LineageStore(db_path), duplicates=DuplicateStore(db_path),
+            requeue=lambda item: pipeline.requeue(item),
+        )
+        pipeline = IngestionPipeline(parser.iter_files, stages, report_interval=60)
+        await pipeline.run()
+        return db_manager
+
+    await run(FakeParser(paths, versions))
+    # Only the representative's file is edited, into something unrelated
+    versions["paper"] = ("p0-edited", " ".join(f"term{i}" for i in range(3000)))
+    featurised.clear()
+    db_manager = await run(FakeParser(paths[:1], versions))
+
+    duplicates = DuplicateStore(db_path)
+    promoted = "p1" if duplicates.representative_of("p1") is None else "p2"
+    assert sorted(featurised) == sorted(["p0-edited", promoted])
+    assert duplicates.duplicates_of("p0") == []
+    assert duplicates.duplicates_of(promoted) == [{"p1": "p2", "p2": "p1"}[promoted]]
+    assert db_manager.get_node_id("p0") is None
+    row = db_manager.get_node(db_manager.get_node_id(promoted), fields=["summary"])
+    assert row["summary"] is not None
+
+@pytest.mark.asyncio
+async def test_passages_are_stored_from_cached_chunk_embeddings(tmp_path, monkeypatch):
+    """Test that persisted nodes get their chunks, chunked off the event loop, and superseded nodes lose them."""
+    chunking_threads = set()
+    def recording_chunk_text(text):
+        chunking_threads.add(threading.get_ident())
+        return chunk_text(text)
+    monkeypatch.setattr("components.pipeline.pipeline.chunk_text", recording_chunk_text)
+    db_path = str(tmp_path / "nodes.db")
+    cache = EmbeddingCache(db_path, "fake")
+    chunk_store = ChunkStore(db_path)
+
+    async def featurise(node: FileNode) -> LLMNode:
+        return make_llm_node(node)
+
+    async def embed(node: FileNode) -> EmbeddingNode:
+        chunks = chunk_text(node.content)
+        cache.put_many({chunk.hash: [1.0, float(chunk.ordinal)] for chunk in chunks})
+        return EmbeddingNode(content_embedding=[1.0, 0.0])
+
+    async def run(versions):
+        parser = FakeParser([Path("/tmp/notes.md")], versions)
+        stages = build_stages(
+            parser, featurise, embed, SQLiteManager(db_path), JobLedger(db_path),
+            lineage=LineageStore(db_path), chunk_store=chunk_store, embedding_cache=cache,
+        )
+        await IngestionPipeline(parser.iter_files, stages, report_interval=60).run()
+
+    await run({"notes": ("n1", "first passage\n\nsecond passage")})
+    assert chunk_store.has_chunks("n1")
+    assert chunking_threads and threading.get_ident() not in chunking_threads
+    await run({"notes": ("n2", "an edited passage")})
+    assert not chunk_store.has_chunks("n1")
+    passage = chunk_store.search_passages([1.0, 0.0], top_k=1)[0]
+    assert (passage.primary_id, passage.start, passage.end) == ("n2", 0, len("an edited passage"))
+
+@pytest.mark.asyncio
+async def test_node_source_ingests_prebuilt_nodes(tmp_path):
+    """Test that nodes extracted elsewhere go through the stages and keep their original path."""
+    db_path = str(tmp_path / "nodes.db")
+    now = datetime(2024, 1, 1)
+    node = FileNode(
+        primary_id="page-rev-1", content="a synced page", file_size=1.0,
+        file_creation_time=now, file_modification_time=now, filetype="notion",
+        location="Notion", path="https://notion.so/page-1",
+    )
+
+    async def featurise(node: FileNode) -> LLMNode:
+        return make_llm_node(node)
+
+    async def embed(node: FileNode) -> EmbeddingNode:
+        return EmbeddingNode(content_embedding=[1.0, 0.0])
+
+    source = NodeSource([node])
+    db_manager = SQLiteManager(db_path)
+    stages = build_stages(source, featurise, embed, db_manager, JobLedger(db_path), lineage=LineageStore(db_path))
+    stats = await IngestionPipeline(source.iter_files, stages, report_interval=60).run()
+
+    assert stats[-1].processed == 1
+    row = db_manager.get_node(db_manager.get_node_id("page-rev-1"), fields=["path", "summary"])
+    assert (row["path"], row["summary"]) == ("https://notion.so/page-1", "a synced page")
@@ -0,0 +1,374 @@
+"""
+Long-running local query service that keeps the embeddings resident.
+
+Consumers (the digest emailer, Obsidian tooling, ad-hoc scripts) send JSON over HTTP,
+on a TCP port or a Unix socket, instead of each loading every embedding themselves:
+
+  GET  /health                   generation, sizes, batching and latency stats
+  POST /search    {"vector": [...] | "text": "...", "k": 10, "filetype": "pdf"}
+  POST /passages  {"vector": [...] | "text": "...", "k": 10}
+  GET  /related?primary_id=...   stored neighbours from the related-nodes graph
+
+Concurrent searches are coalesced into one matrix product per batch. The resident
+index is reloaded in the background once the store's write generation has moved and
+settled, so an ingest run does not trigger a full reload on every check.
+"""
+import asyncio
+import json
+import sqlite3
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import click
+import numpy as np
+
+from config.config_logger import logger
+from config.metrics import metrics
+from config.settings import (
+    DATABASE_PATH, EMBEDDING_MODEL, QUERY_SERVER_HOST, QUERY_SERVER_PORT,
+    QUERY_BATCH_MAX, QUERY_BATCH_WAIT, QUERY_RELOAD_INTERVAL, QUERY_RELOAD_SETTLE, QUERY_RELOAD_MAX_DELAY,
+)
+from database.chunk_store import ChunkIndex, ChunkStore, top_indices
+from database.embedding_cache import EmbeddingCache
+from database.generation import create_meta_table, read_generation
+from database.related_graph import RelatedGraph
+from database.sqlite_manager import SQLiteManager
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+def _normalise(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), np.finfo(np.float32).eps)
+
+@dataclass
+class ResidentIndex:
+    """Everything a search needs, loaded from the store at one write generation."""
+    generation: int
+    primary_ids: list[str]
+    paths: list[str]
+    filetypes: np.ndarray
+    matrix: np.ndarray # row-normalised node embeddings
+    chunks: ChunkIndex
+    loaded_at: float
+
+    @property
+    def dim(self) -> Optional[int]:
+        if len(self.primary_ids):
+            return self.matrix.shape[1]
+        if len(self.chunks.primary_ids):
+            return self.chunks.matrix.shape[1]
+        return None
+
+def load_resident(db_path: str) -> ResidentIndex:
+    """Load node embeddings and the chunk index. Runs in a worker thread, so it opens its own connections."""
+    db_manager = SQLiteManager(db_path)
+    # Read first: a write landing during the load only causes one extra reload
+    generation = db_manager.write_generation
+    db_manager.cursor.execute(
+        "SELECT primary_id, path, filetype, content_embedding FROM nodes WHERE content_embedding IS NOT NULL ORDER BY id"
+    )
+    rows = db_manager.cursor.fetchall()
+    db_manager.close()
+    chunk_store = ChunkStore(db_path)
+    chunks = chunk_store.load_index()
+    chunk_store.close()
+    matrix = (
+        np.frombuffer(b"".join(row[3] for row in rows), dtype=np.float32).reshape(len(rows), -1)
+        if rows else np.empty((0, 0), dtype=np.float32)
+    )
+    return ResidentIndex(
+        generation=generation,
+        primary_ids=[row[0] for row in rows],
+        paths=[row[1] for row in rows],
+        filetypes=np.array([row[2] for row in rows], dtype=object),
+        matrix=_normalise(matrix),
+        chunks=chunks,
+        loaded_at=time.time(),
+    )
+
+@dataclass
+class Query:
+    vector: np.ndarray
+    k: int
+    filetype: Optional[str] = None
+
+def search_nodes(index: ResidentIndex, queries: list[Query]) -> list[list[dict]]:
+    """Score a batch of queries against every node with one matrix product (cosine similarity)."""
+    if not index.primary_ids:
+        return [[] for _ in queries]
+    scores = _normalise(np.stack([query.vector for query in queries])) @ index.matrix.T
+    results = []
+    for query, row in zip(queries, scores):
+        if query.filetype is not None:
+            row = np.where(index.filetypes == query.filetype, row, -np.inf)
+        results.append([
+            {"primary_id": index.primary_ids[i], "path": index.paths[i], "score": float(row[i])}
+            for i in top_indices(row, query.k) if np.isfinite(row[i])
+        ])
+    return results
+
+def search_passages(index: ResidentIndex, queries: list[Query]) -> list[list[dict]]:
+    """Score a batch of queries against every passage with one matrix product."""
+    if not index.chunks.primary_ids:
+        return [[] for _ in queries]
+    scores = _normalise(np.stack([query.vector for query in queries])) @ index.chunks.matrix.T
+    return [
+        [asdict(index.chunks.passage(i, row[i])) for i in top_indices(row, query.k)]
+        for query, row in zip(queries, scores)
+    ]
+
+class MicroBatcher:
+    """Coalesces requests submitted at about the same time into one call of `batch_fn`.
+
+    The first request of a batch waits `max_wait` seconds for others to join, up to
+    `max_batch`. The batch runs in a worker thread, so the event loop keeps accepting
+    requests (forming the next batch) meanwhile.
+    """
+
+    def __init__(self, batch_fn: Callable[[list], list], max_batch: int = QUERY_BATCH_MAX, max_wait: float = QUERY_BATCH_WAIT):
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.batches = 0
+        self.requests = 0
+
+    async def submit(self, request: Any) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((request, future))
+        return await future
+
+    async def run(self) -> None:
+        while True:
+            items = [await self.queue.get()]
+            if self.max_wait:
+                await asyncio.sleep(self.max_wait)
+            while len(items) < self.max_batch and not self.queue.empty():
+                items.append(self.queue.get_nowait())
+            try:
+                results = await asyncio.to_thread(self.batch_fn, [request for request, _ in items])
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.requests += len(items)
+            for (_, future), result in zip(items, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "mean_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0,
+        }
+
+class QueryServer:
+    """Serves searches from a resident index over a minimal JSON-over-HTTP/1.1 protocol."""
+
+    def __init__(
+        self,
+        db_path: Path = DATABASE_PATH,
+        max_batch: int = QUERY_BATCH_MAX,
+        max_wait: float = QUERY_BATCH_WAIT,
+        reload_interval: float = QUERY_RELOAD_INTERVAL,
+        reload_settle: float = QUERY_RELOAD_SETTLE,
+        reload_max_delay: float = QUERY_RELOAD_MAX_DELAY,
+    ):
+        self.db_path = str(db_path)
+        self.reload_interval = reload_interval
+        self.reload_settle = reload_settle
+        self.reload_max_delay = reload_max_delay
+        self.index: Optional[ResidentIndex] = None
+        self.reloads = 0
+        self.started_at = time.time()
+        self.logger = logger
+        self.batchers = {
+            "search": MicroBatcher(lambda queries: search_nodes(self.index, queries), max_batch, max_wait),
+            "passages": MicroBatcher(lambda queries: search_passages(self.index, queries), max_batch, max_wait),
+        }
+        self.routes: dict[tuple[str, str], Callable[[dict, bytes], Awaitable[Any]]] = {
+            ("GET", "/health"): self.health,
+            ("POST", "/search"): lambda params, body: self.search("search", body),
+            ("POST", "/passages"): lambda params, body: self.search("passages", body),
+            ("GET", "/related"): self.related,
+        }
+        self._tasks: list[asyncio.Task] = []
+        self._server: Optional[asyncio.Server] = None
+
+    async def start(
+        self,
+        host: str = QUERY_SERVER_HOST,
+        port: int = QUERY_SERVER_PORT,
+        socket_path: Optional[Path] = None,
+    ) -> asyncio.Server:
+        """Load the index and start listening, on `socket_path` if given, else on host:port."""
+        # Connections used on the event loop thread
+        self.conn = sqlite3.connect(self.db_path)
+        create_meta_table(self.conn)
+        self.related_graph = RelatedGraph(self.db_path)
+        self.embedding_cache = EmbeddingCache(self.db_path, EMBEDDING_MODEL)
+        await self.reload()
+        self._tasks = [asyncio.create_task(batcher.run()) for batcher in self.batchers.values()]
+        self._tasks.append(asyncio.create_task(self._watch_generation()))
+        if socket_path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path=str(socket_path))
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port)
+        self.logger.info(f"Query server listening on {socket_path or f'{host}:{port}'}")
+        return self._server
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self.conn.close()
+        self.related_graph.close()
+        self.embedding_cache.close()
+
+    async def reload(self) -> None:
+        self.index = await asyncio.to_thread(load_resident, self.db_path)
+        self.reloads += 1
+        self.logger.info(
+            f"Query server loaded generation {self.index.generation}: "
+            f"{len(self.index.primary_ids)} nodes, {len(self.index.chunks.ordinals)} passages"
+        )
+
+    async def _watch_generation(self) -> None:
+        """Reload once the generation has stopped moving for `reload_settle` seconds.
+
+        An ingest bumps the generation with every write, so while writes keep coming
+        the index is only reloaded every `reload_max_delay` seconds.
+        """
+        seen, seen_since, pending_since = None, 0.0, None
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                generation = read_generation(self.conn)
+                if generation == self.index.generation:
+                    pending_since = None
+                    continue
+                now = time.monotonic()
+                if generation != seen:
+                    seen, seen_since = generation, now
+                if pending_since is None:
+                    pending_since = now
+                if now - seen_since >= self.reload_settle or now - pending_since >= self.reload_max_delay:
+                    await self.reload()
+                    pending_since = None
+            except Exception as e:
+                # Keep serving the previous index
+                self.logger.error(f"Query server reload failed: {e}")
+
+    async def _query(self, body: bytes) -> Query:
+        request = json.loads(body or b"{}")
+        if "vector" in request:
+            vector = np.asarray(request["vector"], dtype=np.float32)
+        elif "text" in request:
+            from components.featurisation.embedding_model import embed_query
+            vector = await embed_query(request["text"], self.embedding_cache)
+        else:
+            raise ValueError("A query needs a 'vector' or a 'text'")
+        if vector.ndim != 1 or (self.index.dim is not None and len(vector) != self.index.dim):
+            raise ValueError(f"Query vectors must have {self.index.dim} dimensions")
+        k = int(request.get("k", 10))
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        return Query(vector=vector, k=k, filetype=request.get("filetype"))
+
+    async def search(self, kind: str, body: bytes) -> dict:
+        query = await self._query(body)
+        results = await self.batchers[kind].submit(query)
+        return {"generation": self.index.generation, "results": results}
+
+    async def related(self, params: dict, body: bytes) -> dict:
+        if "primary_id" not in params:
+            raise ValueError("Missing primary_id")
+        neighbours = self.related_graph.neighbours(params["primary_id"][0])
+        return {"results": [{"primary_id": primary_id, "score": score} for primary_id, score in neighbours]}
+
+    async def health(self, params: dict, body: bytes) -> dict:
+        latencies = {
+            entry["labels"]["endpoint"]: {
+                "count": entry["count"],
+                **{q: round(entry[q] * 1000, 3) for q in ("p50", "p95", "p99")},
+            }
+            for entry in metrics.snapshot()["timings"].get("query_server_request", [])
+        }
+        return {
+            "status": "ok",
+            "generation": self.index.generation,
+            "nodes": len(self.index.primary_ids),
+            "passages": len(self.index.chunks.ordinals),
+            "loaded_at": self.index.loaded_at,
+            "reloads": self.reloads,
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "batching": {kind: batcher.stats() for kind, batcher in self.batchers.items()},
+            "latency_ms": latencies,
+        }
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> tuple[int, Any]:
+        url = urlsplit(target)
+        handler = self.routes.get((method, url.path))
+        if handler is None:
+            known = any(path == url.path for _, path in self.routes)
+            return (405, {"error": f"{method} not allowed"}) if known else (404, {"error": f"No route {url.path}"})
+        start = time.perf_counter()
+        try:
+            return 200, await handler(parse_qs(url.query), body)
+        except (ValueError, KeyError, TypeError) as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            self.logger.error(f"Query server error on {url.path}: {e}")
+            return 500, {"error": str(e)}
+        finally:
+            metrics.observe("query_server_request", time.perf_counter() - start, endpoint=url.path)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            # Keep-alive: serve requests until the client closes or asks to
+            while request_line := await reader.readline():
+                method, target, _ = request_line.decode("latin-1").split()
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                status, payload = await self.dispatch(method, target, body)
+                data = json.dumps(payload).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            # Disconnected mid-request or sent a malformed request line
+            pass
+        finally:
+            writer.close()
+
+async def serve(host: str, port: int, socket_path: Optional[Path]) -> None:
+    server = QueryServer()
+    listener = await server.start(host, port, socket_path)
+    try:
+        await listener.serve_forever()
+    finally:
+        await server.close()
+
+@click.command()
+@click.option("--host", default=QUERY_SERVER_HOST, show_default=True)
+@click.option("--port", default=QUERY_SERVER_PORT, show_default=True)
+@click.option("--socket", "socket_path", type=click.Path(path_type=Path), help="Listen on a Unix socket instead.")
+def main(host: str, port: int, socket_path: Optional[Path]):
+    asyncio.run(serve(host, port, socket_path))
+
+if __name__ == "__main__":
+    main()
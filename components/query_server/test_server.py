@@ -0,0 +1,109 @@
+import asyncio
+import pytest
+from datetime import datetime
+
+import httpx
+import numpy as np
+
+from components.featurisation.chunking import chunk_text
+from components.query_server.server import QueryServer
+from database.chunk_store import ChunkStore
+from database.codec import node_to_row
+from database.generation import bump_generation
+from database.node import EmbeddingNode, FileNode
+from database.related_graph import update_related_graph
+from database.sqlite_manager import SQLiteManager
+
+def make_row(primary_id: str, embedding: list[float], filetype: str = "md") -> dict:
+    now = datetime(2024, 1, 1)
+    file_node = FileNode(
+        primary_id=primary_id, content=f"text of {primary_id}", file_size=1.0,
+        file_creation_time=now, file_modification_time=now, filetype=filetype,
+        location="Local Files", path=f"/tmp/{primary_id}.{filetype}",
+    )
+    return node_to_row(file_node, EmbeddingNode(content_embedding=embedding))
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "nodes.db")
+    db_manager = SQLiteManager(path)
+    db_manager.insert_node(make_row("east", [1.0, 0.0]))
+    db_manager.insert_node(make_row("north", [0.0, 1.0], filetype="pdf"))
+    db_manager.insert_node(make_row("northeast", [1.0, 1.0], filetype="pdf"))
+    db_manager.close()
+    chunks = chunk_text("first\n\nsecond", max_chars=6)
+    ChunkStore(path).put("north", chunks, np.array([[0.0, 1.0], [1.0, 0.0]]))
+    update_related_graph(path)
+    return path
+
+@pytest.mark.asyncio
+async def test_server_batches_searches_and_reloads_on_writes(db_path):
+    """Test concurrent searches, passages, related nodes, health and hot reload."""
+    server = QueryServer(db_path, max_wait=0.02, reload_interval=0.05, reload_settle=0.1)
+    listener = await server.start("127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+            responses = await asyncio.gather(*(
+                client.post("/search", json={"vector": [1.0, 0.1 * i], "k": 2}) for i in range(8)
+            ))
+            assert [r["primary_id"] for r in responses[0].json()["results"]] == ["east", "northeast"]
+            assert server.batchers["search"].batches < 8
+
+            filtered = await client.post("/search", json={"vector": [1.0, 0.0], "k": 5, "filetype": "pdf"})
+            assert [r["primary_id"] for r in filtered.json()["results"]] == ["northeast", "north"]
+            passages = (await client.post("/passages", json={"vector": [1.0, 0.0], "k": 1})).json()["results"]
+            assert passages == [{"primary_id": "north", "ordinal": 1, "start": 7, "end": 13, "score": 1.0}]
+            related = (await client.get("/related", params={"primary_id": "east"})).json()["results"]
+            assert related[0]["primary_id"] == "northeast"
+
+            assert (await client.post("/search", json={"vector": [1.0, 0.0, 0.0]})).status_code == 400
+            assert (await client.get("/nowhere")).status_code == 404
+            health = (await client.get("/health")).json()
+            assert health["nodes"] == 3 and health["passages"] == 2
+            assert health["latency_ms"]["/search"]["count"] >= 9
+
+            db_manager = SQLiteManager(db_path)
+            db_manager.insert_node(make_row("west", [-1.0, 0.0]))
+            db_manager.close()
+            for _ in range(100):
+                if (await client.get("/health")).json()["generation"] != health["generation"]:
+                    break
+                await asyncio.sleep(0.02)
+            west = await client.post("/search", json={"vector": [-1.0, 0.0], "k": 1})
+            assert west.json()["results"][0]["primary_id"] == "west"
+    finally:
+        await server.close()
+
+@pytest.mark.asyncio
+async def test_reloads_wait_for_writes_to_settle(db_path):
+    """Test that a stream of writes causes one reload after it stops, or one per max delay."""
+    server = QueryServer(db_path, reload_interval=0.01, reload_settle=0.1, reload_max_delay=0.3)
+    await server.start("127.0.0.1", 0)
+    db_manager = SQLiteManager(db_path)
+    try:
+        for _ in range(20):
+            with db_manager.conn:
+                bump_generation(db_manager.conn)
+            await asyncio.sleep(0.02)
+        # 0.4s of writes: only the max delay forced a reload, none settled
+        assert server.reloads == 2
+        await asyncio.sleep(0.3)
+        assert server.reloads == 3
+        assert server.index.generation == db_manager.write_generation
+    finally:
+        db_manager.close()
+        await server.close()
+
+@pytest.mark.asyncio
+async def test_server_listens_on_a_unix_socket(db_path, tmp_path):
+    """Test that the same API is served over a Unix socket."""
+    server = QueryServer(db_path)
+    await server.start(socket_path=tmp_path / "query.sock")
+    try:
+        transport = httpx.AsyncHTTPTransport(uds=str(tmp_path / "query.sock"))
+        async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+            response = await client.post("/search", json={"vector": [0.0, 1.0], "k": 1})
+            assert response.json()["results"][0]["primary_id"] == "north"
+    finally:
+        await server.close()
@@ -1,9 +1,29 @@
 # Global logger instance
 # Usage: logger = setup_logging()
+#
+# Records are put on an in-process queue by the calling thread and formatted and
+# written by a QueueListener thread, so the hot path only pays for building the
+# record. Log with %-style arguments (logger.debug("Parsed %s", path)) so disabled
+# levels never format anything.
+import atexit
+import json
 import os
 import logging
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Optional
 from colorama import Fore, Style, init
 
+from config.settings import (
+    LOG_JSON_PATH, LOG_JSON_MAX_BYTES, LOG_JSON_BACKUPS,
+    LOG_RATE_LIMIT, LOG_RATE_WINDOW, LOG_SAMPLE_EVERY,
+)
+
 init(autoreset=True)
 
 ENV = os.getenv('APP_ENV', 'production')
@@ -13,16 +33,25 @@ LOG_CONFIG = {
         'log_level': logging.DEBUG,
         'log_format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         'log_to_console': True,
+        'log_to_file': True,
         'use_colors': True,
     },
     'production': {
         'log_level': logging.INFO,
         'log_format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         'log_to_console': True,
+        'log_to_file': True,
         'use_colors': False,
     }
 }
 
+# Attributes every LogRecord has, anything else was passed in `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "suppressed"}
+
+def _suppressed_note(record: logging.LogRecord) -> str:
+    suppressed = getattr(record, "suppressed", 0)
+    return f" ({suppressed} similar messages suppressed)" if suppressed else ""
+
 class ColoredFormatter(logging.Formatter):
     COLORS = {
         'DEBUG': Fore.CYAN,
@@ -37,32 +66,129 @@ class ColoredFormatter(logging.Formatter):
         self.use_colors = use_colors
 
     def format(self, record):
-        if self.use_colors:
-            levelname = record.levelname
-            if levelname in self.COLORS:
-                record.levelname = f"{self.COLORS[levelname]}{levelname}{Style.RESET_ALL}"
-                record.msg = f"{self.COLORS[levelname]}{record.msg}{Style.RESET_ALL}"
-        return super().format(record)
-
-def setup_logging():
+        # The record is shared with the other handlers, so it is never modified here
+        text = super().format(record) + _suppressed_note(record)
+        color = self.COLORS.get(record.levelname) if self.use_colors else None
+        return f"{color}{text}{Style.RESET_ALL}" if color else text
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record, with any `extra` fields, for grepping and jq."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "line": record.lineno,
+            "thread": record.threadName,
+        }
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES})
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class RateLimitFilter(logging.Filter):
+    """Caps records below ERROR per call site, e.g. the walker's per-file messages.
+
+    Each call site (file and line) lets `limit` records through per `window` seconds,
+    then only every `sample_every`-th one. The next record that passes carries the
+    number dropped in between as `suppressed`. Errors always pass.
+    """
+
+    def __init__(self, limit: int = LOG_RATE_LIMIT, window: float = LOG_RATE_WINDOW, sample_every: int = LOG_SAMPLE_EVERY):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self.sample_every = sample_every
+        self._sites: dict[tuple[str, int], list] = {} # site -> [window start, seen, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.setdefault((record.pathname, record.lineno), [now, 0, 0])
+            if now - site[0] >= self.window:
+                site[0], site[1] = now, 0
+            site[1] += 1
+            if site[1] > self.limit and (site[1] - self.limit) % self.sample_every:
+                site[2] += 1
+                return False
+            record.suppressed, site[2] = site[2], 0
+        return True
+
+class ConsoleHandler(logging.StreamHandler):
+    """Writes through tqdm when it is loaded, so log lines don't tear progress bars."""
+
+    def emit(self, record):
+        tqdm = sys.modules.get("tqdm")
+        if tqdm is None:
+            return super().emit(record)
+        try:
+            tqdm.tqdm.write(self.format(record), file=self.stream)
+        except Exception:
+            self.handleError(record)
+
+class LazyQueueHandler(QueueHandler):
+    """Queues records unformatted, leaving message, traceback and output formatting to the listener.
+
+    The queue never leaves the process, so the record does not need to be made picklable.
+    """
+
+    def prepare(self, record):
+        return record
+
+_listener: Optional[QueueListener] = None
+
+def stop_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def setup_logging(json_path: Optional[Path] = LOG_JSON_PATH):
+    global _listener
     config = LOG_CONFIG.get(ENV, LOG_CONFIG['development'])
-    
+
     logger = logging.getLogger('yesterdays-wisdom')
     logger.setLevel(config['log_level'])
-    
-    # Remove any existing handlers
+
+    # Remove any existing handlers and filters
+    stop_logging()
     for handler in logger.handlers[:]:
         logger.removeHandler(handler)
+    for log_filter in logger.filters[:]:
+        logger.removeFilter(log_filter)
 
+    handlers = []
     if config['log_to_console']:
-        console_handler = logging.StreamHandler()
+        console_handler = ConsoleHandler()
         colored_formatter = ColoredFormatter(config['log_format'], use_colors=config['use_colors'])
         console_handler.setFormatter(colored_formatter)
-        logger.addHandler(console_handler)
-    
+        handlers.append(console_handler)
+    # Written next to the data when that directory exists, the logger never creates it
+    if config['log_to_file'] and json_path is not None and Path(json_path).parent.is_dir():
+        file_handler = RotatingFileHandler(json_path, maxBytes=LOG_JSON_MAX_BYTES, backupCount=LOG_JSON_BACKUPS, encoding="utf-8")
+        file_handler.setFormatter(JsonLinesFormatter())
+        handlers.append(file_handler)
+
+    # Filtered on the logger, so dropped records never reach the queue
+    logger.addFilter(RateLimitFilter())
+    logger.addHandler(LazyQueueHandler(queue.SimpleQueue()))
+    _listener = QueueListener(logger.handlers[0].queue, *handlers)
+    _listener.start()
+
     # No propagation to avoid duplicate logs
     logger.propagate = False
 
     return logger
 
+atexit.register(stop_logging)
+
 logger = setup_logging()
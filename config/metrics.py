@@ -0,0 +1,171 @@
+# Global metrics registry
+# Usage: from config.metrics import metrics
+#        with metrics.span("parse_with_tika", filetype="pdf"): ...
+#        metrics.count("parsed_bytes", size, filetype="pdf")
+import functools
+import inspect
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+
+QUANTILES = (0.5, 0.95, 0.99)
+RESERVOIR_SIZE = 4096 # durations kept per series for the quantile estimates
+
+LabelKey = tuple[tuple[str, str], ...]
+
+def _label_key(labels: dict) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+class Timing:
+    """Count, sum and a uniform reservoir sample of the durations of one span series."""
+
+    def __init__(self, reservoir_size: int = RESERVOIR_SIZE):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.reservoir_size = reservoir_size
+        self.samples: list[float] = []
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        if len(self.samples) < self.reservoir_size:
+            self.samples.append(seconds)
+        else:
+            # Reservoir sampling keeps memory bounded on corpora of any size
+            slot = random.randrange(self.count)
+            if slot < self.reservoir_size:
+                self.samples[slot] = seconds
+
+    def quantiles(self) -> dict[float, float]:
+        if not self.samples:
+            return {q: 0.0 for q in QUANTILES}
+        return dict(zip(QUANTILES, np.quantile(self.samples, QUANTILES).tolist()))
+
+class Metrics:
+    """Timing spans and counters, each broken down by labels such as filetype.
+
+    Spans record wall time (so awaited calls include time spent waiting on the API).
+    Snapshots export as JSON or in the Prometheus text format, e.g. for the
+    node_exporter textfile collector.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings: dict[str, dict[LabelKey, Timing]] = {}
+        self.counters: dict[str, dict[LabelKey, float]] = {}
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self.timings.setdefault(name, {})
+            if key not in series:
+                series[key] = Timing()
+            series[key].observe(seconds)
+
+    def count(self, name: str, value: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    @contextmanager
+    def span(self, name: str, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name: str, **labels):
+        """Decorator recording a span around every call of a sync or async function."""
+        def decorator(fn):
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(name, **labels):
+                        return await fn(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name, **labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def reset(self) -> None:
+        with self._lock:
+            self.timings.clear()
+            self.counters.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "timings": {
+                    name: [
+                        {
+                            "labels": dict(key),
+                            "count": timing.count,
+                            "sum": timing.total,
+                            "max": timing.max,
+                            **{f"p{round(q * 100)}": value for q, value in timing.quantiles().items()},
+                        }
+                        for key, timing in series.items()
+                    ]
+                    for name, series in sorted(self.timings.items())
+                },
+                "counters": {
+                    name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                    for name, series in sorted(self.counters.items())
+                },
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix: str = "yw_") -> str:
+        def labels_text(labels: dict, **extra) -> str:
+            labels = {**labels, **extra}
+            if not labels:
+                return ""
+            return "{" + ",".join(f'{name}="{value}"' for name, value in labels.items()) + "}"
+
+        snapshot = self.snapshot()
+        lines = []
+        for name, series in snapshot["timings"].items():
+            metric = f"{prefix}{name}_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for entry in series:
+                for q in QUANTILES:
+                    quantile_value = entry[f"p{round(q * 100)}"]
+                    lines.append(f"{metric}{labels_text(entry['labels'], quantile=q)} {quantile_value}")
+                lines.append(f"{metric}_sum{labels_text(entry['labels'])} {entry['sum']}")
+                lines.append(f"{metric}_count{labels_text(entry['labels'])} {entry['count']}")
+        for name, series in snapshot["counters"].items():
+            metric = f"{prefix}{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for entry in series:
+                lines.append(f"{metric}{labels_text(entry['labels'])} {entry['value']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path) -> None:
+        """Atomically write a snapshot, in Prometheus text for .prom files, otherwise JSON."""
+        path = Path(path)
+        text = self.to_prometheus() if path.suffix == ".prom" else self.to_json()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(temp_path, path)
+
+metrics = Metrics()
@@ -7,6 +7,14 @@ Global configuration settings for Yesterdays Wisdom
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 MIN_FILE_SIZE = 250  # 250 bytes (otherwise probabl inconsequential)
 HASH_BASE_SIZE = 1024 # 1024 bytes of top and bottom of file for hashing
+SCAN_WORKERS = 8 # threads listing directories in parallel, helps most on network drives
+IGNORE_FILE_NAME = ".ywignore" # gitignore-style exclusions read from the root of the scan
+EXCLUDE_PATTERNS = [
+    ".git/", ".svn/", ".hg/",
+    "node_modules/", "__pycache__/", ".venv/", "venv/", ".tox/",
+    ".Trash/", ".Trashes/", "$RECYCLE.BIN/", ".tmp.driveupload/", ".tmp.drivedownload/",
+    ".DS_Store", "~$*", "*.tmp", "*.part",
+]
 
 MAX_TOKEN_LIMIT = 1e7
 
@@ -18,13 +26,146 @@ INCLUDED_EXTENSIONS =   {
     ".md"
 }
     
+DATABASE_PATH = PARSED_FILES_PATH.parent / "nodes.db"
+
+# Logging settings
+LOG_JSON_PATH = PARSED_FILES_PATH.parent / "logs.jsonl" # JSON lines, rotated
+LOG_JSON_MAX_BYTES = 50 * 1024 ** 2
+LOG_JSON_BACKUPS = 3
+LOG_RATE_LIMIT = 20 # records per call site and window before sampling starts, errors are never dropped
+LOG_RATE_WINDOW = 10.0 # seconds
+LOG_SAMPLE_EVERY = 100 # once over the limit, one record in this many is kept
+
+# Ingestion pipeline settings
+PIPELINE_QUEUE_SIZE = 16 # max items waiting between two stages
+PIPELINE_WORKERS = {
+    "parse": 4,
+    "dedup": 1,
+    "featurise": 4,
+    "embed": 8,
+    "persist": 1, # single writer for SQLite
+}
+# Adaptive stages: the governor moves their worker limit between 1 and these maxima
+PIPELINE_MAX_WORKERS = {
+    "parse": 8, # Tika and OCR, backs off under CPU or memory pressure
+    "featurise": 16, # LLM calls, backs off under memory pressure only
+}
+PIPELINE_MAX_INFLIGHT_CHARS = 256 * 1024 ** 2 # characters of parsed content held between parse and persist
+GOVERNOR_INTERVAL = 2.0 # seconds between resource samples
+METRICS_PATH = PARSED_FILES_PATH.parent / "metrics.prom" # rewritten on every progress report
+PIPELINE_REPORT_INTERVAL = 10 # seconds between live stage reports
+
+# File scheduling settings
+SCHEDULING_POLICY = "newest-first" # or "cheap-first"
+SCHEDULING_WINDOW = 512 # files scanned and ordered together before the first of them is parsed
+# Estimated Tika parse cost by extension: (base seconds, seconds per MB)
+PARSE_COST_ESTIMATES = {
+    ".md": (0.01, 0.05),
+    ".rtf": (0.1, 0.2),
+    ".doc": (0.3, 0.5), ".docx": (0.2, 0.3), ".odt": (0.2, 0.3),
+    ".ppt": (0.5, 0.5), ".pptx": (0.3, 0.3), ".pptm": (0.3, 0.3), ".ppsx": (0.3, 0.3), ".odp": (0.3, 0.3),
+    ".xls": (0.3, 0.5), ".xlsx": (0.3, 0.5), ".ods": (0.3, 0.5),
+    ".epub": (0.3, 0.3),
+    ".pdf": (0.3, 0.5),
+}
+DEFAULT_PARSE_COST = (0.5, 0.5)
+OCR_COST_PER_MB = 20.0 # seconds per MB of a scanned PDF through pdf2image + Tesseract
+OCR_SNIFF_BYTES = 64 * 1024 # bytes read from the start of a PDF to guess whether it has a text layer
+SLOW_LANE_COST = 60.0 # estimated seconds above which a file goes to the slow lane
+SLOW_LANE_SHARE = 8 # fast-lane files scheduled per slow-lane file
+SLOW_LANE_WORKERS = 1 # parse workers that may work on slow-lane files at once
+OCR_PAGE_WORKERS = 4 # pages of one PDF rasterised and OCR'd at once
+PAGE_MIN_TEXT_CHARS = 20 # letters and digits a PDF page's text layer needs to skip OCR
+
+# Parse failure settings
+TIKA_TIMEOUT = 180 # seconds per Tika request on a normal run
+TIKA_RETRY_TIMEOUT = 900 # seconds per Tika request when retrying a failure
+RETRY_BACKOFF_BASE = 60 * 60 # seconds before the first retry, doubled per failed attempt
+RETRY_BACKOFF_MAX = 7 * 24 * 60 * 60
+RETRY_WORKERS = 2 # failed files re-parsed at once, retries are the slow cases
+# Strategies tried in turn on each retry, by failure class. Encrypted files are not retried.
+RETRY_STRATEGIES = {
+    "timeout": ["tika_long", "ocr"],
+    "empty_text": ["ocr", "tika_long"], # likely a scan without a text layer
+    "corrupt": ["zip_xml", "ocr", "plain"],
+    "unsupported": ["zip_xml", "plain"],
+    "encrypted": [],
+    "error": ["tika_long", "zip_xml", "ocr"],
+}
+ZIP_XML_EXTENSIONS = {".docx", ".pptx", ".pptm", ".ppsx", ".xlsx", ".odt", ".ods", ".odp", ".epub"}
+PLAIN_TEXT_EXTENSIONS = {".md", ".rtf"}
+
+# Resource limits, above which parsing backs off
+RESOURCE_MAX_MEMORY_PERCENT = 85.0 # system-wide memory in use
+RESOURCE_MAX_RSS_MB = 4096 # this process plus its children (Tika, Tesseract)
+RESOURCE_MAX_CPU_PERCENT = 90.0
+RESOURCE_MAX_LOAD_PER_CPU = 1.5 # 1-minute load average per core
+RESOURCE_CHECK_INTERVAL = 1.0 # seconds between checks while waiting for resources
+
+# Lazy content settings
+CONTENT_CACHE_MAX_CHARS = 64 * 1024 ** 2 # total length of the parsed contents kept in the LRU
+CONTENT_STREAM_CHARS = 64 * 1024 # characters per piece when streaming content from disk
+
+# Chunking settings
+CHUNK_SIZE = 2000 # max characters per embedded passage
+
+# Query cache settings
+QUERY_RESULT_CACHE_SIZE = 1024 # (query, filters) rankings kept per SQLiteManager
+QUERY_RESULT_CACHE_DEPTH = 200 # ranked ids cached per query, rounded up to cover deeper pages
+
+# Related nodes settings
+RELATED_K = 10 # neighbours stored per node
+RELATED_BLOCK_ELEMENTS = 16 * 1024 ** 2 # similarities computed per block (64MB of float32)
+
+# Snapshot settings
+SNAPSHOT_PART_ROWS = 10_000 # nodes per Parquet file
+SNAPSHOT_WORKERS = 4 # Parquet files written or read at once
+
+# Query server settings
+QUERY_SERVER_HOST = "127.0.0.1"
+QUERY_SERVER_PORT = 8765
+QUERY_BATCH_MAX = 64 # queries scored in one matrix product
+QUERY_BATCH_WAIT = 0.002 # seconds to wait for more queries to join a batch
+QUERY_RELOAD_INTERVAL = 2.0 # seconds between write generation checks
+QUERY_RELOAD_SETTLE = 10.0 # seconds the generation must stay put before reloading
+QUERY_RELOAD_MAX_DELAY = 120.0 # reload anyway once writes have kept coming this long
+
+# Near-duplicate detection settings
+MINHASH_NUM_PERM = 128
+MINHASH_BANDS = 16 # 16 bands of 8 rows, candidate threshold ~0.7 Jaccard
+SHINGLE_SIZE = 5 # words per shingle
+NEAR_DUPLICATE_THRESHOLD = 0.8 # estimated Jaccard to count as a duplicate
+
+# Notion settings
+NOTION_API_URL = "https://api.notion.com/v1"
+NOTION_VERSION = "2022-06-28"
+NOTION_RATE_LIMIT = 3 # average requests per second allowed by Notion
+NOTION_MAX_CONCURRENCY = 3
+NOTION_MAX_RETRIES = 5
+
 # LLM settings
 EMBEDDING_MODEL = "text-mutilingual-embedding-002"
+EMBEDDING_CONCURRENCY = 8 # concurrent chunk embedding calls per document
 LLM_MODEL = "gemini-2.0-flash-exp"
 
+# Digest settings
+DIGEST_SIZE = 20 # nodes per daily digest
+DIGEST_CONCURRENCY = 5 # concurrent question generation calls
+DIGEST_REVIEW_GRADE = 4 # SM-2 grade recorded for nodes shown in a sent digest
+REVIEW_NEW_PER_DAY = 10 # never-shown nodes added to the review queue per day
+REVIEW_CANDIDATE_FACTOR = 4 # due candidates fetched per digest slot before diversity filtering
+DIVERSITY_MAX_SIMILARITY = 0.9 # max cosine similarity between two nodes of one digest
+
 # Notes storage settings
 NOTES_PATH = Path("~/Google Drive/My Drive/Handwritten Notes/").expanduser().resolve()
 OBSIDIAN_VAULT_PATH = Path("~/Google Drive/My Drive/Obsidian/").expanduser().resolve()
+NOTES_CACHE_PATH = PARSED_FILES_PATH / "note_thumbnails"
+NOTE_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".tif", ".tiff"}
+NOTE_IMAGE_MAX_SIDE = 1600 # px, long side of the thumbnails sent to the LLM
+NOTES_CATEGORISE_BATCH_SIZE = 20 # pages per categorisation call
+NOTES_CONCURRENCY = 4 # concurrent categorisation/transcription calls
+OBSIDIAN_MANIFEST_NAME = ".export_manifest.json" # content hashes of exported files, kept in the vault
+OBSIDIAN_EXPORT_WORKERS = 8 # threads writing vault files
 
 
 
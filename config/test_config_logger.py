@@ -0,0 +1,29 @@
+import json
+import logging
+
+from config.config_logger import ColoredFormatter, JsonLinesFormatter, RateLimitFilter
+
+def make_record(msg="Parsed %s", args=("a.pdf",), level=logging.INFO, lineno=10, **extra):
+    record = logging.LogRecord("yesterdays-wisdom", level, "walker.py", lineno, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+def test_formatters_leave_the_record_alone():
+    """Test that colouring does not leak into the record other handlers format."""
+    record = make_record(files=3)
+    colored = ColoredFormatter("%(levelname)s - %(message)s", use_colors=True).format(record)
+    entry = json.loads(JsonLinesFormatter().format(record))
+
+    assert "INFO - Parsed a.pdf" in colored and colored != "INFO - Parsed a.pdf"
+    assert (record.msg, record.levelname) == ("Parsed %s", "INFO")
+    assert (entry["message"], entry["level"], entry["files"]) == ("Parsed a.pdf", "INFO", 3)
+
+def test_rate_limit_samples_per_call_site():
+    """Test that a chatty call site is sampled after its limit while others and errors pass."""
+    log_filter = RateLimitFilter(limit=3, window=60, sample_every=5)
+    passed = [record for record in (make_record() for _ in range(13)) if log_filter.filter(record)]
+
+    assert len(passed) == 5 # 3 within the limit, then the 5th and 10th over it
+    assert [record.suppressed for record in passed] == [0, 0, 0, 4, 4]
+    assert log_filter.filter(make_record(lineno=11))
+    assert log_filter.filter(make_record(level=logging.ERROR))
@@ -0,0 +1,45 @@
+import asyncio
+import json
+
+from config.metrics import Metrics
+
+def test_spans_and_counters_by_label():
+    """Test that spans give per-label quantiles and counters accumulate."""
+    metrics = Metrics()
+    for i in range(1, 101):
+        metrics.observe("parse_with_tika", i / 100, filetype="pdf")
+    metrics.observe("parse_with_tika", 5.0, filetype="docx")
+    metrics.count("tika_input_bytes", 1000, filetype="pdf")
+    metrics.count("tika_input_bytes", 500, filetype="pdf")
+
+    timings = {entry["labels"]["filetype"]: entry for entry in metrics.snapshot()["timings"]["parse_with_tika"]}
+    assert timings["pdf"]["count"] == 100
+    assert abs(timings["pdf"]["p50"] - 0.505) < 1e-9 and timings["pdf"]["p99"] > 0.98
+    assert timings["docx"]["max"] == 5.0
+    assert metrics.snapshot()["counters"]["tika_input_bytes"] == [{"labels": {"filetype": "pdf"}, "value": 1500}]
+
+def test_timed_decorator_and_export(tmp_path):
+    """Test that sync and async functions are timed and both export formats are written."""
+    metrics = Metrics()
+
+    @metrics.timed("sqlite_write", op="upsert")
+    def write():
+        return 1
+
+    @metrics.timed("embedding_call")
+    async def embed():
+        await asyncio.sleep(0.01)
+        return 2
+
+    assert write() == 1 and asyncio.run(embed()) == 2
+    metrics.count("parse_cache_hits")
+
+    metrics.write(tmp_path / "metrics.prom")
+    metrics.write(tmp_path / "metrics.json")
+    prometheus = (tmp_path / "metrics.prom").read_text()
+
+    assert 'yw_sqlite_write_seconds_count{op="upsert"} 1' in prometheus
+    assert 'yw_embedding_call_seconds{quantile="0.95"}' in prometheus
+    assert "yw_parse_cache_hits_total 1" in prometheus
+    snapshot = json.loads((tmp_path / "metrics.json").read_text())
+    assert snapshot["timings"]["embedding_call"][0]["sum"] >= 0.01
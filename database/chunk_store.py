@@ -0,0 +1,229 @@
+import sqlite3
+from dataclasses import dataclass
+from typing import Any, Literal, Optional, Sequence
+
+import numpy as np
+
+from config.metrics import metrics
+from database.generation import bump_generation, create_meta_table, read_generation
+
+Pooling = Literal["max", "sum"]
+
+@dataclass(frozen=True)
+class Passage:
+    """A passage matching a query, addressed by character offsets into its node's content."""
+    primary_id: str
+    ordinal: int
+    start: int
+    end: int
+    score: float
+
+@dataclass
+class DocumentHit:
+    """A document ranked by its pooled passage scores, with its best passages."""
+    primary_id: str
+    score: float
+    passages: list[Passage]
+
+@dataclass
+class ChunkIndex:
+    """All chunk embeddings as one contiguous, row-normalised matrix.
+
+    Rows are grouped by document: rows `offsets[i]` to `offsets[i + 1]` belong to
+    `primary_ids[i]`, in chunk order.
+    """
+    primary_ids: list[str]
+    offsets: np.ndarray
+    ordinals: np.ndarray
+    starts: np.ndarray
+    ends: np.ndarray
+    matrix: np.ndarray
+
+    def passage(self, row: int, score: float) -> Passage:
+        document = int(np.searchsorted(self.offsets, row, side="right")) - 1
+        return Passage(
+            primary_id=self.primary_ids[document],
+            ordinal=int(self.ordinals[row]),
+            start=int(self.starts[row]),
+            end=int(self.ends[row]),
+            score=float(score),
+        )
+
+def top_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first."""
+    if k >= len(scores):
+        return np.argsort(-scores)
+    top = np.argpartition(-scores, k)[:k]
+    return top[np.argsort(-scores[top])]
+
+class ChunkStore:
+    """Passages of each node and their embeddings, for passage-level retrieval.
+
+    A node's chunk embeddings are stored as a single float32 block, so loading the
+    index is one query and one buffer join. Searches score every passage with one
+    matrix-vector product, and documents are ranked by pooling their passage scores
+    with `reduceat` over the contiguous row ranges of each document.
+
+    Writes bump the store's write generation, and the index is rebuilt when the
+    generation moves, so a long-lived reader sees writes made by other connections.
+    """
+
+    def __init__(self, db_path: str):
+        self.conn = sqlite3.connect(db_path)
+        self._index: Optional[ChunkIndex] = None
+        self._index_generation: Optional[int] = None
+        self.create_table()
+
+    def create_table(self):
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS chunks (
+            primary_id TEXT NOT NULL,
+            ordinal INTEGER NOT NULL,
+            start_offset INTEGER NOT NULL,
+            end_offset INTEGER NOT NULL,
+            token_count INTEGER NOT NULL,
+            chunk_hash TEXT NOT NULL,
+            PRIMARY KEY (primary_id, ordinal)
+        ) WITHOUT ROWID
+        """)
+        create_meta_table(self.conn)
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS chunk_embeddings (
+            primary_id TEXT PRIMARY KEY,
+            dim INTEGER NOT NULL,
+            embeddings BLOB NOT NULL
+        )
+        """)
+        self.conn.commit()
+
+    @metrics.timed("sqlite_write", op="chunks")
+    def put(self, primary_id: str, chunks: Sequence[Any], embeddings: np.ndarray) -> None:
+        """Replace a node's chunks with `chunks`, whose embeddings are the rows of `embeddings`.
+
+        Chunks are anything with the fields of `chunking.Chunk`: ordinal, start, end,
+        token_count and hash.
+        """
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if embeddings.ndim != 2 or embeddings.shape[0] != len(chunks):
+            raise ValueError(f"Expected {len(chunks)} embedding rows, got shape {embeddings.shape}")
+        with self.conn:
+            self._delete(primary_id)
+            bump_generation(self.conn)
+            if not chunks:
+                return
+            self.conn.executemany(
+                "INSERT INTO chunks (primary_id, ordinal, start_offset, end_offset, token_count, chunk_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (primary_id, chunk.ordinal, chunk.start, chunk.end, chunk.token_count, chunk.hash)
+                    for chunk in chunks
+                ],
+            )
+            self.conn.execute(
+                "INSERT INTO chunk_embeddings (primary_id, dim, embeddings) VALUES (?, ?, ?)",
+                (primary_id, embeddings.shape[1], embeddings.tobytes()),
+            )
+
+    def remove(self, primary_id: str) -> None:
+        with self.conn:
+            self._delete(primary_id)
+            bump_generation(self.conn)
+
+    def _delete(self, primary_id: str) -> None:
+        self.conn.execute("DELETE FROM chunks WHERE primary_id = ?", (primary_id,))
+        self.conn.execute("DELETE FROM chunk_embeddings WHERE primary_id = ?", (primary_id,))
+
+    def has_chunks(self, primary_id: str) -> bool:
+        row = self.conn.execute("SELECT 1 FROM chunk_embeddings WHERE primary_id = ?", (primary_id,)).fetchone()
+        return row is not None
+
+    def load_index(self) -> ChunkIndex:
+        """Build (or return the cached) in-memory index of every stored chunk.
+
+        The generation, embedding blocks and chunk offsets are read in one read
+        transaction, so a concurrent ingest cannot put the offsets out of step with the matrix.
+        """
+        generation = read_generation(self.conn)
+        if self._index is not None and self._index_generation == generation:
+            return self._index
+        self.conn.execute("BEGIN")
+        try:
+            generation = read_generation(self.conn)
+            blocks = self.conn.execute(
+                "SELECT primary_id, dim, embeddings FROM chunk_embeddings ORDER BY primary_id"
+            ).fetchall()
+            rows = self.conn.execute(
+                "SELECT ordinal, start_offset, end_offset FROM chunks ORDER BY primary_id, ordinal"
+            ).fetchall()
+        finally:
+            self.conn.commit()
+        dims = {dim for _, dim, _ in blocks}
+        if len(dims) > 1:
+            raise ValueError(f"Chunk embeddings have mixed dimensions: {sorted(dims)}")
+        dim = dims.pop() if dims else 1
+        counts = np.array([len(blob) // (4 * dim) for _, _, blob in blocks], dtype=np.int64)
+        matrix = np.frombuffer(b"".join(blob for _, _, blob in blocks), dtype=np.float32).reshape(-1, dim).copy()
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.maximum(norms, np.finfo(np.float32).eps)
+        positions = np.array(rows, dtype=np.int64).reshape(-1, 3)
+        self._index = ChunkIndex(
+            primary_ids=[primary_id for primary_id, _, _ in blocks],
+            offsets=np.concatenate([[0], np.cumsum(counts)]),
+            ordinals=positions[:, 0],
+            starts=positions[:, 1],
+            ends=positions[:, 2],
+            matrix=matrix,
+        )
+        self._index_generation = generation
+        return self._index
+
+    def _scores(self, index: ChunkIndex, query: Sequence[float] | np.ndarray) -> np.ndarray:
+        query = np.asarray(query, dtype=np.float32)
+        return index.matrix @ (query / max(float(np.linalg.norm(query)), np.finfo(np.float32).eps))
+
+    @metrics.timed("chunk_search", kind="passages")
+    def search_passages(self, query: Sequence[float] | np.ndarray, top_k: int = 10) -> list[Passage]:
+        """The `top_k` passages most similar (cosine) to the query embedding."""
+        index = self.load_index()
+        if not index.primary_ids:
+            return []
+        scores = self._scores(index, query)
+        return [index.passage(row, scores[row]) for row in top_indices(scores, top_k)]
+
+    @metrics.timed("chunk_search", kind="documents")
+    def search_documents(
+        self,
+        query: Sequence[float] | np.ndarray,
+        top_k: int = 5,
+        pooling: Pooling = "max",
+        passages_per_document: int = 3,
+    ) -> list[DocumentHit]:
+        """The `top_k` documents by pooled passage similarity, each with its best passages.
+
+        `max` ranks a document by its single best passage; `sum` adds up all of its
+        passage scores, which favours documents that are relevant throughout.
+        """
+        index = self.load_index()
+        if not index.primary_ids:
+            return []
+        scores = self._scores(index, query)
+        if pooling == "max":
+            document_scores = np.maximum.reduceat(scores, index.offsets[:-1])
+        elif pooling == "sum":
+            document_scores = np.add.reduceat(scores, index.offsets[:-1])
+        else:
+            raise ValueError(f"Unknown pooling: {pooling}")
+
+        hits = []
+        for document in top_indices(document_scores, top_k):
+            start = index.offsets[document]
+            rows = start + top_indices(scores[start:index.offsets[document + 1]], passages_per_document)
+            hits.append(DocumentHit(
+                primary_id=index.primary_ids[document],
+                score=float(document_scores[document]),
+                passages=[index.passage(row, scores[row]) for row in rows],
+            ))
+        return hits
+
+    def close(self):
+        self.conn.close()
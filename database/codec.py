@@ -0,0 +1,181 @@
+"""
+Row codec for the nodes table.
+
+The column layout, SQL and per-column encoders/decoders are derived once from the
+pydantic node models instead of branching on every field for every row. SQL strings
+are cached per column set so sqlite3's statement cache can reuse the prepared statement.
+"""
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Iterable, get_args, get_origin
+
+import numpy as np
+from pydantic import BaseModel
+
+from database.node import FileNode, LLMNode, EmbeddingNode
+
+@dataclass(frozen=True)
+class Column:
+    """A single column of the nodes table with its conversion functions"""
+    name: str
+    sql_type: str
+    required: bool
+    encode: Callable[[Any], Any]
+    decode: Callable[[Any], Any]
+    kind: str # text, str_list, vector, datetime, real or integer
+
+def _identity(value: Any) -> Any:
+    return value
+
+def _encode_datetime(value: datetime | None) -> str | None:
+    return value.isoformat() if value is not None else None
+
+def _decode_datetime(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
+
+def _encode_str_list(value: list[str] | None) -> str | None:
+    return json.dumps(value) if value is not None else None
+
+def _decode_str_list(value: str | None) -> list[str]:
+    return json.loads(value) if value else []
+
+def _encode_vector(value: Iterable[float] | None) -> bytes | None:
+    return np.asarray(value, dtype=np.float32).tobytes() if value is not None else None
+
+def _decode_vector(value: bytes | None) -> list[float]:
+    return np.frombuffer(value, dtype=np.float32).tolist() if value else []
+
+def _column_for(name: str, annotation: Any, required: bool) -> Column:
+    """Map a model field annotation onto a SQLite type and codec functions."""
+    origin = get_origin(annotation)
+    if origin is list:
+        (item_type,) = get_args(annotation)
+        if item_type is float:
+            return Column(name, "BLOB", required, _encode_vector, _decode_vector, "vector")
+        return Column(name, "TEXT", required, _encode_str_list, _decode_str_list, "str_list")
+    if annotation is datetime:
+        return Column(name, "TIMESTAMP", required, _encode_datetime, _decode_datetime, "datetime")
+    if annotation is float:
+        return Column(name, "REAL", required, _identity, _identity, "real")
+    if annotation is int:
+        return Column(name, "INTEGER", required, _identity, _identity, "integer")
+    return Column(name, "TEXT", required, _identity, _identity, "text")
+
+class NodeCodec:
+    """Column layout and cached SQL for a table built from one or more node models.
+
+    Fields of `required_models` are NOT NULL, fields of `optional_models` may be
+    filled in by later stages (e.g. featurisation, embedding).
+    """
+
+    def __init__(
+        self,
+        required_models: tuple[type[BaseModel], ...],
+        optional_models: tuple[type[BaseModel], ...] = (),
+        table: str = "nodes",
+    ):
+        self.table = table
+        self.columns: dict[str, Column] = {}
+        for models, required in ((required_models, True), (optional_models, False)):
+            for model in models:
+                for name, field in model.model_fields.items():
+                    # Excluded fields (e.g. FileNode.content_ref) only live in memory
+                    if not field.exclude:
+                        self.columns[name] = _column_for(name, field.annotation, required)
+        self._sql_cache: dict[tuple, str] = {}
+        self._decoder_cache: dict[tuple[str, ...], tuple[Callable[[Any], Any], ...]] = {}
+
+    @property
+    def column_names(self) -> tuple[str, ...]:
+        return tuple(self.columns)
+
+    def create_table_sql(self) -> str:
+        columns = [
+            f"{col.name} {col.sql_type}{' NOT NULL' if col.required else ''}"
+            for col in self.columns.values()
+        ]
+        return f"""
+        CREATE TABLE IF NOT EXISTS {self.table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            {', '.join(columns)}
+        )
+        """
+
+    def encode(self, data: dict[str, Any]) -> tuple[tuple[str, ...], list[Any]]:
+        """Encode the known columns of `data`, returning (column names, values)."""
+        names = tuple(name for name in self.columns if name in data)
+        return names, [self.columns[name].encode(data[name]) for name in names]
+
+    def decode(self, names: tuple[str, ...], row: tuple) -> dict[str, Any]:
+        """Decode a row fetched with the projection `names`."""
+        return {
+            name: decoder(value)
+            for name, decoder, value in zip(names, self.decoders(names), row)
+        }
+
+    def decoders(self, names: tuple[str, ...]) -> tuple[Callable[[Any], Any], ...]:
+        decoders = self._decoder_cache.get(names)
+        if decoders is None:
+            decoders = tuple(
+                self.columns[name].decode if name in self.columns else _identity
+                for name in names
+            )
+            self._decoder_cache[names] = decoders
+        return decoders
+
+    def projection(self, fields: Iterable[str] | None) -> tuple[str, ...]:
+        """Resolve requested fields to a column tuple, always leading with `id`."""
+        if fields is None:
+            return ("id",) + self.column_names
+        unknown = [field for field in fields if field != "id" and field not in self.columns]
+        if unknown:
+            raise ValueError(f"Unknown node fields: {unknown}")
+        return ("id",) + tuple(field for field in fields if field != "id")
+
+    def insert_sql(self, names: tuple[str, ...]) -> str:
+        return self._cached(("insert", names), lambda: (
+            f"INSERT INTO {self.table} ({', '.join(names)}) "
+            f"VALUES ({', '.join('?' for _ in names)})"
+        ))
+
+    def upsert_sql(self, names: tuple[str, ...], key: str = "primary_id") -> str:
+        """Insert, or overwrite the given columns of the row with the same `key`."""
+        updates = [name for name in names if name != key]
+        return self._cached(("upsert", names, key), lambda: (
+            f"{self.insert_sql(names)} ON CONFLICT({key}) DO UPDATE SET "
+            f"{', '.join(f'{name} = excluded.{name}' for name in updates)}"
+        ))
+
+    def update_sql(self, names: tuple[str, ...]) -> str:
+        return self._cached(("update", names), lambda: (
+            f"UPDATE {self.table} SET {', '.join(f'{name} = ?' for name in names)} WHERE id = ?"
+        ))
+
+    def select_sql(self, names: tuple[str, ...]) -> str:
+        """Select a projection for a JSON array of ids bound as a single parameter."""
+        return self._cached(("select", names), lambda: (
+            f"SELECT {', '.join(names)} FROM {self.table} "
+            f"WHERE id IN (SELECT value FROM json_each(?))"
+        ))
+
+    def _cached(self, key: tuple, build: Callable[[], str]) -> str:
+        sql = self._sql_cache.get(key)
+        if sql is None:
+            sql = self._sql_cache[key] = build()
+        return sql
+
+def node_to_row(*models: BaseModel | None) -> dict[str, Any]:
+    """Flatten FileNode/LLMNode/EmbeddingNode instances into a single row dict, skipping missing ones."""
+    row: dict[str, Any] = {}
+    for model in models:
+        if model is not None:
+            row.update(dict(model))
+        if isinstance(model, FileNode) and model.content is None:
+            row["content"] = model.load_content()
+    return row
+
+NODE_CODEC = NodeCodec(
+    required_models=(FileNode,),
+    optional_models=(LLMNode, EmbeddingNode),
+)
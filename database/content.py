@@ -0,0 +1,77 @@
+import threading
+from collections import OrderedDict
+from typing import Iterator
+
+from pydantic import BaseModel, Field
+
+from config.settings import CONTENT_CACHE_MAX_CHARS, CONTENT_STREAM_CHARS
+
+class ContentRef(BaseModel):
+    """Where a node's parsed text lives on disk, instead of the text itself."""
+    path: str = Field(description="Parse cache file holding the content, keyed by the file hash")
+    length: int = Field(description="Length of the content in characters")
+
+class ContentCache:
+    """LRU of recently loaded contents, bounded by their total length in characters.
+
+    Pipeline stages load the same document several times in a row (hashing, dedup,
+    featurisation, embedding), so a small LRU serves nearly all of those from memory
+    while a walk over the whole corpus holds only references.
+    """
+
+    def __init__(self, max_chars: int = CONTENT_CACHE_MAX_CHARS):
+        self.max_chars = max_chars
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, ref: ContentRef) -> str:
+        with self._lock:
+            text = self._entries.get(ref.path)
+            if text is not None:
+                self._entries.move_to_end(ref.path)
+                self.hits += 1
+                return text
+            self.misses += 1
+        with open(ref.path, "r", encoding="utf-8") as f:
+            text = f.read()
+        self.put(ref, text)
+        return text
+
+    def put(self, ref: ContentRef, text: str) -> None:
+        """Prime the LRU with content that was just parsed, saving the first read.
+
+        Replaces any entry for the same path, e.g. after its file was re-parsed.
+        """
+        with self._lock:
+            previous = self._entries.pop(ref.path, None)
+            if previous is not None:
+                self.size -= len(previous)
+            if len(text) > self.max_chars:
+                return
+            self._entries[ref.path] = text
+            self.size += len(text)
+            while self.size > self.max_chars:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def stream(self, ref: ContentRef, chunk_chars: int = CONTENT_STREAM_CHARS) -> Iterator[str]:
+        """Yield the content in pieces, from the LRU if it is there, without caching it."""
+        with self._lock:
+            text = self._entries.get(ref.path)
+        if text is not None:
+            for start in range(0, len(text), chunk_chars):
+                yield text[start:start + chunk_chars]
+            return
+        with open(ref.path, "r", encoding="utf-8") as f:
+            while chunk := f.read(chunk_chars):
+                yield chunk
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+content_cache = ContentCache()
@@ -0,0 +1,59 @@
+import sqlite3
+from datetime import date, datetime
+from typing import Optional
+
+class DigestStore:
+    """Caches generated questions per node input and stores precomputed digests."""
+
+    def __init__(self, db_path: str):
+        self.conn = sqlite3.connect(db_path)
+        self.create_table()
+
+    def create_table(self):
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS digest_questions (
+            primary_id TEXT NOT NULL,
+            input_hash TEXT NOT NULL,
+            questions TEXT NOT NULL,
+            created_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (primary_id, input_hash)
+        ) WITHOUT ROWID
+        """)
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS digests (
+            digest_date TEXT PRIMARY KEY,
+            payload TEXT NOT NULL,
+            created_at TIMESTAMP NOT NULL
+        )
+        """)
+        self.conn.commit()
+
+    def get_questions(self, primary_id: str, input_hash: str) -> Optional[str]:
+        row = self.conn.execute(
+            "SELECT questions FROM digest_questions WHERE primary_id = ? AND input_hash = ?",
+            (primary_id, input_hash),
+        ).fetchone()
+        return row[0] if row else None
+
+    def put_questions(self, primary_id: str, input_hash: str, questions: str) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO digest_questions (primary_id, input_hash, questions, created_at) VALUES (?, ?, ?, ?)",
+            (primary_id, input_hash, questions, datetime.now().isoformat()),
+        )
+        self.conn.commit()
+
+    def get_digest(self, digest_date: date) -> Optional[str]:
+        row = self.conn.execute(
+            "SELECT payload FROM digests WHERE digest_date = ?", (digest_date.isoformat(),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def put_digest(self, digest_date: date, payload: str) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO digests (digest_date, payload, created_at) VALUES (?, ?, ?)",
+            (digest_date.isoformat(), payload, datetime.now().isoformat()),
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,96 @@
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+class DuplicateStore:
+    """Persists MinHash signatures and near-duplicate links between nodes.
+
+    A node listed in `node_duplicates` was not featurised or embedded itself; its
+    representative holds the LLM and embedding data for the whole cluster.
+    """
+
+    def __init__(self, db_path: str):
+        self.conn = sqlite3.connect(db_path)
+        self.create_table()
+
+    def create_table(self):
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS minhash_signatures (
+            primary_id TEXT PRIMARY KEY,
+            signature BLOB NOT NULL
+        )
+        """)
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS node_duplicates (
+            primary_id TEXT PRIMARY KEY,
+            representative_id TEXT NOT NULL,
+            similarity REAL NOT NULL
+        )
+        """)
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_node_duplicates_representative ON node_duplicates (representative_id)"
+        )
+        self.conn.commit()
+
+    def save(self, primary_id: str, signature: np.ndarray, match: Optional[Tuple[str, float]]) -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO minhash_signatures (primary_id, signature) VALUES (?, ?)",
+                (primary_id, signature.astype(np.uint32).tobytes()),
+            )
+            if match is not None:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO node_duplicates (primary_id, representative_id, similarity) VALUES (?, ?, ?)",
+                    (primary_id, *match),
+                )
+
+    def load_all(self) -> Tuple[List[str], np.ndarray, Dict[str, str]]:
+        """Return (primary_ids, (n, num_perm) signature matrix, {duplicate: representative})."""
+        rows = self.conn.execute("SELECT primary_id, signature FROM minhash_signatures").fetchall()
+        keys = [primary_id for primary_id, _ in rows]
+        signatures = (
+            np.frombuffer(b"".join(blob for _, blob in rows), dtype=np.uint32).reshape(len(rows), -1)
+            if rows else np.empty((0, 0), dtype=np.uint32)
+        )
+        representatives = dict(self.conn.execute("SELECT primary_id, representative_id FROM node_duplicates"))
+        return keys, signatures, representatives
+
+    def representative_of(self, primary_id: str) -> Optional[str]:
+        row = self.conn.execute(
+            "SELECT representative_id FROM node_duplicates WHERE primary_id = ?", (primary_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def duplicates_of(self, representative_id: str) -> List[str]:
+        rows = self.conn.execute(
+            "SELECT primary_id FROM node_duplicates WHERE representative_id = ?", (representative_id,)
+        ).fetchall()
+        return [primary_id for (primary_id,) in rows]
+
+    def promote(self, representative_id: str) -> Optional[str]:
+        """Make the closest member of a cluster its representative, e.g. when the old one is retired.
+
+        The other members are linked to the promoted node, keeping their similarity to
+        the old representative. Returns the promoted node, or None if there were no members.
+        """
+        row = self.conn.execute(
+            "SELECT primary_id FROM node_duplicates WHERE representative_id = ? ORDER BY similarity DESC, primary_id LIMIT 1",
+            (representative_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        with self.conn:
+            self.conn.execute("DELETE FROM node_duplicates WHERE primary_id = ?", row)
+            self.conn.execute(
+                "UPDATE node_duplicates SET representative_id = ? WHERE representative_id = ?", (row[0], representative_id)
+            )
+        return row[0]
+
+    def remove(self, primary_id: str) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM minhash_signatures WHERE primary_id = ?", (primary_id,))
+            self.conn.execute("DELETE FROM node_duplicates WHERE primary_id = ?", (primary_id,))
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,64 @@
+import json
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from config.metrics import metrics
+
+class EmbeddingCache:
+    """Persistent text-hash -> embedding cache, keyed by embedding model.
+
+    Used for chunk embeddings, so that re-embedding an edited document only
+    calls the embedding API for the passages whose text actually changed.
+    The pipeline reads it from worker threads, so the connection is shared behind a lock.
+    """
+
+    def __init__(self, db_path: str, model_name: str):
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.model_name = model_name
+        self._lock = threading.Lock()
+        self.create_table()
+
+    def create_table(self):
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS embedding_cache (
+            text_hash TEXT NOT NULL,
+            model TEXT NOT NULL,
+            embedding BLOB NOT NULL,
+            PRIMARY KEY (text_hash, model)
+        ) WITHOUT ROWID
+        """)
+        self.conn.commit()
+
+    @metrics.timed("embedding_cache_get")
+    def get_many(self, text_hashes: Iterable[str]) -> Dict[str, np.ndarray]:
+        text_hashes = list(text_hashes)
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT text_hash, embedding FROM embedding_cache "
+                "WHERE model = ? AND text_hash IN (SELECT value FROM json_each(?))",
+                (self.model_name, json.dumps(text_hashes)),
+            ).fetchall()
+        return {text_hash: np.frombuffer(blob, dtype=np.float32) for text_hash, blob in rows}
+
+    def get(self, text_hash: str) -> Optional[np.ndarray]:
+        return self.get_many([text_hash]).get(text_hash)
+
+    @metrics.timed("embedding_cache_put")
+    def put_many(self, embeddings: Dict[str, List[float] | np.ndarray]) -> None:
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embedding_cache (text_hash, model, embedding) VALUES (?, ?, ?)",
+                [
+                    (text_hash, self.model_name, np.asarray(vector, dtype=np.float32).tobytes())
+                    for text_hash, vector in embeddings.items()
+                ],
+            )
+
+    def put(self, text_hash: str, embedding: List[float] | np.ndarray) -> None:
+        self.put_many({text_hash: embedding})
+
+    def close(self):
+        self.conn.close()
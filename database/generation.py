@@ -0,0 +1,23 @@
+import sqlite3
+
+def create_meta_table(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )
+    """)
+    conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('write_generation', 0)")
+    conn.commit()
+
+def bump_generation(conn: sqlite3.Connection) -> None:
+    """Advance the write generation, in the caller's transaction so it commits with the write."""
+    conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'write_generation'")
+
+def read_generation(conn: sqlite3.Connection) -> int:
+    """The number of committed writes to the store, as seen by any connection.
+
+    Anything derived from the store (cached results, in-memory indexes) is current
+    as long as the generation it was built at is still the generation read here.
+    """
+    return conn.execute("SELECT value FROM meta WHERE key = 'write_generation'").fetchone()[0]
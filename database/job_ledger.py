@@ -0,0 +1,68 @@
+import sqlite3
+from datetime import datetime
+from typing import Dict, Optional
+
+STAGES = ("parsed", "featurised", "embedded", "stored")
+
+class JobLedger:
+    """Durable record of which ingestion stages each node has completed.
+
+    Rows are keyed by (primary_id, stage). Stages whose output is expensive to
+    recompute (featurised, embedded) store their result as a JSON payload, so a
+    resumed run can rebuild the node without repeating LLM or embedding calls.
+    Every checkpoint is committed immediately so a killed run loses at most the
+    items that were in flight.
+    """
+
+    def __init__(self, db_path: str):
+        self.conn = sqlite3.connect(db_path)
+        # WAL keeps checkpoint commits cheap and lets readers run alongside the writer
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.create_table()
+
+    def create_table(self):
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS node_stages (
+            primary_id TEXT NOT NULL,
+            stage TEXT NOT NULL,
+            payload TEXT,
+            completed_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (primary_id, stage)
+        ) WITHOUT ROWID
+        """)
+        self.conn.commit()
+
+    def mark_done(self, primary_id: str, stage: str, payload: Optional[str] = None) -> None:
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage {stage!r}, expected one of {STAGES}")
+        self.conn.execute(
+            "INSERT OR REPLACE INTO node_stages (primary_id, stage, payload, completed_at) VALUES (?, ?, ?, ?)",
+            (primary_id, stage, payload, datetime.now().isoformat()),
+        )
+        self.conn.commit()
+
+    def completed_stages(self, primary_id: str) -> Dict[str, Optional[str]]:
+        """Return {stage: payload} for every stage the node has completed."""
+        rows = self.conn.execute(
+            "SELECT stage, payload FROM node_stages WHERE primary_id = ?", (primary_id,)
+        ).fetchall()
+        return dict(rows)
+
+    def is_done(self, primary_id: str, stage: str) -> bool:
+        row = self.conn.execute(
+            "SELECT 1 FROM node_stages WHERE primary_id = ? AND stage = ?", (primary_id, stage)
+        ).fetchone()
+        return row is not None
+
+    def reset(self, primary_id: str) -> None:
+        """Forget all checkpoints of a node, e.g. when its content changed."""
+        self.conn.execute("DELETE FROM node_stages WHERE primary_id = ?", (primary_id,))
+        self.conn.commit()
+
+    def stage_counts(self) -> Dict[str, int]:
+        rows = self.conn.execute("SELECT stage, COUNT(*) FROM node_stages GROUP BY stage").fetchall()
+        return {stage: dict(rows).get(stage, 0) for stage in STAGES}
+
+    def close(self):
+        self.conn.close()
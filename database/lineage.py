@@ -0,0 +1,67 @@
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Literal, Optional
+
+ChangeKind = Literal["new", "unchanged", "metadata", "content"]
+
+@dataclass(frozen=True)
+class Change:
+    """How a file differs from the version last stored for its path."""
+    kind: ChangeKind
+    previous_primary_id: Optional[str] = None
+
+class LineageStore:
+    """Tracks which node (primary_id) and content hash each path last resolved to.
+
+    `hash_file` mixes size and mtime into the primary_id, so touching or re-syncing
+    a file yields a new primary_id even when its text is identical. Comparing the
+    full content hash recorded here tells a metadata-only change apart from an
+    actual content edit.
+    """
+
+    def __init__(self, db_path: str):
+        self.conn = sqlite3.connect(db_path)
+        self.create_table()
+
+    def create_table(self):
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS path_lineage (
+            path TEXT PRIMARY KEY,
+            primary_id TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            updated_at TIMESTAMP NOT NULL
+        )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_path_lineage_primary_id ON path_lineage (primary_id)")
+        self.conn.commit()
+
+    def diff(self, path: str, primary_id: str, content_hash: str) -> Change:
+        row = self.conn.execute(
+            "SELECT primary_id, content_hash FROM path_lineage WHERE path = ?", (path,)
+        ).fetchone()
+        if row is None:
+            return Change("new")
+        previous_primary_id, previous_content_hash = row
+        if previous_primary_id == primary_id:
+            return Change("unchanged", previous_primary_id)
+        if previous_content_hash == content_hash:
+            return Change("metadata", previous_primary_id)
+        return Change("content", previous_primary_id)
+
+    def record(self, path: str, primary_id: str, content_hash: str) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO path_lineage (path, primary_id, content_hash, updated_at) VALUES (?, ?, ?, ?)",
+            (path, primary_id, content_hash, datetime.now().isoformat()),
+        )
+        self.conn.commit()
+
+    def is_referenced(self, primary_id: str) -> bool:
+        """Whether any path still resolves to this node (e.g. another copy of the file)."""
+        row = self.conn.execute(
+            "SELECT 1 FROM path_lineage WHERE primary_id = ? LIMIT 1", (primary_id,)
+        ).fetchone()
+        return row is not None
+
+    def close(self):
+        self.conn.close()
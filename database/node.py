@@ -1,21 +1,45 @@
 from datetime import datetime
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from datetime import datetime
-from typing import List
+from typing import Iterator, List, Optional
+
+from database.content import ContentRef, content_cache
 
 class FileNode(BaseModel):
     """Properties extracted directly from the file system and file content"""
     primary_id: str = Field(description="Hash based on first and last 1024 characters of file uniquely identifying node.\
     Ontology of node is thus its content rather than anything reliant on metadata. Note issue with not registering changes in the middle")
-    content: str = Field(description="The underlying content of the node")
+    content: Optional[str] = Field(default=None, description="The underlying content of the node, None while only content_ref is held")
+    content_ref: Optional[ContentRef] = Field(default=None, exclude=True, description="Where to load the content from on demand")
     file_size: float = Field(description="Size of the node file in KB")
     file_creation_time: datetime = Field(description="Date the node was created")
     file_modification_time: datetime = Field(description="Date the node was last modified")
     filetype: str = Field(description="File type of the content")
     location: str = Field(description="Location of the node (e.g., Notion, Local Files, OneDrive)")
     path: str = Field(description="Path to the node file")
- 
+
+    @model_validator(mode="after")
+    def check_content(self) -> "FileNode":
+        if self.content is None and self.content_ref is None:
+            raise ValueError("FileNode needs either content or a content_ref")
+        return self
+
+    @property
+    def content_length(self) -> int:
+        return len(self.content) if self.content is not None else self.content_ref.length
+
+    def load_content(self) -> str:
+        """The content, loaded through the shared LRU if the node only holds a reference."""
+        return self.content if self.content is not None else content_cache.load(self.content_ref)
+
+    def iter_content(self) -> Iterator[str]:
+        """The content in pieces, without loading all of it at once if it is on disk."""
+        if self.content is not None:
+            yield self.content
+        else:
+            yield from content_cache.stream(self.content_ref)
+
 class LLMNode(BaseModel):
     """Properties derived from LLM analysis"""
     label: str = Field(description="The type of content contained in the node")
@@ -0,0 +1,116 @@
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from config.settings import RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX
+
+@dataclass
+class ParseFailure:
+    """The last failed parse of a file and when it may be retried."""
+    path: str
+    primary_id: str
+    error_class: str
+    message: str
+    attempts: int
+    strategy: str # the strategy that failed last
+    last_failed_at: datetime
+    next_attempt_at: datetime
+
+class ParseFailureLedger:
+    """Durable record of files whose parse failed or produced no text, keyed by path.
+
+    Each failure doubles the wait before the file is due for another attempt, from
+    `backoff_base` up to `backoff_max` seconds. A successful parse removes the row.
+    Parsing runs in worker threads, so the connection is shared behind a lock.
+    """
+
+    def __init__(self, db_path: str, backoff_base: float = RETRY_BACKOFF_BASE, backoff_max: float = RETRY_BACKOFF_MAX):
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._lock = threading.Lock()
+        self.create_table()
+
+    def create_table(self):
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS parse_failures (
+            path TEXT PRIMARY KEY,
+            primary_id TEXT NOT NULL,
+            error_class TEXT NOT NULL,
+            message TEXT NOT NULL,
+            attempts INTEGER NOT NULL,
+            strategy TEXT NOT NULL,
+            last_failed_at TIMESTAMP NOT NULL,
+            next_attempt_at TIMESTAMP NOT NULL
+        )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_parse_failures_due ON parse_failures (next_attempt_at)")
+        self.conn.commit()
+
+    def backoff(self, attempts: int) -> timedelta:
+        return timedelta(seconds=min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1)))
+
+    def record(self, path: str, primary_id: str, error_class: str, message: str, strategy: str) -> ParseFailure:
+        """Count another failed attempt at a file and schedule its next one.
+
+        The class of the first failure is kept, so retries walk a single escalation ladder.
+        """
+        with self._lock:
+            row = self.conn.execute("SELECT attempts, error_class FROM parse_failures WHERE path = ?", (path,)).fetchone()
+            attempts = (row[0] if row else 0) + 1
+            error_class = row[1] if row else error_class
+            now = datetime.now()
+            failure = ParseFailure(
+                path=path, primary_id=primary_id, error_class=error_class, message=message[:1000],
+                attempts=attempts, strategy=strategy, last_failed_at=now, next_attempt_at=now + self.backoff(attempts),
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO parse_failures "
+                "(path, primary_id, error_class, message, attempts, strategy, last_failed_at, next_attempt_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    failure.path, failure.primary_id, failure.error_class, failure.message, failure.attempts,
+                    failure.strategy, failure.last_failed_at.isoformat(), failure.next_attempt_at.isoformat(),
+                ),
+            )
+            self.conn.commit()
+        return failure
+
+    def resolve(self, path: str) -> bool:
+        """Forget a file's failures after it parsed, returning whether it had any."""
+        with self._lock:
+            cursor = self.conn.execute("DELETE FROM parse_failures WHERE path = ?", (path,))
+            self.conn.commit()
+        return cursor.rowcount > 0
+
+    def _select(self, where: str = "", params: tuple = ()) -> List[ParseFailure]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT path, primary_id, error_class, message, attempts, strategy, last_failed_at, next_attempt_at "
+                f"FROM parse_failures {where} ORDER BY next_attempt_at",
+                params,
+            ).fetchall()
+        return [
+            ParseFailure(*row[:6], datetime.fromisoformat(row[6]), datetime.fromisoformat(row[7]))
+            for row in rows
+        ]
+
+    def get(self, path: str) -> Optional[ParseFailure]:
+        failures = self._select("WHERE path = ?", (path,))
+        return failures[0] if failures else None
+
+    def due(self, now: Optional[datetime] = None) -> List[ParseFailure]:
+        """Failures whose backoff has expired, longest waiting first."""
+        return self._select("WHERE next_attempt_at <= ?", ((now or datetime.now()).isoformat(),))
+
+    def all(self) -> List[ParseFailure]:
+        return self._select()
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.conn.execute("SELECT error_class, COUNT(*) FROM parse_failures GROUP BY error_class"))
+
+    def close(self):
+        self.conn.close()
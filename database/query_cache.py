@@ -0,0 +1,56 @@
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+import numpy as np
+
+from config.settings import QUERY_RESULT_CACHE_SIZE
+
+def query_key(query_vector: np.ndarray, filters: Optional[Dict[str, Any]] = None) -> tuple:
+    """Cache key for a query: a digest of the vector's bytes plus the normalised filters."""
+    digest = hashlib.blake2b(np.asarray(query_vector, dtype=np.float32).tobytes(), digest_size=16).hexdigest()
+    return digest, json.dumps(filters or {}, sort_keys=True, default=str)
+
+class ResultCache:
+    """LRU of ranked result ids per query, valid for one write generation.
+
+    Each entry stores the generation it was computed at and the ranked ids down to
+    the depth that was ranked. A lookup in a later generation is a miss, and so is one
+    needing a deeper ranking than stored. A ranking shorter than its depth already
+    holds every match, so it serves any page.
+    """
+
+    def __init__(self, max_entries: int = QUERY_RESULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[int, int, List[int]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, generation: int, depth: int) -> Optional[List[int]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == generation and entry[1] >= depth:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2][:depth]
+            if entry is not None and entry[0] != generation:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, generation: int, depth: int, ids: List[int]) -> None:
+        if len(ids) < depth:
+            depth = sys.maxsize
+        with self._lock:
+            self._entries[key] = (generation, depth, ids)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,208 @@
+import sqlite3
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Sequence
+
+import click
+import numpy as np
+
+from config.config_logger import logger
+from config.settings import DATABASE_PATH, RELATED_K, RELATED_BLOCK_ELEMENTS
+
+@dataclass
+class GraphUpdate:
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    refreshed: int = 0 # existing nodes whose neighbour list changed
+
+def _normalise(embeddings: np.ndarray) -> np.ndarray:
+    matrix = np.array(embeddings, dtype=np.float32, ndmin=2)
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), np.finfo(np.float32).eps)
+    return matrix
+
+def _sorted_top_k(similarities: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Column indices and values of the k largest entries of each row, best first."""
+    if k < similarities.shape[1]:
+        top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+    else:
+        top = np.broadcast_to(np.arange(similarities.shape[1]), similarities.shape)
+    scores = np.take_along_axis(similarities, top, axis=1)
+    order = np.argsort(-scores, axis=1)
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(scores, order, axis=1)
+
+class RelatedGraph:
+    """Persisted k-nearest-neighbour graph over node embeddings (cosine similarity).
+
+    Neighbour lists are computed in row blocks of `matrix @ matrix.T`, sized so that
+    a block holds at most `block_elements` similarities, which bounds memory however
+    large the corpus grows. `update` only recomputes what changed: new nodes get a
+    full neighbour list, nodes that pointed at a removed node are recomputed, and
+    every other node is only compared against the new nodes.
+    """
+
+    def __init__(self, db_path: str, k: int = RELATED_K, block_elements: int = RELATED_BLOCK_ELEMENTS):
+        self.conn = sqlite3.connect(db_path)
+        self.k = k
+        self.block_elements = block_elements
+        self.logger = logger
+        self.create_table()
+
+    def create_table(self):
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS related_nodes (
+            primary_id TEXT NOT NULL,
+            rank INTEGER NOT NULL,
+            neighbour_id TEXT NOT NULL,
+            score REAL NOT NULL,
+            PRIMARY KEY (primary_id, rank)
+        ) WITHOUT ROWID
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_related_nodes_neighbour ON related_nodes (neighbour_id)")
+        # Nodes in the graph, including any that have no neighbours yet
+        self.conn.execute("CREATE TABLE IF NOT EXISTS related_graph_members (primary_id TEXT PRIMARY KEY)")
+        self.conn.commit()
+
+    def neighbours(self, primary_id: str) -> list[tuple[str, float]]:
+        """The stored neighbours of a node as (primary_id, similarity), most similar first."""
+        return self.conn.execute(
+            "SELECT neighbour_id, score FROM related_nodes WHERE primary_id = ? ORDER BY rank",
+            (primary_id,),
+        ).fetchall()
+
+    def members(self) -> set[str]:
+        return {primary_id for (primary_id,) in self.conn.execute("SELECT primary_id FROM related_graph_members")}
+
+    def _blocks(self, rows: np.ndarray, columns: int) -> Iterator[np.ndarray]:
+        block_size = max(1, self.block_elements // max(1, columns))
+        for start in range(0, len(rows), block_size):
+            yield rows[start:start + block_size]
+
+    def _nearest(self, rows: np.ndarray, matrix: np.ndarray) -> Iterator[tuple[int, np.ndarray, np.ndarray]]:
+        """Yield (row, neighbour indices, similarities) for each row, excluding itself."""
+        k = min(self.k, len(matrix) - 1)
+        for block in self._blocks(rows, len(matrix)):
+            similarities = matrix[block] @ matrix.T
+            similarities[np.arange(len(block)), block] = -np.inf
+            if k <= 0:
+                for row in block:
+                    yield int(row), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+                continue
+            top, scores = _sorted_top_k(similarities, k)
+            for row, neighbour_rows, neighbour_scores in zip(block, top, scores):
+                yield int(row), neighbour_rows, neighbour_scores
+
+    def _write(self, primary_id: str, neighbours: Sequence[tuple[str, float]]) -> None:
+        self.conn.execute("DELETE FROM related_nodes WHERE primary_id = ?", (primary_id,))
+        self.conn.executemany(
+            "INSERT INTO related_nodes (primary_id, rank, neighbour_id, score) VALUES (?, ?, ?, ?)",
+            [(primary_id, rank, neighbour_id, float(score)) for rank, (neighbour_id, score) in enumerate(neighbours)],
+        )
+
+    def build(self, primary_ids: Sequence[str], embeddings: np.ndarray) -> None:
+        """Rebuild the whole graph from scratch."""
+        matrix = _normalise(embeddings)
+        with self.conn:
+            self.conn.execute("DELETE FROM related_nodes")
+            self.conn.execute("DELETE FROM related_graph_members")
+            for row, neighbour_rows, scores in self._nearest(np.arange(len(primary_ids)), matrix):
+                self._write(primary_ids[row], [(primary_ids[i], s) for i, s in zip(neighbour_rows, scores)])
+            self.conn.executemany(
+                "INSERT INTO related_graph_members (primary_id) VALUES (?)", [(p,) for p in primary_ids]
+            )
+
+    def update(self, primary_ids: Sequence[str], embeddings: np.ndarray) -> GraphUpdate:
+        """Bring the graph in line with the current nodes and their embeddings.
+
+        Nodes are identified by primary_id, which changes whenever a file's content
+        does, so a node's embedding never changes under the same id.
+        """
+        primary_ids = list(primary_ids)
+        members = self.members()
+        result = GraphUpdate(
+            added=[primary_id for primary_id in primary_ids if primary_id not in members],
+            removed=sorted(members - set(primary_ids)),
+        )
+        if not members:
+            self.build(primary_ids, embeddings)
+            return result
+        if not result.added and not result.removed:
+            return result
+
+        matrix = _normalise(embeddings)
+        rows = {primary_id: row for row, primary_id in enumerate(primary_ids)}
+        with self.conn:
+            # Nodes that lost a neighbour get a full recompute, like new nodes
+            affected = self._pointing_at(result.removed, rows)
+            for primary_id in result.removed:
+                self.conn.execute("DELETE FROM related_nodes WHERE primary_id = ?", (primary_id,))
+                self.conn.execute("DELETE FROM related_graph_members WHERE primary_id = ?", (primary_id,))
+            recompute = np.array(sorted(rows[p] for p in {*result.added, *affected}), dtype=np.int64)
+            for row, neighbour_rows, scores in self._nearest(recompute, matrix):
+                self._write(primary_ids[row], [(primary_ids[i], s) for i, s in zip(neighbour_rows, scores)])
+            result.refreshed = len(affected)
+
+            if result.added:
+                recomputed = set(recompute.tolist())
+                others = np.array([row for row in range(len(primary_ids)) if row not in recomputed], dtype=np.int64)
+                result.refreshed += self._merge_new(others, np.array([rows[p] for p in result.added]), primary_ids, matrix)
+            self.conn.executemany(
+                "INSERT INTO related_graph_members (primary_id) VALUES (?)", [(p,) for p in result.added]
+            )
+        return result
+
+    def _pointing_at(self, removed: Sequence[str], rows: dict[str, int]) -> set[str]:
+        """Current nodes with any of the removed nodes among their neighbours."""
+        affected = set()
+        for primary_id in removed:
+            for (source,) in self.conn.execute(
+                "SELECT primary_id FROM related_nodes WHERE neighbour_id = ?", (primary_id,)
+            ):
+                if source in rows:
+                    affected.add(source)
+        return affected
+
+    def _merge_new(self, others: np.ndarray, new_rows: np.ndarray, primary_ids: list[str], matrix: np.ndarray) -> int:
+        """Merge new nodes into the lists of existing ones they beat, returning how many changed."""
+        changed = 0
+        for block in self._blocks(others, len(new_rows)):
+            similarities = matrix[block] @ matrix[new_rows].T
+            best_new = similarities.max(axis=1)
+            for row, row_similarities, best in zip(block, similarities, best_new):
+                current = self.neighbours(primary_ids[row])
+                if len(current) == self.k and best <= current[-1][1]:
+                    continue
+                candidates = current + [(primary_ids[new_rows[i]], float(s)) for i, s in enumerate(row_similarities)]
+                candidates.sort(key=lambda neighbour: neighbour[1], reverse=True)
+                self._write(primary_ids[row], candidates[:self.k])
+                changed += 1
+        return changed
+
+    def close(self):
+        self.conn.close()
+
+def update_related_graph(db_path: Path = DATABASE_PATH, rebuild: bool = False) -> GraphUpdate:
+    """Update (or rebuild) the related-nodes graph from the embeddings in the store."""
+    from database.sqlite_manager import SQLiteManager
+    db_manager = SQLiteManager(str(db_path))
+    primary_ids, embeddings = db_manager.embedding_matrix()
+    db_manager.close()
+    graph = RelatedGraph(str(db_path))
+    if rebuild:
+        graph.build(primary_ids, embeddings)
+        result = GraphUpdate(added=primary_ids)
+    else:
+        result = graph.update(primary_ids, embeddings)
+    graph.close()
+    logger.info(
+        f"Related graph: {len(result.added)} added, {len(result.removed)} removed, "
+        f"{result.refreshed} neighbour lists refreshed"
+    )
+    return result
+
+@click.command()
+@click.option("--rebuild", is_flag=True, help="Recompute every neighbour list instead of updating.")
+def main(rebuild: bool):
+    update_related_graph(rebuild=rebuild)
+
+if __name__ == "__main__":
+    main()
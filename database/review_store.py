@@ -0,0 +1,103 @@
+import sqlite3
+from dataclasses import dataclass
+from datetime import date
+from typing import List, Optional
+
+@dataclass
+class ReviewState:
+    """SM-2 review state of a node."""
+    primary_id: str
+    due_date: date
+    interval_days: int = 0
+    ease: float = 2.5
+    repetitions: int = 0
+    last_reviewed: Optional[date] = None
+
+class ReviewStore:
+    """Per-node review state next to the nodes table, indexed by due date."""
+
+    def __init__(self, db_path: str):
+        self.conn = sqlite3.connect(db_path)
+        self.create_table()
+
+    def create_table(self):
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS review_state (
+            primary_id TEXT PRIMARY KEY,
+            due_date TEXT NOT NULL,
+            interval_days INTEGER NOT NULL,
+            ease REAL NOT NULL,
+            repetitions INTEGER NOT NULL,
+            last_reviewed TEXT
+        )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_review_state_due_date ON review_state (due_date)")
+        self.conn.commit()
+
+    def get(self, primary_id: str) -> Optional[ReviewState]:
+        row = self.conn.execute(
+            "SELECT primary_id, due_date, interval_days, ease, repetitions, last_reviewed "
+            "FROM review_state WHERE primary_id = ?",
+            (primary_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        primary_id, due_date, interval_days, ease, repetitions, last_reviewed = row
+        return ReviewState(
+            primary_id=primary_id,
+            due_date=date.fromisoformat(due_date),
+            interval_days=interval_days,
+            ease=ease,
+            repetitions=repetitions,
+            last_reviewed=date.fromisoformat(last_reviewed) if last_reviewed else None,
+        )
+
+    def put(self, state: ReviewState) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO review_state "
+            "(primary_id, due_date, interval_days, ease, repetitions, last_reviewed) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                state.primary_id, state.due_date.isoformat(), state.interval_days, state.ease,
+                state.repetitions, state.last_reviewed.isoformat() if state.last_reviewed else None,
+            ),
+        )
+        self.conn.commit()
+
+    def transfer(self, old_primary_id: str, new_primary_id: str) -> None:
+        """Move a node's review state to the node that superseded it, e.g. after its file was touched.
+
+        State the new node already has is kept.
+        """
+        with self.conn:
+            self.conn.execute(
+                "UPDATE OR IGNORE review_state SET primary_id = ? WHERE primary_id = ?", (new_primary_id, old_primary_id)
+            )
+            self.conn.execute("DELETE FROM review_state WHERE primary_id = ?", (old_primary_id,))
+
+    def due_node_ids(self, on: date, limit: int) -> List[int]:
+        """Node ids due on or before `on`, most overdue first.
+
+        Walks the due_date index and stops after `limit` rows: O(log n + limit).
+        """
+        rows = self.conn.execute(
+            "SELECT nodes.id FROM review_state "
+            "JOIN nodes ON nodes.primary_id = review_state.primary_id "
+            "WHERE review_state.due_date <= ? ORDER BY review_state.due_date LIMIT ?",
+            (on.isoformat(), limit),
+        ).fetchall()
+        return [node_id for (node_id,) in rows]
+
+    def enrol_new(self, due: date, limit: int) -> int:
+        """Give up to `limit` featurised nodes without review state a first due date."""
+        cursor = self.conn.execute(
+            "INSERT INTO review_state (primary_id, due_date, interval_days, ease, repetitions) "
+            "SELECT primary_id, ?, 0, 2.5, 0 FROM nodes "
+            "WHERE summary IS NOT NULL AND primary_id NOT IN (SELECT primary_id FROM review_state) "
+            "ORDER BY id LIMIT ?",
+            (due.isoformat(), limit),
+        )
+        self.conn.commit()
+        return cursor.rowcount
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,261 @@
+"""
+Columnar snapshots of the nodes table.
+
+A snapshot is a directory holding:
+  - nodes-NNNNN.parquet: the node fields, SNAPSHOT_PART_ROWS nodes per file, with an
+    `embedding_row` column pointing into the embedding block (null if not embedded).
+    Datetimes are UTC instants (naive ones taken as local time), each with a
+    `<name>_utc_offset` column holding the original offset in seconds, null if naive.
+  - embeddings.f32: every content embedding as one contiguous row-major float32 block
+  - manifest.json: row counts, embedding shape and the parts, in order
+
+Parts are encoded, written and read in parallel threads (pyarrow releases the GIL
+while encoding and compressing), and the embedding block is memory-mapped, so a snapshot
+can be restored quickly or analysed directly with pandas or duckdb.
+"""
+import functools
+import itertools
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+import click
+import numpy as np
+
+from config.config_logger import logger
+from config.settings import DATABASE_PATH, SNAPSHOT_PART_ROWS, SNAPSHOT_WORKERS
+from database.codec import NODE_CODEC, Column
+from database.generation import read_generation
+from database.sqlite_manager import SQLiteManager
+
+SNAPSHOT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+EMBEDDINGS_NAME = "embeddings.f32"
+EMBEDDING_COLUMN = "content_embedding"
+
+@functools.cache
+def get_arrow():
+    """pyarrow and pyarrow.parquet, imported on first use since only snapshots need them."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Snapshots need pyarrow, install it with `poetry install --extras snapshot`") from e
+    return pyarrow, pyarrow.parquet
+
+def _arrow_type(column: Column):
+    pa, _ = get_arrow()
+    return {
+        "str_list": pa.list_(pa.string()),
+        "datetime": pa.timestamp("us", tz="UTC"),
+        "real": pa.float64(),
+        "integer": pa.int64(),
+    }.get(column.kind, pa.string())
+
+def _offset_name(column: Column) -> str:
+    return f"{column.name}_utc_offset"
+
+def _utc_offset(value: datetime | None) -> int | None:
+    offset = value.utcoffset() if value is not None else None
+    return int(offset.total_seconds()) if offset is not None else None
+
+def _from_utc(value: datetime | None, offset: int | None) -> datetime | None:
+    """Restore a datetime as it was exported, aware with its offset or naive local time."""
+    if value is None:
+        return None
+    if offset is None:
+        return value.astimezone().replace(tzinfo=None)
+    return value.astimezone(timezone(timedelta(seconds=offset)))
+
+@dataclass
+class Snapshot:
+    """A snapshot opened for analysis, without touching SQLite."""
+    nodes: Any # pyarrow.Table
+    embeddings: np.ndarray # memory-mapped, indexed by the nodes' embedding_row
+    manifest: dict
+
+def _field_columns() -> list[Column]:
+    return [column for column in NODE_CODEC.columns.values() if column.name != EMBEDDING_COLUMN]
+
+def _export_part(rows: list[tuple], part_path: Path, first_embedding_row: int, embeddings: np.ndarray) -> None:
+    pa, pq = get_arrow()
+    columns = _field_columns()
+    values = list(zip(*rows))
+    arrays, names = [pa.array(values[0], type=pa.int64())], ["id"]
+    for column, raw in zip(columns, values[1:-1]):
+        decoded = [column.decode(value) if value is not None else None for value in raw]
+        if column.kind == "datetime":
+            # pyarrow would drop the offsets of aware values, so they are kept in their own column
+            offsets = [_utc_offset(value) for value in decoded]
+            decoded = [value.astimezone(timezone.utc) if value is not None else None for value in decoded]
+        arrays.append(pa.array(decoded, type=_arrow_type(column)))
+        names.append(column.name)
+        if column.kind == "datetime":
+            arrays.append(pa.array(offsets, type=pa.int32()))
+            names.append(_offset_name(column))
+    blobs = [blob for blob in values[-1] if blob]
+    embedding_rows, next_row = [], first_embedding_row
+    for blob in values[-1]:
+        embedding_rows.append(next_row if blob else None)
+        next_row += bool(blob)
+    arrays.append(pa.array(embedding_rows, type=pa.int64()))
+    names.append("embedding_row")
+    if blobs:
+        block = np.frombuffer(b"".join(blobs), dtype=np.float32).reshape(len(blobs), -1)
+        embeddings[first_embedding_row:first_embedding_row + len(blobs)] = block
+
+    pq.write_table(pa.Table.from_arrays(arrays, names=names), part_path, compression="zstd")
+
+def export_snapshot(
+    db_path: Path = DATABASE_PATH,
+    snapshot_dir: Path = Path("snapshot"),
+    part_rows: int = SNAPSHOT_PART_ROWS,
+    workers: int = SNAPSHOT_WORKERS,
+) -> dict:
+    """Write every node in the store to a snapshot directory, returning its manifest.
+
+    All rows are read in one read transaction, so a concurrent ingest cannot make the
+    parts, the embedding offsets and the manifest's write generation disagree. Parts
+    are read in order and encoded in parallel, with at most `workers` parts in memory.
+    """
+    get_arrow()
+    snapshot_dir = Path(snapshot_dir)
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path), isolation_level=None)
+    conn.execute("BEGIN")
+    try:
+        index = conn.execute(f"SELECT id, length({EMBEDDING_COLUMN}) FROM nodes ORDER BY id").fetchall()
+        generation = read_generation(conn) if conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'meta'"
+        ).fetchone() else None
+
+        dims = {length // 4 for _, length in index if length}
+        if len(dims) > 1:
+            raise ValueError(f"Embeddings have mixed dimensions: {sorted(dims)}")
+        dim = dims.pop() if dims else 0
+        embedded = sum(1 for _, length in index if length)
+        embeddings_path = snapshot_dir / EMBEDDINGS_NAME
+        with open(embeddings_path, "wb") as f:
+            f.truncate(embedded * dim * 4)
+        embeddings = (
+            np.memmap(embeddings_path, dtype=np.float32, mode="r+", shape=(embedded, dim))
+            if embedded else np.empty((0, dim), dtype=np.float32)
+        )
+
+        names = ("id", *(column.name for column in _field_columns()), EMBEDDING_COLUMN)
+        parts = []
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending, first_embedding_row = [], 0
+            for number, start in enumerate(range(0, len(index), part_rows)):
+                part = index[start:start + part_rows]
+                rows = conn.execute(
+                    f"SELECT {', '.join(names)} FROM nodes WHERE id BETWEEN ? AND ? ORDER BY id",
+                    (part[0][0], part[-1][0]),
+                ).fetchall()
+                part_name = f"nodes-{number:05d}.parquet"
+                parts.append({"file": part_name, "rows": len(rows)})
+                if len(pending) >= workers:
+                    pending.pop(0).result()
+                pending.append(pool.submit(_export_part, rows, snapshot_dir / part_name, first_embedding_row, embeddings))
+                first_embedding_row += sum(1 for _, length in part if length)
+            for future in pending:
+                future.result()
+    finally:
+        conn.execute("COMMIT")
+        conn.close()
+    if isinstance(embeddings, np.memmap):
+        embeddings.flush()
+
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "write_generation": generation,
+        "rows": len(index),
+        "embeddings": {"file": EMBEDDINGS_NAME, "rows": embedded, "dim": dim, "dtype": "float32"},
+        "parts": parts,
+    }
+    (snapshot_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    logger.info(f"Exported {len(index)} nodes ({embedded} embedded) to {snapshot_dir} in {len(parts)} parts")
+    return manifest
+
+def _load_manifest(snapshot_dir: Path) -> dict:
+    manifest = json.loads((snapshot_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+    if manifest["version"] != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {manifest['version']}")
+    return manifest
+
+def _map_embeddings(snapshot_dir: Path, manifest: dict) -> np.ndarray:
+    shape = (manifest["embeddings"]["rows"], manifest["embeddings"]["dim"])
+    if not shape[0]:
+        return np.empty(shape, dtype=np.float32)
+    return np.memmap(snapshot_dir / manifest["embeddings"]["file"], dtype=np.float32, mode="r", shape=shape)
+
+def read_snapshot(snapshot_dir: Path, workers: int = SNAPSHOT_WORKERS) -> Snapshot:
+    """Open a snapshot: node fields as one Arrow table, embeddings memory-mapped."""
+    pa, pq = get_arrow()
+    snapshot_dir = Path(snapshot_dir)
+    manifest = _load_manifest(snapshot_dir)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        tables = list(pool.map(lambda part: pq.read_table(snapshot_dir / part["file"]), manifest["parts"]))
+    nodes = pa.concat_tables(tables) if tables else pa.table({})
+    return Snapshot(nodes=nodes, embeddings=_map_embeddings(snapshot_dir, manifest), manifest=manifest)
+
+def import_snapshot(
+    snapshot_dir: Path = Path("snapshot"),
+    db_path: Path = DATABASE_PATH,
+    workers: int = SNAPSHOT_WORKERS,
+) -> int:
+    """Load a snapshot into the store, keeping node ids, and return the number of nodes.
+
+    Up to `workers` parts are read ahead in parallel while the current one is inserted,
+    one transaction per part, so memory is bounded by the part size rather than the
+    snapshot. The store should not already hold the snapshot's node ids.
+    """
+    _, pq = get_arrow()
+    snapshot_dir = Path(snapshot_dir)
+    manifest = _load_manifest(snapshot_dir)
+    embeddings = _map_embeddings(snapshot_dir, manifest)
+    datetime_columns = [column for column in _field_columns() if column.kind == "datetime"]
+    db_manager = SQLiteManager(str(db_path))
+    imported = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        parts = iter(manifest["parts"])
+        pending = [pool.submit(pq.read_table, snapshot_dir / part["file"]) for part in itertools.islice(parts, workers)]
+        while pending:
+            rows = pending.pop(0).result().to_pylist()
+            if (part := next(parts, None)) is not None:
+                pending.append(pool.submit(pq.read_table, snapshot_dir / part["file"]))
+            for row in rows:
+                embedding_row = row.pop("embedding_row")
+                if embedding_row is not None:
+                    row[EMBEDDING_COLUMN] = embeddings[embedding_row]
+                for column in datetime_columns:
+                    row[column.name] = _from_utc(row[column.name], row.pop(_offset_name(column)))
+            db_manager.insert_nodes(rows, keep_ids=True)
+            imported += len(rows)
+    db_manager.close()
+    logger.info(f"Imported {imported} nodes from {snapshot_dir}")
+    return imported
+
+@click.group()
+def main():
+    pass
+
+@main.command("export")
+@click.argument("snapshot_dir", type=click.Path(path_type=Path))
+def export_command(snapshot_dir: Path):
+    """Write the nodes table to a Parquet snapshot directory."""
+    export_snapshot(snapshot_dir=snapshot_dir)
+
+@main.command("import")
+@click.argument("snapshot_dir", type=click.Path(exists=True, file_okay=False, path_type=Path))
+def import_command(snapshot_dir: Path):
+    """Load a Parquet snapshot directory into the nodes table."""
+    import_snapshot(snapshot_dir=snapshot_dir)
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,14 @@
 import sqlite3
 import json
-from typing import List, Any, Dict
+import random
+from typing import List, Any, Dict, Optional
 import numpy as np
 from datetime import datetime
-from database.node import NODE_PROPERTIES
+from database.codec import NODE_CODEC, NodeCodec
+from database.generation import bump_generation, create_meta_table, read_generation
+from database.query_cache import ResultCache, query_key
+from config.metrics import metrics
+from config.settings import QUERY_RESULT_CACHE_DEPTH
 import os
 
 class NodeStorage:
@@ -74,106 +79,160 @@ class NodeStorage:
 
     def _prepare_db_data(self, node_data: Dict[str, Any]) -> Dict[str, Any]:
         # Prepare a subset of node_data for database storage
-        db_fields = [prop.name for prop in NODE_PROPERTIES]
+        db_fields = NODE_CODEC.columns
         return {k: v for k, v in node_data.items() if k in db_fields}
 
 class SQLiteManager:
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, codec: NodeCodec = NODE_CODEC):
         self.conn = sqlite3.connect(db_path)
         self.cursor = self.conn.cursor()
+        self.codec = codec
+        self.result_cache = ResultCache()
         self.create_table()
 
     def create_table(self):
-        # Dynamically create table based on NodeProperty instances
-        columns = []
-        for prop in NODE_PROPERTIES:
-            col_type = self._get_sqlite_type(prop.datatype)
-            nullable = "NOT NULL" if prop.mode == "REQUIRED" else ""
-            columns.append(f"{prop.name} {col_type} {nullable}")
-        
-        create_table_sql = f"""
-        CREATE TABLE IF NOT EXISTS nodes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            {', '.join(columns)}
+        # Table layout is derived once from the node models by the codec
+        self.cursor.execute(self.codec.create_table_sql())
+        self.cursor.execute(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{self.codec.table}_primary_id "
+            f"ON {self.codec.table} (primary_id)"
+        )
+        # Partial index holding only the featurised ids, read when sampling
+        self.cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{self.codec.table}_featurised "
+            f"ON {self.codec.table} (id) WHERE summary IS NOT NULL"
         )
-        """
-        self.cursor.execute(create_table_sql)
         self.conn.commit()
+        create_meta_table(self.conn)
+
+    @property
+    def write_generation(self) -> int:
+        """Bumped by every insert, update and delete, including those of other connections."""
+        return read_generation(self.conn)
 
-    def _get_sqlite_type(self, datatype: str) -> str:
-        type_mapping = {
-            "str": "TEXT",
-            "List[str]": "TEXT",
-            "datetime": "TIMESTAMP",
-            "List[float]": "BLOB"
-        }
-        return type_mapping.get(datatype, "TEXT")
-
-    def insert_node(self, node_data: Dict[str, Any]):
-        columns = []
-        placeholders = []
-        values = []
-        for prop in NodeProperty.get_instances():
-            if prop.name in node_data:
-                columns.append(prop.name)
-                placeholders.append('?')
-                value = node_data[prop.name]
-                if prop.datatype == "List[str]":
-                    value = json.dumps(value)
-                elif prop.datatype == "List[float]":
-                    value = np.array(value, dtype=np.float32).tobytes()
-                elif prop.datatype == "datetime":
-                    value = value.isoformat()
-                values.append(value)
-
-        insert_sql = f"INSERT INTO nodes ({', '.join(columns)}) VALUES ({', '.join(placeholders)})"
-        self.cursor.execute(insert_sql, values)
+    @metrics.timed("sqlite_write", op="insert")
+    def insert_node(self, node_data: Dict[str, Any]) -> int:
+        names, values = self.codec.encode(node_data)
+        self.cursor.execute(self.codec.insert_sql(names), values)
+        row_id = self.cursor.lastrowid
+        bump_generation(self.conn)
         self.conn.commit()
-        return self.cursor.lastrowid
+        return row_id
 
-    def get_node(self, node_id: int) -> Dict[str, Any]:
-        self.cursor.execute("SELECT * FROM nodes WHERE id = ?", (node_id,))
+    @metrics.timed("sqlite_write", op="upsert")
+    def upsert_node(self, node_data: Dict[str, Any]) -> int:
+        """Insert a node, or update the existing row with the same primary_id."""
+        names, values = self.codec.encode(node_data)
+        self.cursor.execute(self.codec.upsert_sql(names), values)
+        bump_generation(self.conn)
+        self.conn.commit()
+        return self.get_node_id(node_data["primary_id"])
+
+    def get_node_id(self, primary_id: str) -> Optional[int]:
+        self.cursor.execute("SELECT id FROM nodes WHERE primary_id = ?", (primary_id,))
         row = self.cursor.fetchone()
-        if row:
-            column_names = [description[0] for description in self.cursor.description]
-            node_data = dict(zip(column_names, row))
-            for prop in NodeProperty.get_instances():
-                if prop.datatype == "List[str]":
-                    node_data[prop.name] = json.loads(node_data[prop.name]) if node_data[prop.name] else []
-                elif prop.datatype == "List[float]":
-                    node_data[prop.name] = np.frombuffer(node_data[prop.name], dtype=np.float32).tolist() if node_data[prop.name] else []
-                elif prop.datatype == "datetime":
-                    node_data[prop.name] = datetime.fromisoformat(node_data[prop.name]) if node_data[prop.name] else None
-            return node_data
-        return None
+        return row[0] if row else None
+
+    @metrics.timed("sqlite_write", op="insert_many")
+    def insert_nodes(self, nodes_data: List[Dict[str, Any]], keep_ids: bool = False) -> None:
+        """Insert many rows in a single transaction, batching rows with the same columns.
+
+        With `keep_ids`, each row's `id` is inserted too, e.g. when restoring a snapshot.
+        """
+        batches: Dict[tuple, list] = {}
+        for node_data in nodes_data:
+            names, values = self.codec.encode(node_data)
+            if keep_ids:
+                names, values = ("id", *names), [node_data["id"], *values]
+            batches.setdefault(names, []).append(values)
+        with self.conn:
+            for names, rows in batches.items():
+                self.conn.executemany(self.codec.insert_sql(names), rows)
+            bump_generation(self.conn)
+
+    def get_node(self, node_id: int, fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        nodes = self.get_nodes([node_id], fields)
+        return nodes[0] if nodes else None
+
+    @metrics.timed("sqlite_read")
+    def get_nodes(self, node_ids: List[int], fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Fetch several nodes at once, decoding only the requested fields.
+
+        Results are returned in the order of `node_ids`; missing ids are skipped.
+        """
+        names = self.codec.projection(fields)
+        self.cursor.execute(self.codec.select_sql(names), (json.dumps(list(node_ids)),))
+        by_id = {row[0]: self.codec.decode(names, row) for row in self.cursor.fetchall()}
+        return [by_id[node_id] for node_id in node_ids if node_id in by_id]
 
+    @metrics.timed("sqlite_read", op="embeddings")
+    def embedding_matrix(self) -> tuple[List[str], np.ndarray]:
+        """The primary_ids of all embedded nodes and their embeddings as one float32 matrix."""
+        self.cursor.execute("SELECT primary_id, content_embedding FROM nodes WHERE content_embedding IS NOT NULL")
+        rows = self.cursor.fetchall()
+        if not rows:
+            return [], np.empty((0, 0), dtype=np.float32)
+        matrix = np.frombuffer(b"".join(blob for _, blob in rows), dtype=np.float32).reshape(len(rows), -1)
+        return [primary_id for primary_id, _ in rows], matrix
+
+    def sample_node_ids(self, k: int, rng: Optional[random.Random] = None) -> List[int]:
+        """Sample min(k, featurised) distinct featurised node ids, uniformly.
+
+        The ids come from the partial index on featurised rows, so the cost is O(n) in
+        the number of featurised nodes but never touches the table rows themselves.
+        """
+        rng = rng or random.Random()
+        self.cursor.execute(f"SELECT id FROM {self.codec.table} INDEXED BY idx_{self.codec.table}_featurised WHERE summary IS NOT NULL")
+        node_ids = [node_id for (node_id,) in self.cursor.fetchall()]
+        return rng.sample(node_ids, min(k, len(node_ids)))
+
+    @metrics.timed("sqlite_write", op="update")
     def update_node(self, node_id: int, update_data: Dict[str, Any]):
-        set_clauses = []
-        values = []
-        for prop in NodeProperty.get_instances():
-            if prop.name in update_data:
-                set_clauses.append(f"{prop.name} = ?")
-                value = update_data[prop.name]
-                if prop.datatype == "List[str]":
-                    value = json.dumps(value)
-                elif prop.datatype == "List[float]":
-                    value = np.array(value, dtype=np.float32).tobytes()
-                elif prop.datatype == "datetime":
-                    value = value.isoformat()
-                values.append(value)
-        
-        update_sql = f"UPDATE nodes SET {', '.join(set_clauses)} WHERE id = ?"
+        names, values = self.codec.encode(update_data)
+        if not names:
+            return
         values.append(node_id)
-        self.cursor.execute(update_sql, values)
+        self.cursor.execute(self.codec.update_sql(names), values)
+        bump_generation(self.conn)
         self.conn.commit()
 
+    @metrics.timed("sqlite_write", op="delete")
     def delete_node(self, node_id: int):
         self.cursor.execute("DELETE FROM nodes WHERE id = ?", (node_id,))
+        bump_generation(self.conn)
         self.conn.commit()
 
-    def vector_search(self, query_vector: List[float], top_k: int = 5) -> List[Dict[str, Any]]:
-        query_vector = np.array(query_vector, dtype=np.float32)
-        self.cursor.execute("SELECT id, embedding FROM nodes")
+    def vector_search(
+        self,
+        query_vector: List[float],
+        top_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        offset: int = 0,
+    ) -> List[Dict[str, Any]]:
+        """Nodes nearest to the query vector, optionally only those whose fields equal `filters`.
+
+        Ranked ids are cached per (query, filters) until the next write to the store,
+        so repeating a query or paging through it with `offset` skips the scan. The
+        ranking is cached in multiples of QUERY_RESULT_CACHE_DEPTH ids, so the next
+        pages come from the same entry.
+        """
+        query_vector = np.asarray(query_vector, dtype=np.float32)
+        depth = offset + top_k
+        key = query_key(query_vector, filters)
+        generation = self.write_generation
+        ids = self.result_cache.get(key, generation, depth)
+        if ids is None:
+            ranked_depth = -(-depth // QUERY_RESULT_CACHE_DEPTH) * QUERY_RESULT_CACHE_DEPTH
+            ids = self._rank(query_vector, filters or {}, ranked_depth)
+            self.result_cache.put(key, generation, ranked_depth, ids)
+        return self.get_nodes(ids[offset:depth])
+
+    @metrics.timed("sqlite_read", op="vector_scan")
+    def _rank(self, query_vector: np.ndarray, filters: Dict[str, Any], depth: int) -> List[int]:
+        self.codec.projection(filters)
+        names, values = self.codec.encode(filters)
+        where = "".join(f" AND {name} = ?" for name in names)
+        self.cursor.execute(f"SELECT id, content_embedding FROM nodes WHERE content_embedding IS NOT NULL{where}", values)
         results = []
         for row in self.cursor.fetchall():
             id, embedding_bytes = row
@@ -181,11 +240,9 @@ class SQLiteManager:
                 embedding = np.frombuffer(embedding_bytes, dtype=np.float32)
                 similarity = 1 - np.linalg.norm(query_vector - embedding)
                 results.append((id, similarity))
-        
+
         results.sort(key=lambda x: x[1], reverse=True)
-        top_results = results[:top_k]
-        
-        return [self.get_node(id) for id, _ in top_results]
+        return [id for id, _ in results[:depth]]
 
     def close(self):
         self.conn.close()
@@ -196,10 +253,13 @@ if __name__ == "__main__":
     
     # Example node data
     node_data = {
+        "primary_id": "d41d8cd98f00b204e9800998ecf8427e",
+        "content": "X and Y are related...",
+        "file_size": 12.0,
         "label": "Personal Note",
         "author": ["John Doe"],
-        "creation_date": datetime.now(),
-        "modification_date": datetime.now(),
+        "file_creation_time": datetime.now(),
+        "file_modification_time": datetime.now(),
         "filetype": "text",
         "location": "Local Files",
         "path": "/path/to/file",
@@ -214,7 +274,7 @@ if __name__ == "__main__":
         "entities_places": ["Place A", "Place B"],
         "entities_organizations": ["Org A", "Org B"],
         "entities_references": ["Ref 1", "Ref 2"],
-        "embedding": [0.1, 0.2, 0.3, 0.4]
+        "content_embedding": [0.1, 0.2, 0.3, 0.4]
     }
 
     # Insert a node
@@ -225,6 +285,10 @@ if __name__ == "__main__":
     retrieved_node = db_manager.get_node(node_id)
     print(f"Retrieved node: {retrieved_node}")
 
+    # Retrieve only a few columns
+    summaries = db_manager.get_nodes([node_id], fields=["path", "summary"])
+    print(f"Projected nodes: {summaries}")
+
     # Update the node
     db_manager.update_node(node_id, {"summary": "Updated summary..."})
 
@@ -0,0 +1,34 @@
+import sqlite3
+from datetime import datetime
+from typing import Optional
+
+class SyncCursorStore:
+    """Stores the incremental sync position (e.g. Notion's last_edited_time) per source."""
+
+    def __init__(self, db_path: str):
+        self.conn = sqlite3.connect(db_path)
+        self.create_table()
+
+    def create_table(self):
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS sync_cursors (
+            source TEXT PRIMARY KEY,
+            cursor TEXT NOT NULL,
+            updated_at TIMESTAMP NOT NULL
+        )
+        """)
+        self.conn.commit()
+
+    def get(self, source: str) -> Optional[str]:
+        row = self.conn.execute("SELECT cursor FROM sync_cursors WHERE source = ?", (source,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, source: str, cursor: str) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO sync_cursors (source, cursor, updated_at) VALUES (?, ?, ?)",
+            (source, cursor, datetime.now().isoformat()),
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from components.featurisation.chunking import chunk_text
+from database.chunk_store import ChunkStore
+
+def unit(*values: float) -> np.ndarray:
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+def test_passage_search_returns_offsets(tmp_path):
+    """Test that the best passage is found with the offsets of its text."""
+    store = ChunkStore(str(tmp_path / "chunks.db"))
+    text = "alpha " * 400 + "\n\n" + "beta " * 400 + "\n\n" + "gamma " * 400
+    chunks = chunk_text(text, max_chars=2500)
+    assert len(chunks) == 3
+    store.put("doc", chunks, np.stack([unit(1, 0, 0), unit(0, 1, 0), unit(0, 0, 1)]))
+
+    best = store.search_passages([0, 1, 0.1], top_k=1)[0]
+    assert (best.primary_id, best.ordinal) == ("doc", 1)
+    assert text[best.start:best.end].strip().startswith("beta")
+    assert [p.ordinal for p in store.search_passages([0, 1, 0.1], top_k=3)] == [1, 2, 0]
+
+def test_documents_are_ranked_by_pooled_passages(tmp_path):
+    """Test max and sum pooling, and that replacing or removing chunks updates results."""
+    store = ChunkStore(str(tmp_path / "chunks.db"))
+    chunks = chunk_text("one\n\ntwo\n\nthree", max_chars=5)
+    # "focused" has one excellent passage, "broad" three good ones
+    store.put("focused", chunks, np.stack([unit(1, 0), unit(0, 1), unit(0, 1)]))
+    store.put("broad", chunks, np.stack([unit(1, 0.5)] * 3))
+
+    assert [hit.primary_id for hit in store.search_documents([1, 0], pooling="max")] == ["focused", "broad"]
+    hits = store.search_documents([1, 0], pooling="sum", passages_per_document=2)
+    assert [hit.primary_id for hit in hits] == ["broad", "focused"]
+    assert hits[0].score == pytest.approx(3 / np.sqrt(1.25), rel=1e-5)
+    assert len(hits[1].passages) == 2 and hits[1].passages[0].ordinal == 0
+
+    store.remove("broad")
+    assert [hit.primary_id for hit in store.search_documents([1, 0], pooling="sum")] == ["focused"]
+    with pytest.raises(ValueError):
+        store.put("focused", chunks, np.zeros((2, 2)))
+
+class WriteAfterFirstSelect:
+    """Connection proxy that lets another connection write right after the first SELECT."""
+
+    def __init__(self, conn, write):
+        self.conn = conn
+        self.write = write
+
+    def execute(self, sql, *args):
+        cursor = self.conn.execute(sql, *args)
+        if self.write is not None and sql.lstrip().startswith("SELECT primary_id, dim"):
+            cursor = cursor.fetchall()
+            self.write()
+            self.write = None
+            return _Rows(cursor)
+        return cursor
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+class _Rows:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def fetchall(self):
+        return self.rows
+
+def test_index_is_loaded_from_one_snapshot(tmp_path):
+    """Test that a write between the index's two reads cannot split offsets from the matrix."""
+    db_path = str(tmp_path / "chunks.db")
+    store = ChunkStore(db_path)
+    # WAL, as the pipeline's ledger sets, lets the writer commit under an open reader
+    store.conn.execute("PRAGMA journal_mode=WAL")
+    chunks = chunk_text("one\n\ntwo", max_chars=4)
+    store.put("a", chunks, np.stack([unit(1, 0), unit(0, 1)]))
+    writer = ChunkStore(db_path)
+    store.conn = WriteAfterFirstSelect(store.conn, lambda: writer.put("b", chunks, np.stack([unit(1, 1)] * 2)))
+
+    index = store.load_index()
+    assert index.primary_ids == ["a"]
+    assert index.offsets[-1] == len(index.ordinals) == len(index.matrix) == 2
+    # The write is picked up by the next load
+    assert store.load_index().primary_ids == ["a", "b"]
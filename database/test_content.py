@@ -0,0 +1,66 @@
+import pytest
+from datetime import datetime
+
+from database.codec import NODE_CODEC, node_to_row
+from database.content import ContentCache, ContentRef
+from database.node import FileNode
+
+def make_node(**content) -> FileNode:
+    now = datetime(2024, 1, 1)
+    return FileNode(
+        primary_id="abc", file_size=1.0, file_creation_time=now, file_modification_time=now,
+        filetype="md", location="Local Files", path="/tmp/a.md", **content,
+    )
+
+def test_lazy_node_loads_and_streams_content(tmp_path):
+    """Test that a node holding only a reference loads its text on demand."""
+    cache_file = tmp_path / "abc.txt"
+    cache_file.write_text("para one\n\npara two", encoding="utf-8")
+    node = make_node(content_ref=ContentRef(path=str(cache_file), length=18))
+
+    assert node.content is None and node.content_length == 18
+    assert node.load_content() == "para one\n\npara two"
+    assert "".join(node.iter_content()) == "para one\n\npara two"
+    # The stored row carries the full text, the reference itself is never a column
+    row = node_to_row(node)
+    assert row["content"] == "para one\n\npara two"
+    assert "content_ref" not in NODE_CODEC.columns
+    assert "content_ref" not in node.model_dump()
+
+def test_node_needs_content_or_reference():
+    """Test that a node without content or a reference is rejected."""
+    with pytest.raises(ValueError):
+        make_node()
+
+def test_lru_is_bounded_by_total_length(tmp_path):
+    """Test that least recently used contents are evicted past the size bound."""
+    cache = ContentCache(max_chars=250)
+    refs = []
+    for i in range(4):
+        path = tmp_path / f"{i}.txt"
+        path.write_text(str(i) * 100, encoding="utf-8")
+        refs.append(ContentRef(path=str(path), length=100))
+
+    for ref in refs[:2]:
+        cache.load(ref)
+    cache.load(refs[0])
+    cache.load(refs[2])
+
+    assert cache.size == 200
+    assert (cache.hits, cache.misses) == (1, 3)
+    # refs[1] was least recently used, so it was evicted and is read from disk again
+    cache.load(refs[1])
+    assert cache.misses == 4
+
+def test_put_replaces_a_stale_entry(tmp_path):
+    """Test that re-priming a path replaces its old content and keeps the size exact."""
+    cache = ContentCache(max_chars=250)
+    ref = ContentRef(path=str(tmp_path / "a.txt"), length=100)
+    cache.put(ref, "old " * 25)
+    cache.put(ref, "new text")
+
+    assert cache.load(ref) == "new text"
+    assert cache.size == len("new text")
+    # Content too large to cache still evicts the stale entry
+    cache.put(ref, "x" * 300)
+    assert cache.size == 0
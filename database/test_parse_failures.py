@@ -0,0 +1,22 @@
+from datetime import datetime, timedelta
+
+from database.parse_failures import ParseFailureLedger
+
+def test_backoff_doubles_and_resolve_clears(tmp_path):
+    """Test that each failure doubles the wait up to the cap and resolving drops the row."""
+    ledger = ParseFailureLedger(str(tmp_path / "nodes.db"), backoff_base=60, backoff_max=200)
+    waits = []
+    for strategy in ("default", "tika_long", "ocr"):
+        failure = ledger.record("/docs/a.pdf", "hash-a", "timeout" if strategy == "default" else "empty_text", "timed out", strategy)
+        waits.append((failure.next_attempt_at - failure.last_failed_at).total_seconds())
+
+    assert waits == [60, 120, 200]
+    stored = ledger.get("/docs/a.pdf")
+    assert (stored.attempts, stored.error_class, stored.strategy) == (3, "timeout", "ocr")
+    assert ledger.due() == []
+    assert [f.path for f in ledger.due(datetime.now() + timedelta(seconds=300))] == ["/docs/a.pdf"]
+    assert ledger.counts() == {"timeout": 1}
+
+    assert ledger.resolve("/docs/a.pdf")
+    assert not ledger.resolve("/docs/a.pdf")
+    assert ledger.all() == []
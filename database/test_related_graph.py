@@ -0,0 +1,39 @@
+import pytest
+import numpy as np
+
+from database.related_graph import RelatedGraph
+
+def neighbour_ids(graph: RelatedGraph, primary_ids) -> dict:
+    return {primary_id: [n for n, _ in graph.neighbours(primary_id)] for primary_id in primary_ids}
+
+def test_incremental_updates_match_a_full_rebuild(tmp_path):
+    """Test that adding and removing nodes leaves the same graph as rebuilding it."""
+    rng = np.random.default_rng(0)
+    primary_ids = [f"n{i}" for i in range(60)]
+    embeddings = rng.standard_normal((60, 8)).astype(np.float32)
+    # A tiny block size forces many blocks
+    incremental = RelatedGraph(str(tmp_path / "incremental.db"), k=5, block_elements=64)
+    incremental.update(primary_ids[:40], embeddings[:40])
+
+    keep = [i for i in range(60) if i % 7]
+    current = [primary_ids[i] for i in keep]
+    result = incremental.update(current, embeddings[keep])
+    assert result.added == [p for p in current if int(p[1:]) >= 40]
+    assert result.removed == sorted(p for p in primary_ids[:40] if p not in current)
+    assert incremental.members() == set(current)
+
+    rebuilt = RelatedGraph(str(tmp_path / "rebuilt.db"), k=5)
+    rebuilt.build(current, embeddings[keep])
+    assert neighbour_ids(incremental, current) == neighbour_ids(rebuilt, current)
+    neighbours = incremental.neighbours("n1")
+    assert len(neighbours) == 5 and all(a[1] >= b[1] for a, b in zip(neighbours, neighbours[1:]))
+
+def test_small_graphs(tmp_path):
+    """Test that a lone node has no neighbours and gains one when a second node arrives."""
+    graph = RelatedGraph(str(tmp_path / "graph.db"), k=3)
+    graph.update(["a"], np.array([[1.0, 0.0]]))
+    assert graph.neighbours("a") == []
+
+    graph.update(["a", "b"], np.array([[1.0, 0.0], [1.0, 1.0]]))
+    assert [n for n, _ in graph.neighbours("a")] == ["b"]
+    assert graph.neighbours("b")[0][1] == pytest.approx(np.sqrt(0.5))
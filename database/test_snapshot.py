@@ -0,0 +1,50 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from database.codec import node_to_row
+from database.node import EmbeddingNode, FileNode
+from database.sqlite_manager import SQLiteManager
+
+pytest.importorskip("pyarrow")
+
+from database.snapshot import export_snapshot, import_snapshot, read_snapshot
+
+def make_row(i: int, embedded: bool) -> dict:
+    # Odd nodes have aware creation times, e.g. Notion pages, in various offsets
+    created = datetime(2024, 1, 1, tzinfo=timezone(timedelta(hours=i - 5))) if i % 2 else datetime(2024, 1, 1)
+    file_node = FileNode(
+        primary_id=f"n{i}", content=f"Content {i}", file_size=float(i),
+        file_creation_time=created, file_modification_time=datetime(2024, 1, 2, i),
+        filetype="md", location="Local Files", path=f"/tmp/n{i}.md",
+    )
+    embedding = EmbeddingNode(content_embedding=[float(i), 1.0, 0.5]) if embedded else None
+    return node_to_row(file_node, embedding) | {"tags": [f"tag{i}"]}
+
+def test_snapshot_roundtrip(tmp_path):
+    """Test that a snapshot restores every node with its id, fields and embedding."""
+    source = SQLiteManager(str(tmp_path / "source.db"))
+    for i in range(10):
+        source.insert_node(make_row(i, embedded=i % 3 != 0))
+    source.delete_node(source.get_node_id("n4"))
+
+    manifest = export_snapshot(tmp_path / "source.db", tmp_path / "snapshot", part_rows=4, workers=3)
+    assert manifest["rows"] == 9 and len(manifest["parts"]) == 3
+    assert manifest["embeddings"] == {"file": "embeddings.f32", "rows": 5, "dim": 3, "dtype": "float32"}
+
+    snapshot = read_snapshot(tmp_path / "snapshot")
+    assert isinstance(snapshot.embeddings, np.memmap)
+    nodes = snapshot.nodes.to_pylist()
+    assert [node["primary_id"] for node in nodes] == [f"n{i}" for i in range(10) if i != 4]
+    n5 = nodes[4]
+    assert n5["tags"] == ["tag5"]
+    assert n5["file_modification_time"] == datetime(2024, 1, 2, 5).astimezone(timezone.utc)
+    assert n5["file_creation_time"] == datetime(2024, 1, 1, tzinfo=timezone.utc) and n5["file_creation_time_utc_offset"] == 0
+    assert snapshot.embeddings[n5["embedding_row"]].tolist() == [5.0, 1.0, 0.5]
+
+    assert import_snapshot(tmp_path / "snapshot", tmp_path / "restored.db") == 9
+    restored = SQLiteManager(str(tmp_path / "restored.db"))
+    for node_id in range(1, 11):
+        assert restored.get_node(node_id) == source.get_node(node_id)
+    assert restored.get_node_id("n4") is None
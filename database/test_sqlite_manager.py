@@ -0,0 +1,111 @@
+import pytest
+from datetime import datetime
+
+from database.codec import NODE_CODEC, node_to_row
+from database.node import FileNode, EmbeddingNode
+from database.sqlite_manager import SQLiteManager
+
+@pytest.fixture
+def db_manager(tmp_path):
+    """Create a SQLiteManager backed by a temporary database."""
+    manager = SQLiteManager(str(tmp_path / "nodes.db"))
+    yield manager
+    manager.close()
+
+def make_row(primary_id: str, **overrides) -> dict:
+    file_node = FileNode(
+        primary_id=primary_id,
+        content=f"Content of {primary_id}",
+        file_size=1.0,
+        file_creation_time=datetime(2024, 1, 1, 12, 0),
+        file_modification_time=datetime(2024, 1, 2, 12, 0),
+        filetype="pdf",
+        location="Local Files",
+        path=f"/tmp/{primary_id}.pdf",
+    )
+    row = node_to_row(file_node, EmbeddingNode(content_embedding=[0.5, 0.25]))
+    row.update(overrides)
+    return row
+
+def test_codec_columns_follow_models():
+    """Test that the codec derives types and nullability from the pydantic models."""
+    assert NODE_CODEC.columns["primary_id"].required
+    assert not NODE_CODEC.columns["summary"].required
+    assert NODE_CODEC.columns["tags"].sql_type == "TEXT"
+    assert NODE_CODEC.columns["content_embedding"].sql_type == "BLOB"
+    assert NODE_CODEC.columns["file_creation_time"].sql_type == "TIMESTAMP"
+
+def test_insert_and_get_roundtrip(db_manager):
+    """Test that every column survives an encode/decode roundtrip."""
+    node_id = db_manager.insert_node(make_row("a", tags=["x", "y"]))
+    node = db_manager.get_node(node_id)
+
+    assert node["primary_id"] == "a"
+    assert node["tags"] == ["x", "y"]
+    assert node["file_creation_time"] == datetime(2024, 1, 1, 12, 0)
+    assert node["content_embedding"] == [0.5, 0.25]
+    assert node["themes"] == []
+
+def test_get_nodes_projection_and_order(db_manager):
+    """Test that get_nodes only returns requested fields, in the order of the ids."""
+    db_manager.insert_nodes([make_row("a"), make_row("b"), make_row("c")])
+
+    nodes = db_manager.get_nodes([3, 1, 42], fields=["primary_id", "path"])
+
+    assert [node["primary_id"] for node in nodes] == ["c", "a"]
+    assert set(nodes[0]) == {"id", "primary_id", "path"}
+
+def test_get_nodes_rejects_unknown_fields(db_manager):
+    """Test that projecting onto a non-existent column fails loudly."""
+    with pytest.raises(ValueError):
+        db_manager.get_nodes([1], fields=["not_a_column"])
+
+def test_update_node_only_touches_given_columns(db_manager):
+    """Test that update_node leaves other columns untouched."""
+    node_id = db_manager.insert_node(make_row("a"))
+    db_manager.update_node(node_id, {"summary": "Updated", "tags": ["t"]})
+
+    node = db_manager.get_node(node_id, fields=["summary", "tags", "content"])
+    assert node["summary"] == "Updated"
+    assert node["tags"] == ["t"]
+    assert node["content"] == "Content of a"
+
+def test_vector_search_results_are_cached_until_the_next_write(tmp_path, db_manager):
+    """Test that repeated and paged searches hit the cache and any write invalidates it."""
+    for i in range(4):
+        db_manager.insert_node(make_row(f"n{i}", content_embedding=[1.0, i / 10], filetype="pdf" if i % 2 else "md"))
+    generation = db_manager.write_generation
+
+    first_page = db_manager.vector_search([1.0, 0.0], top_k=2)
+    assert [node["primary_id"] for node in first_page] == ["n0", "n1"]
+    assert [node["primary_id"] for node in db_manager.vector_search([1.0, 0.0], top_k=2)] == ["n0", "n1"]
+    assert db_manager.result_cache.hits == 1
+    # The cached ranking holds every match, so later pages come from it too
+    assert [node["primary_id"] for node in db_manager.vector_search([1.0, 0.0], top_k=2, offset=2)] == ["n2", "n3"]
+    assert db_manager.result_cache.hits == 2
+    assert [node["primary_id"] for node in db_manager.vector_search([1.0, 0.0], filters={"filetype": "pdf"})] == ["n1", "n3"]
+
+    # A write through another connection moves the generation and invalidates results
+    other = SQLiteManager(str(tmp_path / "nodes.db"))
+    other.delete_node(other.get_node_id("n0"))
+    other.close()
+    assert db_manager.write_generation == generation + 1
+    assert [node["primary_id"] for node in db_manager.vector_search([1.0, 0.0], top_k=2)] == ["n1", "n2"]
+    with pytest.raises(ValueError):
+        db_manager.vector_search([1.0, 0.0], filters={"nope": 1})
+
+def test_paging_past_the_cached_depth_ranks_one_more_block(db_manager, monkeypatch):
+    """Test that rankings are cached in blocks, so only the page crossing a block boundary re-scans."""
+    monkeypatch.setattr("database.sqlite_manager.QUERY_RESULT_CACHE_DEPTH", 3)
+    for i in range(8):
+        db_manager.insert_node(make_row(f"n{i}", content_embedding=[1.0, i / 10]))
+
+    pages = [
+        [node["primary_id"] for node in db_manager.vector_search([1.0, 0.0], top_k=2, offset=offset)]
+        for offset in range(0, 8, 2)
+    ]
+    assert pages == [["n0", "n1"], ["n2", "n3"], ["n4", "n5"], ["n6", "n7"]]
+    # Ranked to 3, then 6 (which also served the third page), then 9, which holds every match
+    assert (db_manager.result_cache.misses, db_manager.result_cache.hits) == (3, 1)
+    db_manager.vector_search([1.0, 0.0], top_k=5, offset=3)
+    assert db_manager.result_cache.hits == 2
@@ -0,0 +1,33 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from cli import cli
+
+ROOT = Path(__file__).resolve().parent.parent
+
+def test_help_lists_commands():
+    """Test that the lazy subcommands are listed with their help texts."""
+    result = CliRunner().invoke(cli, ["--help"])
+
+    assert result.exit_code == 0
+    for name in ("ingest", "digest", "notes", "export-vault", "related-graph", "snapshot", "serve", "notion-sync", "cache-stats"):
+        assert name in result.output
+
+def test_light_commands_import_no_backends():
+    """Test that --help and cache-stats never import heavy or credentialed backends."""
+    heavy = ["numpy", "tika", "pytesseract", "pdf2image", "pydantic_ai", "google.generativeai", "httpx", "components.pipeline.pipeline"]
+    script = (
+        "import sys, json\n"
+        "from click.testing import CliRunner\n"
+        "from cli import cli\n"
+        "CliRunner().invoke(cli, ['--help'])\n"
+        "CliRunner().invoke(cli, ['cache-stats'])\n"
+        f"print(json.dumps([name for name in {heavy!r} if name in sys.modules]))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True)
+
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []